@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""
+build_daemon.py — a local build server that keeps the clean tree hot
+--------------------------------------------------------------------
+One long-running process instead of one per build:
+
+• The clean tree is mapped once (virtual_tree) and its files are
+  compressed once at start-up; every build is an overlay holding only its
+  patched files, packed straight to .fmf / .zip.
+• A process pool does the CPU work.  Each worker indexes every editable
+  .jsb (patch_plan / jsb_patch) and loads the clean ratings JSON when it
+  starts, so a request pays for its own edits only – no imports, no
+  re-reading, no re-indexing.
+• Rendered files are shared between requests: the same physics values or
+  plan rows for a file are patched once, the same sheet is parsed once.
+  An identical request without a "name" returns the artifact already built.
+• Requests are validated (input_rules) before anything is built and, unless
+  "verify": false, checked afterwards (build_verify).
+• Listens on localhost HTTP (default 127.0.0.1:8765) or a Unix socket.
+  Paths in a request must stay inside this folder; a request whose Host
+  is not localhost, or a POST that is not application/json, is refused,
+  so a web page in a browser cannot drive the daemon.
+
+POST /build      JSON – the keys of a variants.json entry, inline or as paths
+                 (relative to this folder):
+    {"name": "fast_wingers",                       optional; default = content hash
+     "physics": {"sprint_speed": 70000} | "physics/fast.json",
+     "plan": [{"file": "ratings", "path": …, "op": "mul", "value": 1.1}] | "plan.csv",
+     "weights": {...} | "weights.json",
+     "ratings": {"3": {"Tackles Won": 120}} | "ratings_xlsx": "player_ratings_data.xlsx",
+     "format": "fmf" | "zip", "return": "path" | "artifact", "verify": true}
+  → 200 {"name", "path", "size", "ms", "files", "reused", "warnings"}
+        or the archive itself ("return": "artifact"; the same fields as X-Build-* headers)
+  → 400 bad request / plan, 422 rejected by input_rules, 500 output does not match its inputs
+GET  /status     uptime, requests served, cache sizes
+POST /shutdown
+
+python build_daemon.py [--port 8765 | --unix /tmp/simatch.sock] [-j N] [-c 8] [-o builds]
+python build_daemon.py --send request.json [--artifact out.fmf] [--port … | --unix …]
+"""
+
+from __future__ import annotations
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable
+import argparse
+import hashlib
+import http.client
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+ROOT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from build_verify import MAX_PROBLEMS_SHOWN, BuildInputs, VerifyError, check_file, plan_checks  # noqa: E402
+from input_rules import InvalidInputs, VariantInputs, has_errors, validate_batch  # noqa: E402
+from patch_plan import FILE_ALIASES, PlanError, PlanOp, from_physics, group_by_file, load_plan, target_for  # noqa: E402
+from virtual_tree import VirtualTree  # noqa: E402
+from build_variants import (  # noqa: E402
+    VARIANT_NAME,
+    _clean_bytes,
+    _ratings_base,
+    read_ratings_checked,
+    render_plan,
+    render_ratings,
+)
+from prepare_simatch import CLEAN_FOLDER  # noqa: E402
+
+# ── config ────────────────────────────────────────────────────────
+HOST = "127.0.0.1"
+PORT = 8765
+BUILDS_OUT = ROOT_DIR / "builds"
+FORMATS = ("fmf", "zip")
+DEFAULT_CONCURRENCY = 8      # builds in flight; the rest queue on the socket
+RESULT_CACHE_SIZE = 64       # rendered files / parsed sheets kept between requests
+MAX_BODY = 16 << 20
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "[::1]"}
+REPLACED = {"weights": "weights.jsb", "ratings": "player_ratings_data.jsb"}
+
+
+class BadRequest(ValueError):
+    """A build request that cannot be read."""
+
+
+@dataclass
+class BuildResult:
+    name: str
+    path: str
+    size: int
+    ms: float
+    files: list[str] = field(default_factory=list)      # files that differ from the clean tree
+    reused: bool = False                                # identical request, artifact not rebuilt
+    warnings: list[str] = field(default_factory=list)
+
+
+# ──────────────────────────────────────────────────────────────────
+# Worker processes
+# ──────────────────────────────────────────────────────────────────
+def _warm_worker() -> None:
+    """Pool initializer: index every editable clean .jsb and load the ratings JSON once."""
+    for rel in FILE_ALIASES.values():
+        target_for(_clean_bytes(rel))
+    _ratings_base()
+
+
+def _render_ratings(edits: tuple) -> bytes:
+    return render_ratings({b: dict(cells) for b, cells in edits}).encode("utf-8")
+
+
+def _ready(hold: float) -> int:
+    time.sleep(hold)                                    # keep it busy so the next task needs a new worker
+    return os.getpid()
+
+
+# ──────────────────────────────────────────────────────────────────
+# Requests
+# ──────────────────────────────────────────────────────────────────
+@dataclass
+class BuildSpec:
+    """One request, parsed: every input inline, plan rows as PlanOps."""
+
+    name: str | None
+    fmt: str
+    physics: dict[str, Any]
+    plan: list[PlanOp]
+    weights: bytes | None
+    ratings: dict[int, dict[str, Any]] | None = None
+    ratings_xlsx: Path | None = None
+    artifact: bool = False
+    verify: bool = True
+
+    def ops(self) -> dict[str, list[PlanOp]]:
+        return group_by_file(from_physics(self.physics) + self.plan)
+
+
+def _repo_path(value: Any, what: str) -> Path:
+    """A request path, resolved; anything outside this folder is refused."""
+    if not isinstance(value, str):
+        raise BadRequest(f"{what}: expected a path")
+    path = (ROOT_DIR / value).resolve()
+    if not path.is_relative_to(ROOT_DIR):
+        raise BadRequest(f"{what}: paths must stay inside {ROOT_DIR.name}/")
+    if not path.is_file():
+        raise BadRequest(f"{what}: file not found")
+    return path
+
+
+def _inline_or_file(value: Any, what: str) -> Any:
+    """A path string → parsed JSON of that file; anything else is already inline."""
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(_repo_path(value, what).read_text("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise BadRequest(f"{what}: not a JSON file") from None
+
+
+def parse_request(body: dict[str, Any]) -> BuildSpec:
+    if not isinstance(body, dict):
+        raise BadRequest("request body must be a JSON object")
+    fmt = body.get("format", "fmf")
+    if fmt not in FORMATS:
+        raise BadRequest(f"unknown format ({', '.join(FORMATS)})")
+    name = body.get("name")
+    if name is not None and (not isinstance(name, str) or not VARIANT_NAME.fullmatch(name)):
+        raise BadRequest("name must be a plain folder name (letters, digits, _ - .)")
+
+    physics = _inline_or_file(body.get("physics"), "physics") or {}
+    if not isinstance(physics, dict):
+        raise BadRequest("physics must map key → value")
+    plan = body.get("plan") or []
+    ops = load_plan(plan if isinstance(plan, list) else _repo_path(plan, "plan"))
+    for op in ops:
+        if not (CLEAN_FOLDER / op.file).is_file():      # make_op already keeps op.file inside the tree
+            raise PlanError(f"{op.file}: not a file in the clean tree")
+
+    weights = body.get("weights")
+    if isinstance(weights, str):
+        weights = _repo_path(weights, "weights").read_bytes()
+    elif weights is not None:
+        weights = json.dumps(weights, indent=2, ensure_ascii=False).encode("utf-8")
+
+    spec = BuildSpec(name, fmt, physics, ops, weights, artifact=body.get("return") == "artifact",
+                     verify=bool(body.get("verify", True)))
+    if body.get("ratings") is not None and body.get("ratings_xlsx"):
+        raise BadRequest('give "ratings" or "ratings_xlsx", not both')
+    if body.get("ratings") is not None:
+        try:
+            spec.ratings = {int(b): dict(cells) for b, cells in _inline_or_file(body["ratings"], "ratings").items()}
+        except (TypeError, ValueError, AttributeError):
+            raise BadRequest('ratings must map block index → {coefficient: value}') from None
+    elif body.get("ratings_xlsx"):
+        spec.ratings_xlsx = _repo_path(body["ratings_xlsx"], "ratings_xlsx")
+    for field_, rel in (("weights", REPLACED["weights"]), ("ratings", REPLACED["ratings"])):
+        given = spec.weights is not None if field_ == "weights" else spec.ratings is not None or spec.ratings_xlsx
+        if given and any(op.file == rel for op in ops):
+            raise PlanError(f"plan edits {rel}, but \"{field_}\" replaces it")
+    return spec
+
+
+def _frozen(edits: dict[int, dict[str, Any]]) -> tuple:
+    return tuple(sorted((b, tuple(sorted(cells.items()))) for b, cells in edits.items()))
+
+
+# ──────────────────────────────────────────────────────────────────
+# Daemon
+# ──────────────────────────────────────────────────────────────────
+class BuildDaemon:
+    def __init__(self, out_dir: Path = BUILDS_OUT, workers: int | None = None,
+                 concurrency: int = DEFAULT_CONCURRENCY, log: Callable[[str], None] = print):
+        self.out_dir = Path(out_dir)
+        self.log = log
+        self.workers = workers or os.cpu_count() or 1
+        self.clean = VirtualTree.from_folder(CLEAN_FOLDER)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self._shared: OrderedDict[tuple, Future] = OrderedDict()
+        self._built: dict[str, BuildResult] = {}        # content key → finished unnamed build
+        self.started = time.time()
+        self.served = 0
+        self.failed = 0
+
+    def warm(self) -> None:
+        """Start every worker (each indexes the clean files) and pre-compress the clean tree."""
+        t0 = time.perf_counter()
+        pids = {f.result() for f in [self.pool.submit(_ready, 0.1) for _ in range(self.workers)]}
+        self.clean.write_fmf(io.BytesIO())                # caches every blob's packed chunks
+        self.log(f"  {len(pids)} worker(s) warm, {len(self.clean)} clean files packed "
+                 f"in {time.perf_counter() - t0:.2f}s")
+
+    def close(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+        self.clean.close()
+
+    # ---- shared CPU results -------------------------------------------
+    def _once(self, key: tuple, fn: Callable, *args) -> Future:
+        """One pool task per distinct input, shared by every request asking for it."""
+        with self._lock:
+            fut = self._shared.get(key)
+            if fut is None or (fut.done() and fut.exception() is not None):
+                fut = self._shared[key] = self.pool.submit(fn, *args)
+            self._shared.move_to_end(key)
+            while len(self._shared) > RESULT_CACHE_SIZE:
+                self._shared.popitem(last=False)
+            return fut
+
+    def _sheet(self, xlsx: Path) -> tuple[dict, dict]:
+        st = xlsx.stat()
+        return self._once(("edits", str(xlsx), st.st_mtime_ns, st.st_size), read_ratings_checked, xlsx).result()
+
+    # ---- one build ------------------------------------------------------
+    def build(self, spec: BuildSpec) -> BuildResult:
+        t0 = time.perf_counter()
+        rejects: dict[int, dict[str, Any]] = {}
+        if spec.ratings_xlsx is not None:
+            edits, rejects = self._sheet(spec.ratings_xlsx)
+            spec.ratings = edits
+        inputs = VariantInputs(spec.name or "request", physics=spec.physics or None)
+        if spec.weights is not None:
+            try:
+                inputs.weights = json.loads(spec.weights)
+            except json.JSONDecodeError as e:
+                raise BadRequest(f"weights: {e}") from None
+        if spec.ratings is not None:
+            inputs.ratings = {b: {**spec.ratings.get(b, {}), **rejects.get(b, {})}
+                              for b in spec.ratings.keys() | rejects.keys()}
+        issues = validate_batch([inputs])[inputs.name]
+        if has_errors(issues):
+            raise InvalidInputs(inputs.name, issues)
+        warnings = [str(i) for i in issues]
+
+        ops = spec.ops()
+        ratings_key = _frozen(spec.ratings) if spec.ratings is not None else None
+        key = hashlib.blake2b(repr((spec.fmt, sorted((r, tuple(g)) for r, g in ops.items()),
+                                    spec.weights, ratings_key)).encode(), digest_size=12).hexdigest()
+        if spec.name is None:
+            with self._lock:
+                done = self._built.get(key)
+            if done is not None and Path(done.path).exists():
+                return BuildResult(**{**asdict(done), "ms": (time.perf_counter() - t0) * 1000,
+                                      "reused": True})
+        out = (self.out_dir / spec.name / f"simatch.{spec.fmt}" if spec.name
+               else self.out_dir / f"{key}.{spec.fmt}")
+        if not out.resolve().is_relative_to(self.out_dir.resolve()):
+            raise BadRequest("name must stay inside the builds folder")
+
+        with self.slots:
+            rendered = {rel: self._once(("plan", rel, tuple(group)), render_plan, rel, tuple(group))
+                        for rel, group in ops.items()}
+            if ratings_key is not None:
+                rendered["player_ratings_data.json"] = self._once(("ratings", ratings_key),
+                                                                  _render_ratings, ratings_key)
+            tree = self.clean.copy()
+            for rel, fut in rendered.items():
+                tree.set(rel, fut.result())
+            if spec.weights is not None:
+                tree.set("weights.json", spec.weights)
+                tree.remove(REPLACED["weights"])
+            if ratings_key is not None:
+                tree.remove(REPLACED["ratings"])
+
+            out.parent.mkdir(parents=True, exist_ok=True)
+            tmp = out.with_name(f".{out.name}.{threading.get_ident()}.tmp")
+            (tree.write_fmf if spec.fmt == "fmf" else tree.write_zip)(tmp)
+            os.replace(tmp, out)
+            if spec.verify:
+                self.check(out, spec)
+
+        result = BuildResult(spec.name or key, str(out), out.stat().st_size, (time.perf_counter() - t0) * 1000,
+                             sorted(rendered) + (["weights.json"] if spec.weights is not None else []),
+                             warnings=warnings)
+        if spec.name is None:
+            with self._lock:
+                self._built[key] = result
+                while len(self._built) > RESULT_CACHE_SIZE:
+                    self._built.pop(next(iter(self._built)))
+        return result
+
+    def check(self, out: Path, spec: BuildSpec) -> None:
+        """Decode what this build changed and compare it with the request."""
+        inputs = BuildInputs(physics=spec.physics, plan=spec.plan, ratings=spec.ratings)
+        if spec.weights is not None:
+            inputs.weights = json.loads(spec.weights)
+        tasks, report = plan_checks(out, inputs)
+        for _, _, problems in self.pool.map(check_file, tasks):
+            report.problems += problems
+        if report.problems:
+            raise VerifyError(spec.name or out.stem, report.problems)
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            return {"uptime_s": round(time.time() - self.started, 1), "served": self.served,
+                    "failed": self.failed, "workers": self.workers, "clean_files": len(self.clean),
+                    "shared_results": len(self._shared), "artifacts": len(self._built)}
+
+
+# ──────────────────────────────────────────────────────────────────
+# HTTP
+# ──────────────────────────────────────────────────────────────────
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"                      # keep-alive for chatty front-ends
+    server: Any
+
+    def _send(self, code: int, payload: dict[str, Any] | bytes, headers: dict[str, str] | None = None) -> None:
+        body = payload if isinstance(payload, bytes) else json.dumps(payload, indent=2).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/octet-stream" if isinstance(payload, bytes)
+                         else "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _refused(self, post: bool) -> bool:
+        """Answer 4xx for anything a browser page could send: foreign Host, non-JSON POST."""
+        host = (self.headers.get("Host") or "").strip().lower()
+        if not host.endswith("]"):                       # drop the port; "[::1]" has no port
+            host = host.rsplit(":", 1)[0]
+        if host not in LOCAL_HOSTS:
+            self._send(403, {"error": "Host must be localhost"})
+            return True
+        ctype = (self.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+        if post and ctype != "application/json":
+            self._send(415, {"error": "Content-Type must be application/json"})
+            return True
+        return False
+
+    def do_GET(self) -> None:
+        if self._refused(post=False):
+            return
+        if self.path != "/status":
+            return self._send(404, {"error": "no such endpoint"})
+        self._send(200, self.server.builder.status())
+
+    def do_POST(self) -> None:
+        if self._refused(post=True):
+            return
+        if self.path == "/shutdown":
+            self._send(200, {"ok": True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        if self.path != "/build":
+            return self._send(404, {"error": "no such endpoint"})
+        daemon: BuildDaemon = self.server.builder
+        try:
+            size = int(self.headers.get("Content-Length") or 0)
+            if size > MAX_BODY:
+                raise BadRequest(f"request body over {MAX_BODY >> 20} MB")
+            spec = parse_request(json.loads(self.rfile.read(size) or b"{}"))
+            result = daemon.build(spec)
+        except InvalidInputs as e:
+            return self._fail(422, str(e), issues=[{"severity": i.severity, "issue": str(i)} for i in e.issues])
+        except VerifyError as e:
+            return self._fail(500, str(e), problems=e.problems[:MAX_PROBLEMS_SHOWN])
+        except (BadRequest, PlanError, json.JSONDecodeError) as e:
+            return self._fail(400, str(e))
+        except Exception as e:                          # keep serving; report what broke
+            return self._fail(500, f"{type(e).__name__}: {e}")
+        with daemon._lock:
+            daemon.served += 1
+        daemon.log(f"✓ {result.name} → {result.path}  ({result.ms:.0f} ms{', reused' if result.reused else ''})")
+        if spec.artifact:
+            headers = {f"X-Build-{k.title()}": json.dumps(v) if isinstance(v, list) else str(v)
+                       for k, v in asdict(result).items()}
+            return self._send(200, Path(result.path).read_bytes(), headers)
+        self._send(200, asdict(result))
+
+    def _fail(self, code: int, error: str, **extra: Any) -> None:
+        daemon: BuildDaemon = self.server.builder
+        with daemon._lock:
+            daemon.failed += 1
+        daemon.log(f"⚠️  {error}")
+        self._send(code, {"error": error, **extra})
+
+    def log_message(self, fmt: str, *args: Any) -> None:   # builds are logged by do_POST
+        pass
+
+
+class _HttpServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+if hasattr(socket, "AF_UNIX"):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+def serve(daemon: BuildDaemon, host: str = HOST, port: int = PORT, unix: Path | None = None) -> None:
+    if unix is not None:
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError("Unix sockets are not available here – use --port")
+        Path(unix).unlink(missing_ok=True)
+        server = _UnixServer(str(unix), _Handler)
+        where = str(unix)
+    else:
+        server = _HttpServer((host, port), _Handler)
+        where = f"http://{host}:{server.server_address[1]}"
+    server.builder = daemon
+    daemon.log(f"Serving builds on {where} – Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if unix is not None:
+            Path(unix).unlink(missing_ok=True)
+
+
+# ──────────────────────────────────────────────────────────────────
+# Client
+# ──────────────────────────────────────────────────────────────────
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: Path, timeout: float = 300):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = str(path)
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+def send(body: dict[str, Any] | None, endpoint: str = "/build", host: str = HOST, port: int = PORT,
+         unix: Path | None = None) -> tuple[int, dict[str, str], bytes]:
+    """One request to a running daemon: (status, headers, body)."""
+    conn = _UnixConnection(unix) if unix is not None else http.client.HTTPConnection(host, port, timeout=300)
+    try:
+        if body is None:
+            conn.request("GET", endpoint)
+        else:
+            conn.request("POST", endpoint, json.dumps(body), {"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        return resp.status, dict(resp.getheaders()), resp.read()
+    finally:
+        conn.close()
+
+
+# ──────────────────────────────────────────────────────────────────
+# main()
+# ──────────────────────────────────────────────────────────────────
+def main(argv: list[str]) -> None:
+    ap = argparse.ArgumentParser(description="Serve simatch builds from a warm process.")
+    ap.add_argument("--host", default=HOST)
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--unix", type=Path, default=None, help="listen on this Unix socket instead")
+    ap.add_argument("-o", "--out", type=Path, default=BUILDS_OUT, help="where artifacts are written")
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="CPU worker processes")
+    ap.add_argument("-c", "--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="builds in flight")
+    ap.add_argument("--send", type=Path, default=None, help="client: POST this request JSON and exit")
+    ap.add_argument("--artifact", type=Path, default=None, help="client: save the returned archive here")
+    ap.add_argument("--status", action="store_true", help="client: print the daemon's status and exit")
+    args = ap.parse_args(argv)
+
+    try:
+        if args.status:
+            code, _, body = send(None, "/status", args.host, args.port, args.unix)
+            print(body.decode("utf-8"))
+            return
+        if args.send:
+            req = json.loads(args.send.read_text("utf-8"))
+            if args.artifact:
+                req["return"] = "artifact"
+            code, headers, body = send(req, "/build", args.host, args.port, args.unix)
+            if code == 200 and args.artifact:
+                args.artifact.write_bytes(body)
+                print(f"✓ {headers.get('X-Build-Name')} → {args.artifact} ({len(body):,} bytes, "
+                      f"{float(headers.get('X-Build-Ms', 0)):.0f} ms)")
+                return
+            print(body.decode("utf-8"))
+            if code != 200:
+                sys.exit(1)
+            return
+    except (ConnectionError, FileNotFoundError) as e:
+        sys.exit(f"⛔ no daemon at {args.unix or f'{args.host}:{args.port}'} ({e})")
+
+    t0 = time.perf_counter()
+    daemon = BuildDaemon(args.out, args.jobs, args.concurrency)
+    try:
+        daemon.warm()
+        print(f"✓ Ready in {time.perf_counter() - t0:.2f}s")
+        serve(daemon, args.host, args.port, args.unix)
+    finally:
+        daemon.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+build_variants.py — build many simatch variants concurrently (asyncio)
+----------------------------------------------------------------------
+Same output per variant as prepare_simatch.py, without the prompts:
+
+    variants/<name>/simatch/     clean tree copy
+        weights.json             ← variant "weights"       (replaces weights.jsb)
+        player_ratings_data.json ← variant "ratings_xlsx"  (replaces the .jsb)
+        physics/physical_constraints.jsb  ← variant "physics" values
+        any other .jsb           ← variant "plan" rows, patched in place
+
+• File copies run on threads, bounded by an I/O semaphore.
+• CPU work (xlsx parsing, JSON dumps, in-place JSB patches) runs in a process
+  pool; each distinct xlsx / physics / plan input is parsed once and shared
+  by every variant that uses it.
+• "physics" values and "plan" rows (patch_plan.py: CSV / JSON / TOML, or a
+  list of rows inline) become one patch plan; every touched .jsb is patched
+  once, with all of its edits in a single pass.
+• Every variant's inputs are parsed and checked by input_rules in one
+  batch, and its plan rows are resolved against the clean files, before
+  the first file is copied; variants that fail are reported and skipped,
+  the rest are built.  A variant that fails later leaves no output behind.
+• Up to --concurrency variants are in flight at once, and inside each
+  variant the tree copy overlaps the CPU stages.
+• --format fmf|zip skips the folder entirely: the clean tree is mapped
+  once (virtual_tree), each variant is an overlay holding only its
+  patched files, and it streams straight into variants/<name>/simatch.fmf
+  (or .zip).  Clean files are compressed once for the whole sweep.
+• Every finished variant is verified (build_verify.py): the files its
+  inputs changed are decoded in the same process pool and checked value
+  by value, every other file must hash like the clean one.  A mismatch
+  fails that variant; --no-verify skips the stage.
+
+variants.json
+    {"variants": [
+        {"name": "fast_wingers",
+         "physics": {"sprint_speed": 70000} | "physics/fast.json",
+         "weights": "weights.json",
+         "ratings_xlsx": "player_ratings_data.xlsx",
+         "plan": "plans/fast_wingers.csv" | [{"file": "ratings", "path": …, "op": "mul", "value": 1.1}]},
+        ...
+    ]}
+Relative paths are resolved against the manifest's folder; a variant
+name is a plain folder name (letters, digits, "_", "-", "."; no leading
+dot).
+
+python build_variants.py [variants.json] [-o out_dir] [-c 8] [-j N] [--format dir|fmf|zip] [--no-verify]
+"""
+
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+import argparse
+import asyncio
+import json
+import os
+import re
+import shutil
+import sys
+import time
+
+ROOT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from build_verify import MAX_PROBLEMS_SHOWN, BuildInputs, VerifyError, check_file, plan_checks  # noqa: E402
+from input_rules import InvalidInputs, VariantInputs, has_errors, validate_batch  # noqa: E402
+from patch_plan import PlanError, PlanOp, apply_file, from_physics, group_by_file, load_plan  # noqa: E402
+from virtual_tree import VirtualTree  # noqa: E402
+from prepare_simatch import (  # noqa: E402
+    CLEAN_FOLDER,
+    RATINGS_JSON,
+    apply_ratings_values,
+    read_ratings_edits,
+)
+
+# ── config ────────────────────────────────────────────────────────
+VARIANTS_JSON = ROOT_DIR / "variants.json"
+VARIANTS_OUT = ROOT_DIR / "variants"
+PHYSICS_REL = Path("physics") / "physical_constraints.jsb"
+
+DEFAULT_CONCURRENCY = 8
+IO_SLOTS = 32
+FORMATS = ("dir", "fmf", "zip")
+VARIANT_NAME = re.compile(r"[A-Za-z0-9_-][\w.-]*")    # a plain folder name: no separators, no . / ..
+
+
+# ──────────────────────────────────────────────────────────────────
+# CPU stages (run in the process pool)
+# ──────────────────────────────────────────────────────────────────
+@lru_cache(maxsize=1)
+def _ratings_base() -> str:
+    return RATINGS_JSON.read_text("utf-8")
+
+
+@lru_cache(maxsize=None)
+def _clean_bytes(rel: str) -> bytes:
+    path = (CLEAN_FOLDER / rel).resolve()
+    if not path.is_relative_to(CLEAN_FOLDER.resolve()) or not path.is_file():
+        raise PlanError(f"{rel}: not a file in the clean tree")
+    return path.read_bytes()
+
+
+def read_ratings_checked(xlsx: Path) -> tuple[dict[int, dict[str, int]], dict[int, dict[str, Any]]]:
+    rejects: dict[int, dict[str, Any]] = {}
+    return read_ratings_edits(xlsx, rejects), rejects
+
+
+def render_ratings(edits: dict[int, dict[str, int]]) -> str:
+    data: dict[str, Any] = json.loads(_ratings_base())
+    apply_ratings_values(data, edits)
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def render_plan(rel: str, ops: tuple[PlanOp, ...]) -> bytes:
+    """Clean *rel* with every plan row for it applied in one pass."""
+    return apply_file(_clean_bytes(rel), list(ops))[0]
+
+
+# ──────────────────────────────────────────────────────────────────
+# Orchestrator
+# ──────────────────────────────────────────────────────────────────
+class VariantBuilder:
+    def __init__(self, out_dir: Path, concurrency: int, workers: int | None, fmt: str = "dir",
+                 verify: bool = True):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown output format '{fmt}' ({', '.join(FORMATS)})")
+        self.out_dir = Path(out_dir)
+        self.fmt = fmt
+        self.verify = verify
+        self.clean = VirtualTree.from_folder(CLEAN_FOLDER) if fmt != "dir" else None
+        self.variant_slots = asyncio.Semaphore(concurrency)
+        self.io_slots = asyncio.Semaphore(IO_SLOTS)
+        self.pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        self._shared: dict[tuple, asyncio.Future] = {}
+        self._clean_files = sorted(
+            p.relative_to(CLEAN_FOLDER) for p in CLEAN_FOLDER.rglob("*") if p.is_file()
+        )
+
+    # ---- helpers ----------------------------------------------------
+    async def _cpu(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+
+    async def _io(self, fn, *args):
+        async with self.io_slots:
+            return await asyncio.to_thread(fn, *args)
+
+    def _once(self, key: tuple, make) -> asyncio.Future:
+        """Share one in-flight/finished task between every variant asking for *key*."""
+        if key not in self._shared:
+            self._shared[key] = asyncio.ensure_future(make())
+        return self._shared[key]
+
+    @staticmethod
+    def _write(path: Path, data: str | bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(data, str):
+            path.write_text(data, "utf-8")
+        else:
+            path.write_bytes(data)
+
+    # ---- stages -----------------------------------------------------
+    def make_dirs(self, dest: Path) -> None:
+        for d in {dest / rel.parent for rel in self._clean_files}:
+            d.mkdir(parents=True, exist_ok=True)
+
+    async def copy_tree(self, dest: Path, skip: set[Path]) -> None:
+        await asyncio.gather(*(
+            self._io(shutil.copy2, CLEAN_FOLDER / rel, dest / rel)
+            for rel in self._clean_files if rel not in skip
+        ))
+
+    def _ratings_edits(self, xlsx: Path) -> asyncio.Future:
+        st = xlsx.stat()
+        key = ("edits", str(xlsx), st.st_mtime_ns, st.st_size)
+        return self._once(key, lambda: self._cpu(read_ratings_checked, xlsx))
+
+    async def weights(self, emit, src: Path) -> None:
+        await emit("weights.json", await self._io(src.read_bytes))
+
+    async def ratings(self, emit, xlsx: Path) -> None:
+        text = await self._once(("ratings", str(xlsx)), lambda: self._ratings_text(xlsx))
+        await emit("player_ratings_data.json", text)
+
+    async def _ratings_text(self, xlsx: Path) -> str:
+        edits, _ = await self._ratings_edits(xlsx)
+        return await self._cpu(render_ratings, edits)
+
+    def _render(self, rel: str, ops: list[PlanOp]) -> asyncio.Future:
+        return self._once(("plan", rel, tuple(ops)), lambda: self._cpu(render_plan, rel, tuple(ops)))
+
+    async def patched(self, emit, rel: str, ops: list[PlanOp]) -> None:
+        await emit(rel, await self._render(rel, ops))
+
+    async def load_inputs(self, spec: dict[str, Any], base: Path) -> VariantInputs:
+        """Parse a variant's edits (shared xlsx parses) for validation."""
+        inputs = VariantInputs(spec["name"])
+        physics = spec.get("physics")
+        if isinstance(physics, str):
+            physics = json.loads(await self._io(Path(base / physics).read_text, "utf-8"))
+            spec["physics"] = physics
+        inputs.physics = physics or None
+        plan = spec.get("plan")
+        if plan:
+            ops = await self._io(load_plan, plan if isinstance(plan, list) else base / plan)
+            for field, rel in (("weights", "weights.jsb"), ("ratings_xlsx", "player_ratings_data.jsb")):
+                if spec.get(field) and any(op.file == rel for op in ops):
+                    raise PlanError(f"plan edits {rel}, but \"{field}\" replaces it")
+            spec["plan"] = ops
+            for rel, group in group_by_file(ops).items():   # resolve now: a bad row rejects the
+                await self._render(rel, group)              # variant before anything is copied
+        if spec.get("weights"):
+            inputs.weights = json.loads(await self._io(Path(base / spec["weights"]).read_text, "utf-8"))
+        if spec.get("ratings_xlsx"):
+            edits, rejects = await self._ratings_edits(base / spec["ratings_xlsx"])
+            inputs.ratings = {b: {**edits.get(b, {}), **rejects.get(b, {})}
+                              for b in edits.keys() | rejects.keys()}
+        return inputs
+
+    async def build(self, spec: dict[str, Any], base: Path,
+                    warnings: list[str] = ()) -> tuple[str, float, list[str]]:
+        name = spec["name"]
+        async with self.variant_slots:
+            t0 = time.perf_counter()
+            notes: list[str] = list(warnings)
+            dest = self.out_dir / name / "simatch"
+            out = self.out_dir / name / f"simatch.{self.fmt}"
+            try:
+                await self._build(spec, base, dest, out)
+            except BaseException:
+                if self.fmt == "dir":                           # never leave a clean-looking tree
+                    await asyncio.to_thread(shutil.rmtree, dest, True)
+                else:
+                    out.unlink(missing_ok=True)
+                raise
+            return name, time.perf_counter() - t0, notes
+
+    async def _build(self, spec: dict[str, Any], base: Path, dest: Path, out: Path) -> None:
+        if self.fmt == "dir":
+            if dest.exists():
+                await asyncio.to_thread(shutil.rmtree, dest)
+            self.make_dirs(dest)
+
+            async def emit(rel: str, data: str | bytes) -> None:
+                await self._io(self._write, dest / rel, data)
+        else:
+            tree = self.clean.copy()
+
+            async def emit(rel: str, data: str | bytes) -> None:
+                tree.set(rel, data)
+
+        skip: set[Path] = set()                         # clean files not copied
+        replaced: set[Path] = set()                     # .jsb swapped for a .json
+        stages = []
+        if spec.get("weights"):
+            replaced.add(Path("weights.jsb"))
+            stages.append(self.weights(emit, base / spec["weights"]))
+        if spec.get("ratings_xlsx"):
+            replaced.add(Path("player_ratings_data.jsb"))
+            stages.append(self.ratings(emit, base / spec["ratings_xlsx"]))
+        ops = from_physics(spec.get("physics") or {}) + list(spec.get("plan") or [])
+        for rel, group in group_by_file(ops).items():     # unknown keys: see validation
+            skip.add(Path(rel))
+            stages.append(self.patched(emit, rel, group))
+        skip |= replaced
+
+        if self.fmt == "dir":
+            await asyncio.gather(self.copy_tree(dest, skip), *stages)
+        else:
+            await asyncio.gather(*stages)
+            for rel in replaced:
+                tree.remove(rel.as_posix())
+            out.parent.mkdir(parents=True, exist_ok=True)
+            await self._io(tree.write, out)
+        if self.verify:
+            await self.check(spec["name"], dest if self.fmt == "dir" else out, spec, base)
+
+    async def check(self, name: str, target: Path, spec: dict[str, Any], base: Path) -> None:
+        """Decode what this variant changed and compare it with its inputs."""
+        inputs = BuildInputs(physics=spec.get("physics") or {}, plan=list(spec.get("plan") or []))
+        if spec.get("weights"):
+            inputs.weights = json.loads(await self._io(Path(base / spec["weights"]).read_text, "utf-8"))
+        if spec.get("ratings_xlsx"):
+            inputs.ratings, _ = await self._ratings_edits(base / spec["ratings_xlsx"])
+        tasks, report = await self._io(plan_checks, target, inputs)
+        for _, _, problems in await asyncio.gather(*(self._cpu(check_file, t) for t in tasks)):
+            report.problems += problems
+        if report.problems:
+            raise VerifyError(name, report.problems)
+
+    async def run(self, specs: list[dict[str, Any]], base: Path) -> list[tuple | BaseException]:
+        try:
+            loaded = await asyncio.gather(*(self.load_inputs(s, base) for s in specs),
+                                          return_exceptions=True)
+            issues = validate_batch([x for x in loaded if isinstance(x, VariantInputs)])
+
+            async def checked(spec: dict[str, Any], inputs: VariantInputs | BaseException):
+                if isinstance(inputs, BaseException):
+                    raise inputs
+                found = issues[spec["name"]]
+                if has_errors(found):
+                    raise InvalidInputs(spec["name"], found)
+                return await self.build(spec, base, [str(i) for i in found])
+
+            return await asyncio.gather(*(checked(s, x) for s, x in zip(specs, loaded)),
+                                        return_exceptions=True)
+        finally:
+            self.pool.shutdown()
+            if self.clean is not None:
+                self.clean.close()
+
+
+def build_variants(manifest: Path, out_dir: Path = VARIANTS_OUT, concurrency: int = DEFAULT_CONCURRENCY,
+                   workers: int | None = None, fmt: str = "dir", verify: bool = True) -> list[tuple]:
+    specs = json.loads(Path(manifest).read_text("utf-8"))["variants"]
+    names = [s["name"] for s in specs]
+    if len(set(names)) != len(names):
+        raise ValueError("variant names must be unique")
+    bad = [n for n in names if not isinstance(n, str) or not VARIANT_NAME.fullmatch(n)]
+    if bad:
+        raise ValueError(f"variant names must be plain folder names (letters, digits, _ - .): {bad}")
+    builder = VariantBuilder(out_dir, concurrency, workers, fmt, verify)
+    return asyncio.run(builder.run(specs, Path(manifest).resolve().parent))
+
+
+def main(argv: list[str]) -> None:
+    ap = argparse.ArgumentParser(description="Build many simatch variants concurrently.")
+    ap.add_argument("manifest", nargs="?", type=Path, default=VARIANTS_JSON)
+    ap.add_argument("-o", "--out", type=Path, default=VARIANTS_OUT)
+    ap.add_argument("-c", "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                    help="variants built at the same time")
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="CPU worker processes")
+    ap.add_argument("--format", choices=FORMATS, default="dir",
+                    help="simatch folder, or pack straight to simatch.fmf / simatch.zip in memory")
+    ap.add_argument("--no-verify", action="store_true", help="skip checking the outputs against the inputs")
+    args = ap.parse_args(argv)
+    if not args.manifest.exists():
+        sys.exit(f"Manifest not found: {args.manifest}")
+
+    t0 = time.perf_counter()
+    names = [s.get("name") for s in json.loads(args.manifest.read_text("utf-8"))["variants"]]
+    try:
+        results = build_variants(args.manifest, args.out, args.concurrency, args.jobs, args.format,
+                                 not args.no_verify)
+    except ValueError as e:                             # manifest-level: duplicate / unsafe names
+        sys.exit(f"⛔ {e}")
+    failed = 0
+    for name, r in zip(names, results):
+        if isinstance(r, InvalidInputs):
+            failed += 1
+            print(f"⚠️  {r.name}: rejected")
+            for issue in r.issues:
+                print(f"    {issue.severity}: {issue}")
+            continue
+        if isinstance(r, VerifyError):
+            failed += 1
+            print(f"⚠️  {r.name}: output does not match its inputs")
+            for problem in r.problems[:MAX_PROBLEMS_SHOWN]:
+                print(f"    {problem}")
+            continue
+        if isinstance(r, BaseException):
+            failed += 1
+            print(f"⚠️  {name}: {type(r).__name__}: {r}")
+            continue
+        name, secs, notes = r
+        print(f"  {name:<30} {secs:6.2f}s")
+        for n in notes:
+            print(f"    ⚠️  {n}")
+    print(f"✓ Built {len(results) - failed}/{len(results)} variants → {args.out} "
+          f"in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
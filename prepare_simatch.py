@@ -15,6 +15,12 @@ FM-mod helper – **three fully-self-contained steps**
    ▸ pushes the numbers you edited in data/player_ratings_data.xlsx
      into simatch/player_ratings_data.json
 
+Before step 1, validate_inputs() checks all three input files against
+src/input_rules.py, so bad values stop the run before anything is copied.
+After step 3, verify_output() decodes the files that changed and checks
+every value landed (both physics copies, weights, ratings) – a skipped
+patch stops the run instead of ending up in simatch.fmf.
+
 Edit the *config block* below if your paths differ.
 """
 
@@ -98,6 +104,8 @@ RATINGS_XLSX = ROOT_DIR / "player_ratings_data.xlsx"
 CLEAN_FOLDER = ROOT_DIR / "src" / "clean_simatch"  # pristine tree
 SIMATCH_FOLDER = ROOT_DIR / "simatch"
 
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
 # ── helpers ────────────────────────────────────────────
 
 GREEN = "\033[32m"
@@ -117,6 +125,53 @@ def _pause(input_msg: str = "Press Enter to continue…"):
         pass
 
 
+def read_ratings_edits(xlsx_path: Path, rejects: dict[int, dict[str, Any]] | None = None
+                       ) -> dict[int, dict[str, int]]:
+    """Parse RATINGS_XLSX → {block index: {coefficient name: value}}.
+
+    Non-numeric cells are skipped; pass *rejects* to collect them instead.
+    """
+    edits: dict[int, dict[str, int]] = {}
+    ws = load_workbook(xlsx_path, data_only=True, read_only=True).active
+    rows = list(ws.iter_rows(values_only=True))
+    if not rows:
+        return edits
+
+    for col, head in enumerate(rows[0][1:], start=1):  # B… = block index
+        try:
+            b_idx = int(head)
+        except (TypeError, ValueError):
+            continue
+        block = edits.setdefault(b_idx, {})
+
+        for row in rows[3:]:
+            coeff = row[0] if row else None
+            if not coeff or col >= len(row):
+                continue
+            val = row[col]
+            if val in (None, ""):
+                continue
+            try:
+                block[coeff] = int(round(float(val)))
+            except (ValueError, TypeError):
+                if rejects is not None:
+                    rejects.setdefault(b_idx, {})[coeff] = val
+    return edits
+
+
+def apply_ratings_values(data: dict[str, Any], edits: dict[int, dict[str, int]]) -> None:
+    """Write parsed sheet values into the first season of player_ratings_data."""
+    role_data = data["values"][0]["role_data"]
+    for b_idx, values in edits.items():
+        if not (0 <= b_idx < len(role_data)):
+            continue
+        lookup = {c["name"]: c for c in role_data[b_idx]["coefficients"]}
+        for coeff, val in values.items():
+            entry = lookup.get(coeff)
+            if entry:
+                entry["value"] = val
+
+
 def apply_ratings_edits() -> None:
     """Inject numbers from RATINGS_XLSX into simatch/player_ratings_data.json."""
 
@@ -124,36 +179,7 @@ def apply_ratings_edits() -> None:
 
     def excel_to_json(json_path: Path, xlsx_path: Path) -> None:
         data: dict[str, Any] = json.loads(json_path.read_text("utf-8"))
-        role_data = data["values"][0]["role_data"]
-        maps = [{c["name"]: c for c in block["coefficients"]} for block in role_data]
-
-        ws = load_workbook(xlsx_path, data_only=True).active
-        max_r, max_c = ws.max_row or 0, ws.max_column or 0
-
-        for col in range(2, max_c + 1):  # B… = block index
-            try:
-                b_idx = int(ws.cell(row=1, column=col).value)
-            except (TypeError, ValueError):
-                continue
-            if not (0 <= b_idx < len(role_data)):
-                continue
-            lookup = maps[b_idx]
-
-            for row in range(4, max_r + 1):
-                coeff = ws.cell(row=row, column=1).value
-                if not coeff:
-                    continue
-                val = ws.cell(row=row, column=col).value
-                if val in (None, ""):
-                    continue
-                try:
-                    val = int(round(float(val)))
-                except (ValueError, TypeError):
-                    continue
-                entry = lookup.get(coeff)
-                if entry:
-                    entry["value"] = val
-
+        apply_ratings_values(data, read_ratings_edits(xlsx_path))
         json_path.write_text(json.dumps(data, indent=2, ensure_ascii=False), "utf-8")
 
     try:
@@ -615,12 +641,84 @@ def patch_physical_constraints() -> None:
     print("Patched physical_constraints.jsb with values from physical_constraints.json")
     print("If this is not needed, delete/rename the JSON file and rerun.\n")
 
+# ──────────────────────────────────────────────────────────────────
+# 0. Validate every input before anything is copied
+# ──────────────────────────────────────────────────────────────────
+def validate_inputs() -> None:
+    """Check PHYSICS_JSON, WEIGHTS_JSON and RATINGS_XLSX against input_rules."""
+    ensure("numpy")                                  # input_rules evaluates the rules with numpy
+    from input_rules import VariantInputs, has_errors, validate_batch
+
+    try:
+        inputs = VariantInputs("simatch")
+        if PHYSICS_JSON.exists():
+            inputs.physics = json.loads(PHYSICS_JSON.read_text("utf-8"))
+        if WEIGHTS_JSON.exists():
+            inputs.weights = json.loads(WEIGHTS_JSON.read_text("utf-8"))
+        if RATINGS_XLSX.exists():
+            rejects: dict[int, dict[str, Any]] = {}
+            inputs.ratings = read_ratings_edits(RATINGS_XLSX, rejects)
+            for b_idx, cells in rejects.items():
+                inputs.ratings.setdefault(b_idx, {}).update(cells)
+    except Exception as e:
+        print(f"Failed to read the input files: {e}")
+        _pause("Press Enter to exit…")
+        sys.exit(1)
+
+    issues = validate_batch([inputs])["simatch"]
+    for issue in issues:
+        colour = YELLOW if issue.severity == "warning" else ""
+        print(f"{colour}{issue.severity.capitalize()}: {issue}{RESET if colour else ''}")
+    if has_errors(issues):
+        print("\nFix the values above and rerun – nothing has been copied.")
+        _pause("Press Enter to exit…")
+        sys.exit(1)
+    if issues:
+        print()
+
+
+# ──────────────────────────────────────────────────────────────────
+# 4. Check the finished tree against the inputs
+# ──────────────────────────────────────────────────────────────────
+def verify_output() -> None:
+    """Decode every file the inputs changed; stop if a value did not land."""
+    # imported here: the checks load the decoders, which the copy steps do not need
+    from build_verify import MAX_PROBLEMS_SHOWN, BuildInputs, verify_build
+
+    try:
+        inputs = BuildInputs()
+        if PHYSICS_JSON.exists():
+            inputs.physics = json.loads(PHYSICS_JSON.read_text("utf-8"))
+        if WEIGHTS_JSON.exists():
+            inputs.weights = json.loads(WEIGHTS_JSON.read_text("utf-8"))
+        if RATINGS_XLSX.exists():
+            inputs.ratings = read_ratings_edits(RATINGS_XLSX)
+        report = verify_build(SIMATCH_FOLDER, inputs)
+    except Exception as e:
+        print(f"{YELLOW}Could not verify simatch/: {e}{RESET}\n")
+        return
+
+    if report.ok:
+        print(f"Verified simatch/: {len(report.checked)} changed file(s) match the inputs, "
+              f"{report.skipped} identical to clean.\n")
+        return
+    for problem in report.problems[:MAX_PROBLEMS_SHOWN]:
+        print(f"{YELLOW}✘ {problem}{RESET}")
+    if len(report.problems) > MAX_PROBLEMS_SHOWN:
+        print(f"{YELLOW}… {len(report.problems) - MAX_PROBLEMS_SHOWN} more{RESET}")
+    print("\nsimatch/ does not match the input files – fix the above before packing it.")
+    _pause("Press Enter to exit…")
+    sys.exit(1)
+
+
 # ──────────────────────────────────────────────────────────────────
 # Orchestrator
 # ──────────────────────────────────────────────────────────────────
 def main() -> None:
+    validate_inputs()
     build_simatch()
     patch_physical_constraints()
+    verify_output()
 
     print(
         f"\n{GREEN}✓ Finished - created simatch folder{RESET}"
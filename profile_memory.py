@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+profile_memory.py — allocation profile of the decoders and the simatch build
+----------------------------------------------------------------------------
+Runs the real work in one process under tracemalloc (alloc_profile.py) and
+reports, per stage, the peak and retained bytes and the call sites that
+hold them:
+
+    ratings/read, ratings/decode/<season>, ratings/to_dict, ratings/json,
+    ratings/xlsx                 player_ratings_decoder → JSON / workbook
+    tree/decode/<kind>           every clean-tree file through tree_decoder
+    prepare/inputs               the three input files, as validate_inputs reads them
+    prepare/ratings              clean ratings JSON + sheet edits → JSON text
+    prepare/physics              physics values → patched .jsb (patch_plan)
+    prepare/pack                 mapped clean tree + the outputs → .fmf bytes
+
+• Nothing is written to simatch/; the workbook export goes to a temp dir.
+• Each stage keeps its result alive until it ends, so "retained" is what
+  the result costs and "peak − retained" is the transient garbage
+  (slices, decoded strings, the openpyxl cell objects …).
+• --json writes the report; --baseline compares with a saved one and
+  exits 1 when a stage's peak or retained bytes grew by more than
+  --tolerance (the benchmark job tracks this file).
+• --only ratings|tree|prepare runs one group.
+
+python profile_memory.py [--json mem.json] [--baseline mem.json] [--tolerance 0.1] [--only GROUP] [--top 5]
+                         [--frames 8]
+"""
+
+from __future__ import annotations
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Callable
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+
+ROOT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from alloc_profile import DEFAULT_TOLERANCE, FRAMES, AllocTracker, compare_reports, fmt_bytes  # noqa: E402
+from input_rules import VariantInputs, validate_batch  # noqa: E402
+from patch_plan import from_physics  # noqa: E402
+from tree_decoder import decode_bytes, iter_tree  # noqa: E402
+from virtual_tree import VirtualTree  # noqa: E402
+import player_ratings_decoder as prd  # noqa: E402
+from build_variants import PHYSICS_REL, render_plan, render_ratings  # noqa: E402
+from prepare_simatch import (  # noqa: E402
+    CLEAN_FOLDER,
+    PHYSICS_JSON,
+    RATINGS_XLSX,
+    WEIGHTS_JSON,
+    read_ratings_edits,
+)
+
+# ── config ────────────────────────────────────────────────────────
+RATINGS_JSB = CLEAN_FOLDER / "player_ratings_data.jsb"
+SEASONS = ("fm24", "fm2302", "fm2301")
+GROUPS = ("ratings", "tree", "prepare")
+
+
+def _quiet(fn: Callable, *args, **kw) -> Any:
+    """The decoders print progress; keep it out of the report."""
+    with open(os.devnull, "w", encoding="utf-8") as sink, redirect_stdout(sink):
+        return fn(*args, **kw)
+
+
+# ──────────────────────────────────────────────────────────────────
+# Stages
+# ──────────────────────────────────────────────────────────────────
+def profile_ratings(t: AllocTracker) -> None:
+    from ratings_export import season_table, write_xlsx
+
+    with t.stage("ratings"):
+        with t.stage("read"):
+            buf = RATINGS_JSB.read_bytes()
+        seasons = {}
+        with t.stage("decode"):
+            for name in SEASONS:
+                with t.stage(name):
+                    seasons[name] = _quiet(prd.decode_season, buf, getattr(prd, f"{name}_season"))
+        with t.stage("to_dict"):
+            docs = {name: prd.ratingsobject_to_dict(obj) for name, obj in seasons.items()}
+        with t.stage("json"):
+            text = json.dumps({"values": list(docs.values())}, indent=2, ensure_ascii=False)
+        with t.stage("xlsx"), tempfile.TemporaryDirectory() as tmp:
+            write_xlsx([season_table(doc, name) for name, doc in docs.items()], Path(tmp) / "ratings.xlsx")
+        del buf, seasons, docs, text
+
+
+def profile_tree(t: AllocTracker) -> None:
+    by_kind: dict[str, list[str]] = {}
+    for rel, kind in iter_tree(CLEAN_FOLDER):
+        by_kind.setdefault(kind, []).append(rel)
+    with t.stage("tree"), t.stage("decode"):
+        for kind, rels in sorted(by_kind.items()):
+            with t.stage(kind):
+                docs = [decode_bytes(kind, (CLEAN_FOLDER / rel).read_bytes()) for rel in rels]
+            del docs
+
+
+def profile_prepare(t: AllocTracker) -> None:
+    with t.stage("prepare"):
+        with t.stage("inputs"):
+            inputs = VariantInputs("simatch")
+            if PHYSICS_JSON.exists():
+                inputs.physics = json.loads(PHYSICS_JSON.read_text("utf-8"))
+            if WEIGHTS_JSON.exists():
+                inputs.weights = json.loads(WEIGHTS_JSON.read_text("utf-8"))
+            edits: dict[int, dict[str, int]] = {}
+            if RATINGS_XLSX.exists():
+                edits = read_ratings_edits(RATINGS_XLSX)
+                inputs.ratings = edits
+            t.mark()
+            validate_batch([inputs])
+        with t.stage("ratings"):
+            ratings = render_ratings(edits).encode("utf-8")
+        with t.stage("physics"):
+            rel = PHYSICS_REL.as_posix()
+            physics = render_plan(rel, tuple(from_physics(inputs.physics or {})))
+        with t.stage("pack"), VirtualTree.from_folder(CLEAN_FOLDER) as tree:
+            tree.set(rel, physics)
+            if inputs.weights is not None:
+                tree.remove("weights.jsb")
+                tree.set("weights.json", WEIGHTS_JSON.read_bytes())
+            tree.remove("player_ratings_data.jsb")
+            tree.set("player_ratings_data.json", ratings)
+            out = io.BytesIO()
+            tree.write_fmf(out)
+            t.mark()
+            del out
+        del inputs, edits, ratings, physics
+
+
+PROFILES: dict[str, Callable[[AllocTracker], None]] = {
+    "ratings": profile_ratings,
+    "tree": profile_tree,
+    "prepare": profile_prepare,
+}
+
+
+def run(groups: tuple[str, ...] = GROUPS, frames: int = FRAMES) -> dict[str, Any]:
+    with AllocTracker(frames) as t:
+        for g in groups:
+            PROFILES[g](t)
+        return t.to_json()
+
+
+# ──────────────────────────────────────────────────────────────────
+# main()
+# ──────────────────────────────────────────────────────────────────
+def print_report(report: dict[str, Any], top: int) -> None:
+    for name, st in report["stages"].items():
+        depth = name.count("/")
+        print(f"{'  ' * depth}{name.rsplit('/', 1)[-1]:<{24 - 2 * depth}} "
+              f"peak {fmt_bytes(st['peak_bytes']):>10}   retained {fmt_bytes(st['retained_bytes']):>10}   "
+              f"{st['wall_s'] * 1000:7.0f} ms")
+        if "/" in name and not any(k.startswith(name + "/") for k in report["stages"]):
+            for site in (st["peak_sites"] or st["sites"])[:top]:
+                print(f"{'  ' * depth}    {fmt_bytes(site['bytes']):>10}  {site['blocks']:>7} blk  {site['site']}")
+    print(f"max RSS {fmt_bytes(report['max_rss_bytes'])}")
+
+
+def main(argv: list[str]) -> None:
+    ap = argparse.ArgumentParser(description="Per-stage peak / retained allocations of the decoders and the build.")
+    ap.add_argument("--json", type=Path, default=None, help="write the report here")
+    ap.add_argument("--baseline", type=Path, default=None, help="fail on growth vs this report")
+    ap.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    ap.add_argument("--only", choices=GROUPS, action="append", help="run only this group (repeatable)")
+    ap.add_argument("--top", type=int, default=5, help="call sites printed per stage")
+    ap.add_argument("--frames", type=int, default=FRAMES, help="traceback depth; deeper is slower")
+    args = ap.parse_args(argv)
+
+    report = run(tuple(args.only or GROUPS), args.frames)
+    print_report(report, args.top)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), "utf-8")
+        print(f"✓ Report → {args.json}")
+    if args.baseline:
+        grown = compare_reports(report, json.loads(args.baseline.read_text("utf-8")), args.tolerance)
+        for g in grown:
+            print(f"⚠️  grew: {g}")
+        if grown:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
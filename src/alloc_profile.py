@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+alloc_profile.py — where the bytes go, stage by stage (tracemalloc)
+------------------------------------------------------------------
+• AllocTracker.stage("name") wraps one step of a decode or build.  Per
+  stage it records
+      peak_bytes       highest traced memory above the stage's start
+      retained_bytes   what is still alive when the stage ends (hold on to
+                       the stage's result inside the block to count it)
+      sites            retained bytes per call site, attributed to the
+                       innermost frame in this repo (json / openpyxl
+                       internals are charged to the line that called them)
+      files            the same, summed per source file
+  Stages nest ("ratings/decode/fm24"); an inner stage's peak is also
+  reported on every enclosing stage.
+• mark() inside a stage snapshots the live set when it is the highest seen
+  so far in that stage; the stage then also reports "peak_sites", the call
+  sites holding memory at that point.
+• to_json() / compare_reports() are the machine-readable side: a saved
+  report is a baseline, a later run fails on a peak that grew by more
+  than the tolerance (same convention as format_fuzz --baseline).
+
+Used by profile_memory.py; nothing here is imported on a normal build.
+"""
+
+from __future__ import annotations
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+import platform
+import sys
+import time
+import tracemalloc
+
+# ───────────────────────── paths ────────────────────────────────
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+FRAMES = 8                      # traceback depth kept per allocation
+TOP_SITES = 15                  # call sites listed per stage
+DEFAULT_TOLERANCE = 0.10        # fraction a stage's peak may grow vs baseline
+REPORT_VERSION = 1
+
+_IGNORED = (tracemalloc.__file__, __file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>")
+
+
+@dataclass
+class StageStats:
+    name: str
+    wall_s: float = 0.0
+    peak_bytes: int = 0
+    retained_bytes: int = 0
+    retained_blocks: int = 0
+    sites: list[dict[str, Any]] = field(default_factory=list)
+    files: dict[str, int] = field(default_factory=dict)
+    peak_sites: list[dict[str, Any]] = field(default_factory=list)
+
+
+# ═════════════════════════ ATTRIBUTION ══════════════════════════
+def _short(filename: str) -> str:
+    try:
+        return Path(filename).resolve().relative_to(ROOT_DIR).as_posix()
+    except ValueError:
+        parts = Path(filename).parts
+        return "/".join(parts[-2:])                  # json/decoder.py, openpyxl/cell.py …
+
+
+def _site(tb: tracemalloc.Traceback) -> tuple[str, int]:
+    """Innermost frame inside ROOT_DIR, else the innermost frame at all."""
+    for frame in reversed(tb):                       # oldest → newest, so walk backwards
+        if frame.filename.startswith(str(ROOT_DIR)):
+            return frame.filename, frame.lineno
+    return tb[-1].filename, tb[-1].lineno
+
+
+def _by_site(stats: list[tracemalloc.StatisticDiff] | list[tracemalloc.Statistic]
+             ) -> tuple[list[dict[str, Any]], dict[str, int]]:
+    sites: dict[tuple[str, int], list[int]] = {}
+    for st in stats:
+        size = getattr(st, "size_diff", st.size)
+        count = getattr(st, "count_diff", st.count)
+        if size <= 0:
+            continue
+        acc = sites.setdefault(_site(st.traceback), [0, 0])
+        acc[0] += size
+        acc[1] += count
+    files: dict[str, int] = {}
+    for (fname, _), (size, _) in sites.items():
+        files[_short(fname)] = files.get(_short(fname), 0) + size
+    top = sorted(sites.items(), key=lambda kv: -kv[1][0])[:TOP_SITES]
+    return ([{"site": f"{_short(f)}:{line}", "bytes": size, "blocks": count}
+             for (f, line), (size, count) in top],
+            dict(sorted(files.items(), key=lambda kv: -kv[1])))
+
+
+def _filtered(snap: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+    return snap.filter_traces([tracemalloc.Filter(False, f) for f in _IGNORED])
+
+
+# ═════════════════════════ TRACKER ══════════════════════════════
+class AllocTracker:
+    """Per-stage peak / retained allocations; start() before the first stage."""
+
+    def __init__(self, frames: int = FRAMES):
+        self.frames = frames
+        self.stages: dict[str, StageStats] = {}
+        self._stack: list[tuple[str, int, int]] = []        # (name, start bytes, peak so far)
+        self._marks: dict[str, tuple[int, tracemalloc.Snapshot]] = {}
+        self._started_here = False
+        self._overhead = 0.0                                   # seconds spent in snapshots / diffs
+
+    def start(self) -> "AllocTracker":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_here = True
+        return self
+
+    def stop(self) -> None:
+        if self._started_here:
+            tracemalloc.stop()
+            self._started_here = False
+
+    def __enter__(self) -> "AllocTracker":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _fold_peak(self) -> None:
+        """Push tracemalloc's peak into every open stage, then reset it."""
+        _, peak = tracemalloc.get_traced_memory()
+        self._stack = [(n, base, max(p, peak)) for n, base, p in self._stack]
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageStats]:
+        full = f"{self._stack[-1][0]}/{name}" if self._stack else name
+        stats = self.stages[full] = StageStats(full)
+        t_book = time.perf_counter()
+        self._fold_peak()
+        before = tracemalloc.take_snapshot()                 # raw traces: nearly free to take
+        base, _ = tracemalloc.get_traced_memory()
+        self._stack.append((full, base, base))
+        tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        self._overhead += t0 - t_book
+        overhead0 = self._overhead
+        try:
+            yield stats
+        finally:
+            t1 = time.perf_counter()
+            stats.wall_s = t1 - t0 - (self._overhead - overhead0)    # children's bookkeeping excluded
+            self._fold_peak()
+            _, start, peak = self._stack.pop()
+            after = tracemalloc.take_snapshot()
+            diff = _filtered(after).compare_to(_filtered(before), "traceback")
+            stats.peak_bytes = peak - start
+            stats.retained_bytes = sum(d.size_diff for d in diff)
+            stats.retained_blocks = sum(d.count_diff for d in diff)
+            stats.sites, stats.files = _by_site(diff)
+            if full in self._marks:
+                _, snap = self._marks.pop(full)
+                stats.peak_sites = _by_site(_filtered(snap).compare_to(_filtered(before), "traceback"))[0]
+            del before, after, diff
+            tracemalloc.reset_peak()                         # the bookkeeping above is not the parent's
+            self._overhead += time.perf_counter() - t1
+
+    def mark(self) -> None:
+        """Keep a snapshot of the innermost open stage if it is its fullest point so far."""
+        if not self._stack:
+            return
+        name = self._stack[-1][0]
+        current, _ = tracemalloc.get_traced_memory()
+        if current > self._marks.get(name, (-1, None))[0]:
+            t0 = time.perf_counter()
+            self._marks[name] = (current, tracemalloc.take_snapshot())
+            self._overhead += time.perf_counter() - t0
+
+    # ---- report ------------------------------------------------------
+    def to_json(self) -> dict[str, Any]:
+        rss = _max_rss()
+        return {
+            "version": REPORT_VERSION,
+            "python": platform.python_version(),
+            "platform": sys.platform,
+            "frames": self.frames,
+            "max_rss_bytes": rss,
+            "stages": {name: asdict(s) for name, s in self.stages.items()},
+        }
+
+
+def _max_rss() -> int | None:
+    try:
+        import resource                                      # not on Windows
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def compare_reports(now: dict[str, Any], baseline: dict[str, Any], tolerance: float = DEFAULT_TOLERANCE,
+                    floor: int = 64 * 1024) -> list[str]:
+    """Stages whose peak or retained bytes grew past *tolerance* (ignoring growth under *floor*)."""
+    grown = []
+    for name, st in now["stages"].items():
+        old = baseline.get("stages", {}).get(name)
+        if not old:
+            continue
+        for key in ("peak_bytes", "retained_bytes"):
+            if st[key] - old[key] > max(floor, old[key] * tolerance):
+                grown.append(f"{name}: {key} {fmt_bytes(st[key])} vs baseline {fmt_bytes(old[key])}")
+    return grown
+
+
+def fmt_bytes(n: int | None) -> str:
+    if n is None:
+        return "?"
+    for unit in ("B", "KiB", "MiB"):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GiB"
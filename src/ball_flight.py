@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+ball_flight.py — batch ball-flight evaluator for the kick / header speed ladder
+------------------------------------------------------------------------------
+• Launch speeds come from a physics block: soft_kick_speed … very_hard_kick_speed
+  and basic_header_speed (÷ speed_scaler → m/s), one per KICK_CLASSES entry.
+• evaluate(kick, angle, spin) takes arrays of (class index, elevation °,
+  backspin rev/s – negative is topspin) and returns, per kick, flight
+  time, carry distance, arrival speed and apex height; with target=
+  also the time and speed at which the ball passes that distance.
+• Lofted kicks (angle > 0) fly under gravity, quadratic drag and Magnus
+  lift (CL = S / (2.2·S + 1), S = r·ω / v), integrated with a midpoint
+  step over all kicks at once; landed kicks are compacted out as the
+  batch shrinks.  Flight ends at the first landing (no bounce).
+• Batches bigger than the grid are interpolated from a FlightTable
+  (every class × 179 angles × 31 spins, integrated once per speed set
+  and cached) – about 1 M kicks/s.  Kicks outside the grid (below
+  TABLE_MIN_ANGLE, above 89.5°, spin beyond ±15) are integrated exactly;
+  inside it the carry was ≤ 0.14 m off the exact one over 100 k random
+  kicks (99th percentile 0.03 m).  Ground kicks (angle ≤ 0) roll under
+  rolling resistance and drag, which has a closed form – no stepping at all.
+• physics/ball/ball_physics_*.bta is not decoded (its layout is unknown,
+  see tree_decoder), so the ball itself is the physical model in Ball.
+• The CLI compares physics variants: a per-class table (20 m ground
+  pass time, roll range, 25° carry, 10° shot speed at 20 m) and the
+  mean distance over a seeded random batch, with its throughput.
+
+python ball_flight.py [<physics.json|tree|fmf> …] [--batch 1000000] [--json report.json]
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from kinematics import clean_block, load_physics
+
+KICK_CLASSES = ("soft", "soft_to_medium", "medium", "medium_to_moderate", "moderate",
+                "quite_hard", "hard", "very_hard", "header")
+DT = 0.01                         # s
+MAX_FLIGHT_S = 10.0
+TABLE_ANGLES = np.linspace(0.5, 89.5, 179)   # lofted-kick grid for big batches
+TABLE_SPINS = np.linspace(-15, 15, 31)
+TABLE_MIN_ANGLE = 1.0             # below this (and above the last row) carry bends too fast to interpolate
+COMPACT = 4                       # drop landed kicks once they are a quarter of the live batch
+
+
+def kick_speeds(block: dict[str, int]) -> np.ndarray:
+    """Launch speed (m/s) per KICK_CLASSES entry."""
+    sc = block["speed_scaler"]
+    keys = [f"{c}_kick_speed" for c in KICK_CLASSES[:-1]] + ["basic_header_speed"]
+    return np.array([block[k] / sc for k in keys])
+
+
+@dataclass(frozen=True)
+class Ball:
+    """FIFA size-5 ball in still air at sea level."""
+
+    mass: float = 0.43            # kg
+    radius: float = 0.11          # m
+    rho: float = 1.225            # kg/m³
+    cd: float = 0.25
+    rolling: float = 0.06         # rolling-resistance coefficient on grass
+    g: float = 9.81
+
+    @property
+    def k(self) -> float:
+        """Quadratic drag per unit mass: a = k·v² (with cd), lift uses k / cd · CL."""
+        return 0.5 * self.rho * self.cd * np.pi * self.radius ** 2 / self.mass
+
+
+# ═════════════════════════ ROLL ═════════════════════════════════
+def _roll(v0: np.ndarray, ball: Ball, target: np.ndarray | None) -> dict[str, np.ndarray]:
+    """v' = −μg − k·v²: closed-form stop time, roll distance and time / speed at *target*."""
+    mg, k = ball.rolling * ball.g, ball.k
+    w = np.sqrt(mg * k)
+    th0 = np.arctan(v0 * np.sqrt(k / mg))
+    out = {
+        "flight_time": th0 / w,
+        "distance": -np.log(np.cos(th0)) / k,
+        "arrival_speed": np.zeros_like(v0),
+        "apex": np.zeros_like(v0),
+    }
+    if target is not None:
+        c = np.cos(th0) * np.exp(k * target)
+        with np.errstate(invalid="ignore"):
+            th = np.where(c <= 1, np.arccos(np.minimum(c, 1)), np.nan)
+        out["reach_time"] = (th0 - th) / w
+        out["reach_speed"] = np.sqrt(mg / k) * np.tan(th)
+    return out
+
+
+# ═════════════════════════ FLIGHT ═══════════════════════════════
+def _accel(vx, vz, spin_w, ball: Ball):
+    v = np.sqrt(vx * vx + vz * vz)
+    s = ball.radius * spin_w / np.maximum(v, 1e-9)
+    cl = s / (2.2 * np.abs(s) + 1)
+    kd = ball.k * v
+    kl = ball.k / ball.cd * cl * v
+    return -kd * vx - kl * vz, -kd * vz + kl * vx - ball.g
+
+
+def _fly(v0, angle, spin, ball: Ball, target, dt: float) -> dict[str, np.ndarray]:
+    n = len(v0)
+    out = {k: np.full(n, np.nan) for k in ("flight_time", "distance", "arrival_speed", "apex")}
+    if target is not None:
+        out["reach_time"] = np.full(n, np.nan)
+        out["reach_speed"] = np.full(n, np.nan)
+    # state of the kicks still in the air; landed ones are masked, then compacted out in bulk
+    idx = np.arange(n)
+    x, z, top = np.zeros(n), np.zeros(n), np.zeros(n)
+    vx, vz = v0 * np.cos(angle), v0 * np.sin(angle)
+    w = 2 * np.pi * spin
+    tg = np.asarray(target, float) if target is not None else None
+    done = np.zeros(n, bool)
+    t = 0.0
+    while len(idx) and t < MAX_FLIGHT_S:
+        ax, az = _accel(vx, vz, w, ball)
+        mx, mz = vx + 0.5 * dt * ax, vz + 0.5 * dt * az
+        ax, az = _accel(mx, mz, w, ball)
+        nx, nz = x + dt * mx, z + dt * mz
+        vx += dt * ax
+        vz += dt * az
+        np.maximum(top, nz, out=top)
+
+        if tg is not None:                              # passes the target distance this step
+            cross = (x < tg) & (nx >= tg) & ~done
+            if cross.any():
+                f = (tg[cross] - x[cross]) / (nx[cross] - x[cross])
+                out["reach_time"][idx[cross]] = t + f * dt
+                out["reach_speed"][idx[cross]] = np.hypot(vx[cross], vz[cross])
+
+        landed = (nz < 0) & ~done
+        if landed.any():
+            f = z[landed] / (z[landed] - nz[landed])
+            li = idx[landed]
+            out["flight_time"][li] = t + f * dt
+            out["distance"][li] = x[landed] + f * (nx[landed] - x[landed])
+            out["arrival_speed"][li] = np.hypot(vx[landed], vz[landed])
+            out["apex"][li] = top[landed]
+            done |= landed
+        x, z = nx, nz
+        t += dt
+        if done.sum() * COMPACT > len(idx):
+            keep = ~done
+            idx, x, z, top, vx, vz, w = idx[keep], x[keep], z[keep], top[keep], vx[keep], vz[keep], w[keep]
+            if tg is not None:
+                tg = tg[keep]
+            done = np.zeros(len(idx), bool)
+    return out
+
+
+# ═════════════════════════ TABLE ════════════════════════════════
+@dataclass(frozen=True)
+class FlightTable:
+    """_fly() results on an (class, angle, spin) grid, for interpolating big batches."""
+
+    angles: np.ndarray                                # degrees, TABLE_ANGLES
+    spins: np.ndarray                                 # rev/s, TABLE_SPINS
+    values: dict[str, np.ndarray]                     # key → (classes, angles, spins)
+
+    def lookup(self, kick: np.ndarray, angle: np.ndarray, spin: np.ndarray) -> dict[str, np.ndarray]:
+        """Bilinear in (angle, spin), exact in class; spin is clamped to the grid."""
+        fa = np.interp(angle, self.angles, np.arange(len(self.angles)))
+        fs = np.interp(spin, self.spins, np.arange(len(self.spins)))
+        n_a, n_s = len(self.angles), len(self.spins)
+        i = np.minimum(fa.astype(int), n_a - 2)
+        j = np.minimum(fs.astype(int), n_s - 2)
+        u, v = fa - i, fs - j
+        base = (kick * n_a + i) * n_s + j                   # flat index of the lower corner
+        w00, w10, w01, w11 = (1 - u) * (1 - v), u * (1 - v), (1 - u) * v, u * v
+        out = {}
+        for key, grid in self.values.items():
+            flat = grid.ravel()
+            out[key] = (w00 * flat[base] + w10 * flat[base + n_s]
+                        + w01 * flat[base + 1] + w11 * flat[base + n_s + 1])
+        return out
+
+
+@lru_cache(maxsize=8)
+def flight_table(speeds: tuple[float, ...], ball: Ball = Ball(), target: float | None = None,
+                 dt: float = DT) -> FlightTable:
+    c, a, s = np.meshgrid(np.arange(len(speeds)), TABLE_ANGLES, TABLE_SPINS, indexing="ij")
+    res = _fly(np.asarray(speeds)[c.ravel()], np.radians(a.ravel()), s.ravel(), ball,
+               None if target is None else np.full(c.size, target), dt)
+    return FlightTable(TABLE_ANGLES, TABLE_SPINS, {k: v.reshape(c.shape) for k, v in res.items()})
+
+
+# ═════════════════════════ BATCH ════════════════════════════════
+def evaluate(kick: np.ndarray, angle: np.ndarray, spin: np.ndarray, speeds: np.ndarray,
+             ball: Ball = Ball(), target: float | None = None, dt: float = DT,
+             table: bool | None = None) -> dict[str, np.ndarray]:
+    """Per-kick flight_time, distance, arrival_speed, apex (+ reach_time / reach_speed).
+
+    *kick* indexes KICK_CLASSES / *speeds*; *angle* (°) and *spin* (rev/s)
+    broadcast against it; *target* is one distance (m).  Lofted kicks are
+    integrated one by one, or – *table* True, or None and the batch is
+    bigger than the grid – interpolated from flight_table() where they
+    fall inside it.  NaN: never landed / never reached."""
+    kick = np.asarray(kick)
+    shape = kick.shape
+    kick = kick.ravel()
+    v0 = np.asarray(speeds, float)[kick]
+    angle = np.broadcast_to(np.asarray(angle, float), shape).ravel()
+    spin = np.broadcast_to(np.asarray(spin, float), shape).ravel()
+
+    keys = ["flight_time", "distance", "arrival_speed", "apex"]
+    if target is not None:
+        keys += ["reach_time", "reach_speed"]
+    out = {k: np.full(v0.size, np.nan) for k in keys}
+
+    sel = np.flatnonzero(angle <= 0)
+    if len(sel):
+        res = _roll(v0[sel], ball, None if target is None else np.full(len(sel), float(target)))
+        for k in keys:
+            out[k][sel] = res[k]
+
+    sel = np.flatnonzero(angle > 0)
+    if len(sel):
+        if table is None:
+            table = len(sel) > len(KICK_CLASSES) * len(TABLE_ANGLES) * len(TABLE_SPINS)
+        exact = sel
+        if table:
+            a = angle[sel]
+            sp = spin[sel]
+            inside = ((a >= TABLE_MIN_ANGLE) & (a <= TABLE_ANGLES[-1])
+                      & (sp >= TABLE_SPINS[0]) & (sp <= TABLE_SPINS[-1]))
+            grid = flight_table(tuple(float(x) for x in speeds), ball, target, dt)
+            res = grid.lookup(kick[sel[inside]], a[inside], spin[sel[inside]])
+            for k in keys:
+                out[k][sel[inside]] = res[k]
+            exact = sel[~inside]
+        if len(exact):
+            res = _fly(v0[exact], np.radians(angle[exact]), spin[exact], ball,
+                       None if target is None else np.full(len(exact), float(target)), dt)
+            for k in keys:
+                out[k][exact] = res[k]
+    return {k: v.reshape(shape) for k, v in out.items()}
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def class_table(speeds: np.ndarray, ball: Ball = Ball()) -> dict[str, dict[str, float]]:
+    """Per kick class: launch speed, 20 m ground pass, roll range, 25° carry, speed at 20 m of a 10° shot."""
+    kicks = np.arange(len(KICK_CLASSES))
+    ground = evaluate(kicks, 0, 0, speeds, ball, target=20)
+    loft = evaluate(kicks, 25, 0, speeds, ball, table=False)
+    shot = evaluate(kicks, 10, 0, speeds, ball, target=20, table=False)
+    return {c: {"speed_ms": float(speeds[i]), "ground_20m_s": float(ground["reach_time"][i]),
+                "roll_m": float(ground["distance"][i]), "carry_25deg_m": float(loft["distance"][i]),
+                "shot_20m_ms": float(shot["reach_speed"][i])}
+            for i, c in enumerate(KICK_CLASSES)}
+
+
+def random_batch(n: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """*n* kicks: uniform class, elevation 0-45° (a fifth along the ground), spin ±10 rev/s."""
+    rng = np.random.default_rng(seed)
+    angle = rng.uniform(0, 45, n)
+    angle[rng.random(n) < 0.2] = 0
+    return rng.integers(0, len(KICK_CLASSES), n), angle, rng.uniform(-10, 10, n)
+
+
+def main(argv: list[str]) -> None:
+    ap = argparse.ArgumentParser(description="Evaluate ball flight for the kick speeds of physics variants.")
+    ap.add_argument("variants", nargs="*", type=Path,
+                    help="physics JSON files, simatch trees or .fmf/.zip archives (the clean block is always first)")
+    ap.add_argument("--batch", type=int, default=1_000_000, help="random kicks per variant")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", type=Path, default=None, help="also write the report here")
+    args = ap.parse_args(argv)
+
+    try:
+        blocks = {"clean": clean_block()}
+        for src in args.variants:
+            blocks[src.stem if src.is_file() else src.name] = load_physics(src)
+    except (OSError, KeyError, ValueError) as exc:
+        sys.exit(f"⛔ {exc}")
+
+    kick, angle, spin = random_batch(args.batch, args.seed)
+    report = {}
+    for name, block in blocks.items():
+        speeds = kick_speeds(block)
+        t0 = time.perf_counter()
+        res = evaluate(kick, angle, spin, speeds)
+        secs = time.perf_counter() - t0
+        report[name] = {"classes": class_table(speeds),
+                        "batch": {"kicks": args.batch, "mean_distance_m": float(np.nanmean(res["distance"])),
+                                  "mean_flight_s": float(np.nanmean(res["flight_time"])),
+                                  "kicks_per_s": args.batch / secs if secs else 0.0}}
+
+    cols = list(next(iter(report.values()))["classes"]["soft"])
+    for name, r in report.items():
+        b = r["batch"]
+        print(f"{name}: mean distance {b['mean_distance_m']:.2f} m, mean time {b['mean_flight_s']:.2f} s "
+              f"({b['kicks_per_s'] / 1e6:.2f} M kicks/s)")
+        print(f"  {'class':<20}" + "".join(f"{c:>15}" for c in cols))
+        for cls, row in r["classes"].items():
+            print(f"  {cls:<20}" + "".join(f"{row[c]:>15.2f}" for c in cols))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), "utf-8")
+    print(f"✓ {len(blocks)} variant(s) × {args.batch:,} kicks")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+build_verify.py — decode a built simatch tree / archive and check it against its inputs
+--------------------------------------------------------------------------------------
+• BuildInputs records what a build was asked to do: "physics" values,
+  patch-plan rows, a weights.json and the ratings sheet edits.
+• Every file the inputs touch is decoded and compared field by field
+  with the clean tree:
+      physics / plan .jsb   each edited path holds the planned value –
+                            physics keys in both embedded copies (obj1 and
+                            obj2 of physics_decode_jsb) – and nothing else
+                            changed
+      weights.json          equals the input file
+      player_ratings_data   every edited coefficient holds the sheet value,
+                            nothing else changed
+  A skipped patch (e.g. prepare_simatch's indicator-byte warning path)
+  shows up as "obj2.sprint_speed = 67056, expected 70000".
+• Every other file must be the clean file: same size and hash – those are
+  not decoded at all.  A file that differs anyway is decoded and its
+  changes are reported; missing and extra files are reported too.
+• The checks run per file in a process pool, so a verification costs
+  about one decode of the changed files, not a second build.
+• Outputs may be folders, .fmf or .zip archives.
+
+python build_verify.py <simatch dir|.fmf|.zip> [--physics p.json] [--plan plan.csv]
+                       [--weights weights.json] [--ratings ratings.xlsx] [-j N]
+"""
+
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import zipfile
+
+from jsb_codec import decode_jsb
+from jsb_stream import format_path
+from patch_plan import PlanOp, from_physics, group_by_file, load_plan, plan_edits
+from tree_decoder import decode_bytes, decode_cached, detect_kind
+from tree_diff import ArchiveSource, FolderSource, diff_values
+
+# ───────────────────────── paths ────────────────────────────────
+ROOT_DIR     = Path(__file__).resolve().parent.parent
+CLEAN_FOLDER = ROOT_DIR / "src" / "clean_simatch"
+RATINGS_JSON = ROOT_DIR / "src" / "player_ratings_data.json"
+
+PHYSICS_REL = "physics/physical_constraints.jsb"
+REPLACED = {"weights.jsb": "weights.json", "player_ratings_data.jsb": "player_ratings_data.json"}
+MAX_PROBLEMS_SHOWN = 20
+_OBJ = re.compile(r"^version_array\[(\d+)\]\.")
+
+
+class VerifyError(ValueError):
+    """A build whose output does not match its inputs."""
+
+    def __init__(self, name: str, problems: list[str]):
+        super().__init__(f"{name}: {len(problems)} mismatch(es) in the build output")
+        self.name = name
+        self.problems = problems
+
+
+@dataclass
+class BuildInputs:
+    """Everything one build was asked to change."""
+
+    physics: dict[str, Any] = field(default_factory=dict)
+    plan: list[PlanOp] = field(default_factory=list)
+    weights: Any = None                                  # parsed weights.json – replaces weights.jsb
+    ratings: dict[int, dict[str, int]] | None = None     # sheet edits – the .jsb becomes .json
+
+    def ops(self) -> dict[str, list[PlanOp]]:
+        return group_by_file(from_physics(self.physics or {}) + list(self.plan))
+
+
+@dataclass
+class VerifyReport:
+    target: str
+    checked: list[str] = field(default_factory=list)     # decoded and compared
+    skipped: int = 0                                     # hash-identical to the clean file
+    problems: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+
+# ═════════════════════════ SOURCES ══════════════════════════════
+class ZipSource:
+    """A .zip written by virtual_tree (entries under one root folder)."""
+
+    def __init__(self, path: Path):
+        self.zf = zipfile.ZipFile(path)
+        names = [n for n in self.zf.namelist() if not n.endswith("/")]
+        root = {n.split("/", 1)[0] for n in names}
+        self.prefix = f"{root.pop()}/" if len(root) == 1 and all("/" in n for n in names) else ""
+        self.sizes = {n[len(self.prefix):]: self.zf.getinfo(n).file_size for n in names}
+
+    def read(self, rel: str) -> bytes:
+        return self.zf.read(self.prefix + rel)
+
+    def digest(self, rel: str) -> str:
+        return hashlib.blake2b(self.read(rel), digest_size=16).hexdigest()
+
+
+def open_output(path: Path) -> FolderSource | ArchiveSource | ZipSource:
+    """Always a fresh handle – unlike tree_diff.open_source, a rebuilt output is re-read."""
+    path = Path(path)
+    if path.is_dir():
+        return FolderSource(path)
+    if path.suffix.lower() == ".zip":
+        return ZipSource(path)
+    return ArchiveSource(path)
+
+
+@lru_cache(maxsize=1)
+def _clean() -> FolderSource:
+    return FolderSource(CLEAN_FOLDER)
+
+
+@lru_cache(maxsize=None)
+def _clean_digest(rel: str) -> str:
+    return _clean().digest(rel)
+
+
+@lru_cache(maxsize=1)
+def _clean_ratings() -> dict[str, Any]:
+    return json.loads(RATINGS_JSON.read_text("utf-8"))
+
+
+# ═════════════════════════ CHECKS ═══════════════════════════════
+def _label(rel: str, path: str) -> str:
+    """physics version_array[i] → obj<i+1>, like physics_decode_jsb."""
+    if rel == PHYSICS_REL:
+        m = _OBJ.match(path)
+        if m:
+            return f"obj{int(m[1]) + 1}.{path[m.end():]}"
+    return path
+
+
+def _lookup(doc: Any, path: str) -> Any:
+    for name, idx in re.findall(r"([^.\[\]]+)|\[(\d+)\]", path):
+        doc = doc[int(idx)] if idx else doc[name]
+    return doc
+
+
+def _compare(rel: str, clean: Any, out: Any, expected: dict[str, Any]) -> list[str]:
+    """Every expected path holds its value, nothing else differs from *clean*."""
+    changes = {p: (op, new) for p, op, _, new in diff_values(clean, out)}
+    problems = []
+    for path, want in expected.items():
+        got = changes[path][1] if path in changes else _lookup(clean, path)
+        if got != want:
+            problems.append(f"{rel}: {_label(rel, path)} = {got!r}, expected {want!r}")
+    for path, (op, new) in changes.items():
+        if path not in expected:
+            what = f"= {new!r}" if op == "changed" else op
+            problems.append(f"{rel}: {_label(rel, path)} {what} – no input changes it")
+    return problems
+
+
+def _expected_ratings(edits: dict[int, dict[str, int]]) -> dict[str, int]:
+    """Sheet edits → {json path: value}, for the cells the clean file has (see apply_ratings_values)."""
+    role_data = _clean_ratings()["values"][0]["role_data"]
+    out = {}
+    for b, values in edits.items():
+        if not 0 <= b < len(role_data):
+            continue
+        where = {c["name"]: i for i, c in enumerate(role_data[b]["coefficients"])}
+        for name, val in values.items():
+            if name in where:
+                out[f"values[0].role_data[{b}].coefficients[{where[name]}].value"] = val
+    return out
+
+
+def check_file(task: tuple[str, str, str, Any]) -> tuple[str, str, list[str]]:
+    """Worker: (output, rel, kind, payload) → (output, rel, problems)."""
+    target, rel, kind, payload = task
+    try:
+        out_buf = open_output(Path(target)).read(rel)
+        if kind == "plan":
+            clean_buf = _clean().read(rel)
+            clean = decode_cached("jsb", clean_buf)
+            expected = {format_path(list(parts)): v for parts, v in plan_edits(clean_buf, list(payload)).items()}
+            problems = _compare(rel, clean, decode_jsb(out_buf), expected)
+        elif kind == "weights":
+            problems = _compare(rel, payload, json.loads(out_buf), {})
+        elif kind == "ratings":
+            problems = _compare(rel, _clean_ratings(), json.loads(out_buf), _expected_ratings(payload))
+        else:                                           # should be clean but the hash differs
+            clean_buf = _clean().read(rel)
+            dk = detect_kind(rel, out_buf[:64])
+            if dk is None:
+                problems = [f"{rel}: {len(out_buf):,} bytes differ from the clean file"]
+            else:
+                problems = _compare(rel, decode_bytes(dk, clean_buf), decode_bytes(dk, out_buf), {})
+        return target, rel, problems
+    except Exception as exc:
+        return target, rel, [f"{rel}: could not check ({type(exc).__name__}: {exc})"]
+
+
+def plan_checks(target: Path, inputs: BuildInputs) -> tuple[list[tuple], VerifyReport]:
+    """File-list checks now; (tasks for check_file, report) for the rest."""
+    out = open_output(target)
+    report = VerifyReport(str(target))
+    clean = _clean()
+    ops = inputs.ops()
+    expected = set(clean.sizes)
+    if inputs.weights is not None:
+        expected = expected - {"weights.jsb"} | {"weights.json"}
+    if inputs.ratings is not None:
+        expected = expected - {"player_ratings_data.jsb"} | {"player_ratings_data.json"}
+
+    report.problems += [f"{rel}: missing" for rel in sorted(expected - set(out.sizes))]
+    report.problems += [f"{rel}: not expected in the output" for rel in sorted(set(out.sizes) - expected)]
+
+    tasks = []
+    for rel in sorted(expected & set(out.sizes)):
+        if rel in ops:
+            tasks.append((str(target), rel, "plan", tuple(ops[rel])))
+        elif rel == "weights.json":
+            tasks.append((str(target), rel, "weights", inputs.weights))
+        elif rel == "player_ratings_data.json":
+            tasks.append((str(target), rel, "ratings", inputs.ratings))
+        elif out.sizes[rel] == clean.sizes[rel] and out.digest(rel) == _clean_digest(rel):
+            report.skipped += 1
+        else:
+            tasks.append((str(target), rel, "clean", None))
+    report.checked = [t[1] for t in tasks]
+    return tasks, report
+
+
+def verify_builds(builds: list[tuple[Path, BuildInputs]], workers: int | None = None) -> list[VerifyReport]:
+    """Check every build; the changed files of all of them share one pool."""
+    tasks, reports = [], {}
+    for target, inputs in builds:
+        t, reports[str(target)] = plan_checks(target, inputs)
+        tasks += t
+    workers = workers or os.cpu_count() or 1
+
+    def results():
+        if workers == 1 or len(tasks) <= 1:
+            yield from map(check_file, tasks)
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+                yield from pool.map(check_file, tasks)
+
+    for target, _, problems in results():
+        reports[target].problems += problems
+    return list(reports.values())
+
+
+def verify_build(target: Path, inputs: BuildInputs, workers: int | None = None) -> VerifyReport:
+    return verify_builds([(target, inputs)], workers)[0]
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main(argv: list[str]) -> None:
+    ap = argparse.ArgumentParser(description="Check a built simatch tree or archive against its inputs.")
+    ap.add_argument("target", type=Path, help="simatch folder, .fmf or .zip")
+    ap.add_argument("--physics", type=Path, default=None, help="physical_constraints.json")
+    ap.add_argument("--plan", type=Path, default=None, help="patch plan (CSV / JSON / TOML)")
+    ap.add_argument("--weights", type=Path, default=None, help="weights.json that replaced weights.jsb")
+    ap.add_argument("--ratings", type=Path, default=None, help="player_ratings_data.xlsx that replaced the .jsb")
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    args = ap.parse_args(argv)
+
+    try:
+        inputs = BuildInputs()
+        if args.physics:
+            inputs.physics = json.loads(args.physics.read_text("utf-8"))
+        if args.plan:
+            inputs.plan = load_plan(args.plan)
+        if args.weights:
+            inputs.weights = json.loads(args.weights.read_text("utf-8"))
+        if args.ratings:
+            sys.path.insert(0, str(ROOT_DIR))
+            from prepare_simatch import read_ratings_edits
+            inputs.ratings = read_ratings_edits(args.ratings)
+    except (OSError, ValueError) as exc:
+        sys.exit(f"⛔ {exc}")
+
+    t0 = time.perf_counter()
+    report = verify_build(args.target, inputs, args.jobs)
+    for p in report.problems[:MAX_PROBLEMS_SHOWN]:
+        print(f"  ✘ {p}")
+    if len(report.problems) > MAX_PROBLEMS_SHOWN:
+        print(f"  … {len(report.problems) - MAX_PROBLEMS_SHOWN} more")
+    print(f"{'✓' if report.ok else '✘'} {len(report.checked)} file(s) decoded, {report.skipped} identical to clean "
+          f"in {time.perf_counter() - t0:.2f}s")
+    if not report.ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
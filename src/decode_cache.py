@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+decode_cache.py — content-addressed on-disk cache of decoded files
+------------------------------------------------------------------
+• Key   = blake2b(file bytes) + decoder kind + decoder version, so a stock
+  weights.jsb found in fifty mods is decoded once, ever.
+• Value = marshal blob of the decoded plain-Python tree (dict / list /
+  str / int / float) – several times faster to load than JSON.
+• LRU by file mtime: every hit touches the entry, and once the cache grows
+  past max_bytes the least recently used entries are deleted down to 90 %.
+• Safe across worker processes: entries are written to a temp file and
+  os.replace()d into place, readers treat a vanished entry as a miss, and
+  only one process at a time runs eviction (O_EXCL lock file).
+
+python decode_cache.py           → show size / entry count
+python decode_cache.py clear     → delete every entry
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Callable
+import hashlib
+import marshal
+import os
+import sys
+import threading
+import time
+
+# ───────────────────────── paths ────────────────────────────────
+ROOT_DIR  = Path(__file__).resolve().parent.parent
+CACHE_DIR = ROOT_DIR / ".decode_cache"
+
+DEFAULT_MAX_BYTES = 512 << 20
+EVICT_TO = 0.9
+STALE_LOCK_SECONDS = 60
+_SUFFIX = ".bin"
+
+# marshal's format is tied to the interpreter; keep entries per version
+_PY_TAG = f"py{sys.version_info[0]}{sys.version_info[1]}"
+
+
+def content_key(buf: bytes, kind: str, version: int) -> str:
+    h = hashlib.blake2b(buf, digest_size=20)
+    h.update(f"\0{kind}\0{version}\0{_PY_TAG}".encode())
+    return h.hexdigest()
+
+
+class DecodeCache:
+    """Size-bounded LRU cache of decoded results, shared between processes."""
+
+    def __init__(self, root: Path = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = self.misses = 0
+        self._size: int | None = None          # lazily measured, then tracked
+
+    # ───────────── storage ─────────────
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / (key + _SUFFIX)
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        path = self._path(key)
+        try:
+            blob = path.read_bytes()
+            os.utime(path)                      # LRU touch
+        except FileNotFoundError:
+            self.misses += 1
+            return False, None
+        try:
+            value = marshal.loads(blob)
+        except (EOFError, ValueError, TypeError):
+            self.misses += 1                    # torn/corrupt entry – recompute
+            return False, None
+        self.hits += 1
+        return True, value
+
+    def put(self, key: str, value: Any) -> None:
+        blob = marshal.dumps(value)
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")   # unique per writer thread
+        tmp.write_bytes(blob)
+        os.replace(tmp, path)                   # atomic on POSIX and Windows
+
+        if self._size is None:
+            self._size = self.size()
+        else:
+            self._size += len(blob)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def fetch(self, kind: str, buf: bytes, decoder: Callable[[bytes], Any], version: int) -> Any:
+        """Return decoder(buf), served from the cache whenever possible."""
+        key = content_key(buf, kind, version)
+        found, value = self.get(key)
+        if found:
+            return value
+        value = decoder(buf)
+        self.put(key, value)
+        return value
+
+    # ───────────── maintenance ─────────────
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        out = []
+        for path in self.root.glob(f"*/*{_SUFFIX}"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            out.append((st.st_mtime, st.st_size, path))
+        return out
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> None:
+        """Delete least-recently-used entries until under EVICT_TO × max_bytes."""
+        lock = self.root / ".evict.lock"
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - lock.stat().st_mtime > STALE_LOCK_SECONDS:
+                    lock.unlink()               # owner died mid-eviction
+            except FileNotFoundError:
+                pass
+            return                              # someone else is evicting
+        try:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            target = int(self.max_bytes * EVICT_TO)
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    path.unlink()
+                    total -= size
+                except FileNotFoundError:
+                    pass
+            self._size = total
+        finally:
+            os.close(fd)
+            lock.unlink(missing_ok=True)
+
+    def clear(self) -> int:
+        n = 0
+        for _, _, path in self._entries():
+            path.unlink(missing_ok=True)
+            n += 1
+        self._size = 0
+        return n
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main(mode: str = "stats") -> None:
+    cache = DecodeCache()
+    if mode == "clear":
+        print(f"✓ Removed {cache.clear()} cached decode(s) from {CACHE_DIR}")
+        return
+    entries = cache._entries()
+    total = sum(size for _, size, _ in entries)
+    print(f"{CACHE_DIR}: {len(entries)} entries, {total / (1 << 20):.1f} MiB "
+          f"(limit {cache.max_bytes / (1 << 20):.0f} MiB)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "stats")
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+delay_sim.py — replay contact-event logs under different min_delay_* sets
+------------------------------------------------------------------------
+• The ~40 min_delay_for_* / min_delay_keeper_* values of a physics block
+  become a delay table: event kind → (do ms, receive ms).  do/receive
+  pairs share one kind ("block_tackle"), single values delay the actor
+  only ("normal_header", "keeper_save_no_dive_hold_ball"), and
+  getting_injured also carries min_extra_delay_for_falling_down_before_injury.
+• A log is one row per contact event (CSV):
+      match,t_ms,kind,actor,target,won
+  players 0-10 home, 11-21 away, target -1 for none; won=1 gives the
+  ball to the actor's side.  Without a log, synthetic matches are made
+  (seeded event mix with duel chains – the second ball after a tackle).
+• Each match is replayed through a heap scheduler: every event fires at
+  its time unless its actor is still recovering, then it is pushed back
+  to the moment the actor is free.  Deferred past MAX_DEFER_MS the
+  action is lost; a contest deferred past ESCAPE_MS no longer wins the
+  ball; a contest against a target that is still down is uncontested
+  (always won).
+• Reported per delay set, per match: lost player-seconds (recovery time
+  actually served), deferred / lost actions, uncontested contests and
+  possession turnovers.
+• Delay sets – the clean block, physics JSON files, built trees or
+  archives, and --scale copies of the clean set – run in a process pool
+  over the same log.
+
+python delay_sim.py [<physics.json|tree|fmf> …] [--log events.csv | --synthetic 2000]
+                    [--scale 0.5 1.5] [-j N] [--json report.json]
+"""
+
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterator, NamedTuple
+import argparse
+import csv
+import heapq
+import json
+import os
+import random
+import re
+import sys
+import time
+
+from kinematics import clean_block, load_physics
+
+MATCH_MS = 90 * 60 * 1000
+MAX_DEFER_MS = 2000              # an action delayed longer than this is lost
+ESCAPE_MS = 500                  # a contest delayed longer than this is too late to win the ball
+HOME = range(11)
+PLAYERS = 22                     # ids 0-10 home, 11-21 away
+
+_PAIRED = re.compile(r"^min_delay_for_(?P<kind>.+)_(?P<side>do|receive)$")
+_SINGLE = re.compile(r"^min_delay_(?:for_)?(?P<kind>.+)$")
+_ALIASES = {"push_opponen": "push_opponent"}            # the receive key is misspelt in the file
+INJURY_EXTRA = "min_extra_delay_for_falling_down_before_injury"
+
+# synthetic event mix: kind → (relative frequency, contest, P(actor wins))
+_MIX = {
+    "block_tackle": (20, True, 0.55), "slide_tackle": (8, True, 0.5),
+    "force_opponent_to_lose_ball": (15, True, 0.45), "shoulder_charge": (10, True, 0.4),
+    "push_opponent": (5, True, 0.3), "obstruct": (4, True, 0.2), "shirt_tug": (4, True, 0.2),
+    "trip": (4, True, 0.3), "ball_lunge": (6, True, 0.45), "deflect_ball": (10, True, 0.5),
+    "foot_up_in_tackle": (1, True, 0.3), "two_footed_tackle": (0.5, True, 0.4),
+    "violent_act": (0.2, True, 0.0), "normal_header": (25, False, 0.5),
+    "diving_header": (1.5, False, 0.5), "player_stop_to_avoid_collision": (8, False, 0.0),
+    "keeper_save_no_dive_hold_ball": (3, False, 1.0), "keeper_save_dive_and_hold_ball": (1.5, False, 1.0),
+    "keeper_save_dive_but_not_held": (1.5, False, 0.3), "keeper_save_no_dive_not_held": (1, False, 0.3),
+    "keeper_save_with_outreached_foot": (0.5, False, 0.3), "keeper_drop_ball_for_distribution": (4, False, 1.0),
+    "getting_injured": (0.3, False, 0.0), "celebrating_a_goal": (2.7, False, 0.0),
+}
+EVENTS_PER_MATCH = 260
+CHAIN_P = 0.35                   # chance an event is followed by a second duel among the same players
+
+
+class Event(NamedTuple):
+    match: int
+    t: int                       # ms
+    kind: str
+    actor: int
+    target: int                  # -1: none
+    won: bool
+
+
+# ═════════════════════════ DELAYS ═══════════════════════════════
+def delay_table(block: dict[str, int]) -> dict[str, tuple[int, int]]:
+    """Event kind → (actor ms, target ms) from one physics block."""
+    table: dict[str, list[int]] = {}
+    for key, ms in block.items():
+        m = _PAIRED.match(key)
+        if m:
+            kind = _ALIASES.get(m["kind"], m["kind"])
+            table.setdefault(kind, [0, 0])[m["side"] == "receive"] = int(ms)
+            continue
+        m = _SINGLE.match(key)
+        if m:
+            table.setdefault(m["kind"], [0, 0])[0] = int(ms)
+    if "getting_injured" in table:
+        table["getting_injured"][0] += int(block.get(INJURY_EXTRA, 0))
+    return {k: (do, rec) for k, (do, rec) in table.items()}
+
+
+def scaled(table: dict[str, tuple[int, int]], factor: float) -> dict[str, tuple[int, int]]:
+    return {k: (round(do * factor), round(rec * factor)) for k, (do, rec) in table.items()}
+
+
+# ═════════════════════════ LOGS ═════════════════════════════════
+def read_log(path: Path) -> list[Event]:
+    events = []
+    with open(path, newline="", encoding="utf-8") as fh:
+        for line, r in enumerate(csv.DictReader(fh), 2):
+            e = Event(int(r["match"]), int(r["t_ms"]), r["kind"], int(r["actor"]),
+                      int(r.get("target") or -1), r.get("won", "0").strip() in ("1", "true", "True"))
+            if not 0 <= e.actor < PLAYERS or not -1 <= e.target < PLAYERS:
+                raise ValueError(f"{path.name} line {line}: player ids run 0-{PLAYERS - 1} "
+                                 f"(target -1 = none), got actor {e.actor}, target {e.target}")
+            events.append(e)
+    return events
+
+
+def write_log(events: list[Event], path: Path) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        w = csv.writer(fh)
+        w.writerow(("match", "t_ms", "kind", "actor", "target", "won"))
+        w.writerows((e.match, e.t, e.kind, e.actor, e.target, int(e.won)) for e in events)
+
+
+def synthetic_log(matches: int, seed: int = 0) -> list[Event]:
+    """Seeded matches of EVENTS_PER_MATCH contact events with duel chains."""
+    rng = random.Random(seed)
+    kinds = list(_MIX)
+    weights = [_MIX[k][0] for k in kinds]
+    events = []
+    for m in range(matches):
+        t = 0
+        while True:
+            t += int(rng.expovariate(EVENTS_PER_MATCH / MATCH_MS))
+            if t >= MATCH_MS:
+                break
+            kind = rng.choices(kinds, weights)[0]
+            _, contest, p_win = _MIX[kind]
+            if kind.startswith("keeper_"):
+                actor = rng.choice((0, 11))
+            else:
+                actor = rng.randrange(PLAYERS)
+            target = -1
+            if contest:
+                side = 11 if actor in HOME else 0
+                target = side + rng.randrange(1, 11)
+            events.append(Event(m, t, kind, actor, target, rng.random() < p_win))
+            if contest and rng.random() < CHAIN_P:          # the loser goes straight back in
+                t2 = t + rng.randint(300, 2500)
+                events.append(Event(m, t2, kind, target, actor, rng.random() < p_win))
+    events.sort()
+    return events
+
+
+def _by_match(events: list[Event]) -> Iterator[list[Event]]:
+    start = 0
+    for i in range(1, len(events) + 1):
+        if i == len(events) or events[i].match != events[start].match:
+            yield events[start:i]
+            start = i
+
+
+@lru_cache(maxsize=4)
+def _log(source: str | tuple[int, int]) -> list[Event]:
+    """Per-process log: a CSV path or (matches, seed) for a synthetic one."""
+    if isinstance(source, tuple):
+        return synthetic_log(*source)
+    return sorted(read_log(Path(source)))
+
+
+# ═════════════════════════ REPLAY ═══════════════════════════════
+def replay(match: list[Event], delays: dict[str, tuple[int, int]]) -> dict[str, int]:
+    """One match through the scheduler; counters for this match."""
+    free = [0] * PLAYERS                                # ms at which each player can act again
+    heap = [(e.t, i, e, e.t) for i, e in enumerate(match)]
+    heapq.heapify(heap)
+    seq = len(match)
+    stats = dict.fromkeys(("events", "fired", "deferred", "lost", "deferred_ms", "lost_player_ms",
+                           "uncontested", "turnovers"), 0)
+    stats["events"] = len(match)
+    possession = (0 if match[0].actor in HOME else 1) if match else 0
+
+    while heap:
+        t, _, e, logged = heapq.heappop(heap)
+        if free[e.actor] > t:
+            if free[e.actor] - logged > MAX_DEFER_MS:
+                stats["lost"] += 1
+            else:
+                stats["deferred"] += 1
+                seq += 1
+                heapq.heappush(heap, (free[e.actor], seq, e, logged))
+            continue
+
+        stats["fired"] += 1
+        stats["deferred_ms"] += t - logged
+        do_ms, receive_ms = delays.get(e.kind, (0, 0))
+        won = e.won
+        if e.target >= 0:
+            if free[e.target] > t:
+                stats["uncontested"] += 1
+                won = True
+            elif t - logged > ESCAPE_MS:
+                won = False
+            until = t + receive_ms
+            if until > free[e.target]:
+                stats["lost_player_ms"] += until - max(free[e.target], t)
+                free[e.target] = until
+        until = t + do_ms
+        if until > free[e.actor]:
+            stats["lost_player_ms"] += until - max(free[e.actor], t)
+            free[e.actor] = until
+
+        if won:
+            side = 0 if e.actor in HOME else 1
+            stats["turnovers"] += side != possession
+            possession = side
+    return stats
+
+
+def simulate(task: tuple[str, dict[str, tuple[int, int]], Any]) -> tuple[str, dict[str, float]]:
+    """Worker: (name, delay table, log source) → (name, per-match means)."""
+    name, delays, source = task
+    events = _log(source)
+    totals: dict[str, int] = {}
+    matches = 0
+    for match in _by_match(events):
+        matches += 1
+        for k, v in replay(match, delays).items():
+            totals[k] = totals.get(k, 0) + v
+    matches = max(matches, 1)
+    out = {k: v / matches for k, v in totals.items() if not k.endswith("_ms")}
+    out["lost_player_s"] = totals.get("lost_player_ms", 0) / 1000 / matches
+    out["mean_deferral_ms"] = totals.get("deferred_ms", 0) / max(totals.get("fired", 0), 1)
+    return name, out
+
+
+def run(delay_sets: dict[str, dict[str, tuple[int, int]]], source: str | tuple[int, int],
+        workers: int | None = None) -> dict[str, dict[str, float]]:
+    tasks = [(name, delays, source) for name, delays in delay_sets.items()]
+    workers = workers or os.cpu_count() or 1
+
+    def results():
+        if workers == 1 or len(tasks) <= 1:
+            yield from map(simulate, tasks)
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+                yield from pool.map(simulate, tasks)
+
+    return dict(results())
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main(argv: list[str]) -> None:
+    ap = argparse.ArgumentParser(description="Replay contact-event logs under different min_delay_* sets.")
+    ap.add_argument("variants", nargs="*", type=Path,
+                    help="physics JSON files, simatch trees or .fmf/.zip archives (the clean set is always first)")
+    ap.add_argument("--log", type=Path, default=None, help="events CSV: match,t_ms,kind,actor,target,won")
+    ap.add_argument("--synthetic", type=int, default=1000, help="synthetic matches when --log is not given")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--scale", type=float, nargs="*", default=[], help="also run the clean delays × each factor")
+    ap.add_argument("--write-log", type=Path, default=None, help="save the synthetic log as CSV")
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    ap.add_argument("--json", type=Path, default=None, help="also write the report here")
+    args = ap.parse_args(argv)
+
+    clean = delay_table(clean_block())
+    try:
+        sets = {"clean": clean}
+        for src in args.variants:
+            sets[src.stem if src.is_file() else src.name] = delay_table(load_physics(src))
+        for f in args.scale:
+            sets[f"clean ×{f:g}"] = scaled(clean, f)
+        source: str | tuple[int, int] = str(args.log) if args.log else (args.synthetic, args.seed)
+        events = _log(source)
+    except (OSError, KeyError, ValueError) as exc:
+        sys.exit(f"⛔ {exc}")
+    unknown = sorted({e.kind for e in events} - clean.keys())
+    if unknown:
+        print(f"⚠️  no delay for {', '.join(unknown)} – those events recover instantly")
+    if args.write_log:
+        write_log(events, args.write_log)
+
+    t0 = time.perf_counter()
+    report = run(sets, source, args.jobs)
+    secs = time.perf_counter() - t0
+
+    metrics = ["lost_player_s", "turnovers", "uncontested", "deferred", "lost", "mean_deferral_ms"]
+    print(f"{'delay set':<24}" + "".join(f"{m:>18}" for m in metrics))
+    for name, row in report.items():
+        print(f"{name:<24}" + "".join(f"{row[m]:>18.2f}" for m in metrics))
+    if args.json:
+        args.json.write_text(json.dumps({"events": len(events), "variants": report}, indent=2), "utf-8")
+    print(f"✓ {len(sets)} delay set(s) × {len(events):,} events in {secs:.2f}s (per-match means)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+fmf_archive.py — read and write SI *.fmf resource archives (simatch.fmf)
+-------------------------------------------------------------------------
+No need to extract with the Resource Archiver first: list the tree and
+pull single files straight out of the archive.  FmfWriter packs a tree
+back into the same layout; already-packed chunk runs (from another
+archive) are copied through without recompressing.
+
+Layout (all little-endian)
+
+    0x00  u16 0x0102 | "fmf." | 3 bytes (08 00 00)         9-byte magic
+    0x09  u64 directory offset   (relative to 0x09)
+    0x11  u64 data offset        (relative to 0x09, 17 → data at 0x1A)
+    0x19  u8  compression        (3 = zstd)
+    DATA  every file is a run of  u32 size + zstd frame,  one frame per
+          128 KiB of raw data; entry offsets are relative to DATA
+    DIR   9-byte magic again + the same chunked zstd stream, holding
+
+          DIRNODE  u32 len + name | u32 n_files | n × FILE
+                   | u32 n_dirs | n × DIRNODE
+          FILE     u32 len + stem | u32 len + ".ext"
+                   | u64 offset | u64 packed size | u64 size
+                   | u64 created | u64 modified       (unix seconds)
+
+python fmf_archive.py [archive.fmf]              → list every file
+python fmf_archive.py --pack <folder> <out.fmf>   → pack a folder
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterator
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import time
+
+# ───────────────────────── paths ────────────────────────────────
+ROOT_DIR    = Path(__file__).resolve().parent.parent
+SIMATCH_FMF = ROOT_DIR / "src" / "simatch.fmf"
+
+FMF_MAGIC = b"\x02\x01fmf.\x08\x00\x00"
+COMPRESSION_ZSTD = 3
+CHUNK_SIZE = 1 << 17
+ZSTD_LEVEL = 3
+
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_HEADER = struct.Struct("<QQB")
+_FILE = struct.Struct("<5Q")
+
+
+# ───────────────────── data structures ──────────────────────────
+@dataclass
+class FmfEntry:
+    path: str                 # posix path below the archive root
+    offset: int               # relative to the data section
+    packed_size: int
+    size: int
+    created: int
+    modified: int
+
+
+# ═════════════════════════ DECODER ══════════════════════════════
+def iter_chunks(buf: memoryview | bytes, pos: int, end: int) -> Iterator[memoryview]:
+    """Yield each compressed frame of a chunk run [pos, end)."""
+    view = memoryview(buf)
+    while pos < end:
+        (n,) = _U32.unpack_from(view, pos)
+        yield view[pos + 4 : pos + 4 + n]
+        pos += 4 + n
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError(".fmf archives need zstandard (pip install zstandard)") from None
+    return zstandard
+
+
+def _inflate(buf: memoryview | bytes, pos: int, end: int) -> bytes:
+    dctx = _zstd().ZstdDecompressor()
+    return b"".join(dctx.decompressobj().decompress(f) for f in iter_chunks(buf, pos, end))
+
+
+def parse_directory(raw: bytes) -> tuple[str, list[FmfEntry]]:
+    """Decode the directory blob → (root name, entries in archive order)."""
+    pos = 0
+    entries: list[FmfEntry] = []
+
+    def text() -> str:
+        nonlocal pos
+        (n,) = _U32.unpack_from(raw, pos)
+        pos += 4 + n
+        return raw[pos - n : pos].decode("utf-8")
+
+    def node(prefix: str) -> None:
+        nonlocal pos
+        (n_files,) = _U32.unpack_from(raw, pos)
+        pos += 4
+        for _ in range(n_files):
+            name = text() + text()
+            entries.append(FmfEntry(prefix + name, *_FILE.unpack_from(raw, pos)))
+            pos += _FILE.size
+        (n_dirs,) = _U32.unpack_from(raw, pos)
+        pos += 4
+        for _ in range(n_dirs):
+            node(f"{prefix}{text()}/")
+
+    root = text()
+    node("")
+    if pos != len(raw):
+        raise ValueError(f"fmf directory: {len(raw) - pos} trailing byte(s)")
+    return root, entries
+
+
+class FmfArchive:
+    """Memory-mapped .fmf; files are inflated on demand."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._fh = open(self.path, "rb")
+        self._map = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buf = memoryview(self._map)
+
+        if bytes(self.buf[: len(FMF_MAGIC)]) != FMF_MAGIC:
+            raise ValueError(f"{self.path.name}: not an .fmf archive")
+        dir_rel, data_rel, comp = _HEADER.unpack_from(self.buf, len(FMF_MAGIC))
+        if comp != COMPRESSION_ZSTD:
+            raise ValueError(f"{self.path.name}: unknown compression {comp}")
+        self.data_pos = len(FMF_MAGIC) + data_rel
+        dir_pos = len(FMF_MAGIC) + dir_rel
+        if bytes(self.buf[dir_pos : dir_pos + len(FMF_MAGIC)]) != FMF_MAGIC:
+            raise ValueError(f"{self.path.name}: directory magic not found at 0x{dir_pos:08X}")
+
+        self.root, entries = parse_directory(_inflate(self.buf, dir_pos + len(FMF_MAGIC), len(self.buf)))
+        self.entries = {e.path: e for e in entries}
+
+    def packed(self, path: str) -> memoryview:
+        """Raw chunk run (u32 sizes + frames) of one file – zero-copy."""
+        e = self.entries[path]
+        start = self.data_pos + e.offset
+        return self.buf[start : start + e.packed_size]
+
+    def read(self, path: str) -> bytes:
+        e = self.entries[path]
+        start = self.data_pos + e.offset
+        raw = _inflate(self.buf, start, start + e.packed_size)
+        if len(raw) != e.size:
+            raise ValueError(f"{path}: inflated {len(raw)} bytes, directory says {e.size}")
+        return raw
+
+    def digest(self, path: str) -> str:
+        return hashlib.blake2b(self.read(path), digest_size=16).hexdigest()
+
+    def close(self) -> None:
+        self.buf.release()
+        self._map.close()
+        self._fh.close()
+
+    def __enter__(self) -> "FmfArchive":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# ═════════════════════════ ENCODER ══════════════════════════════
+def pack_chunks(data: bytes | memoryview, level: int = ZSTD_LEVEL) -> bytes:
+    """Raw file bytes → chunk run (u32 size + zstd frame per CHUNK_SIZE)."""
+    cctx = _zstd().ZstdCompressor(level=level, write_checksum=False, write_content_size=True)
+    view = memoryview(data)
+    out = []
+    for pos in range(0, len(view), CHUNK_SIZE):
+        frame = cctx.compress(view[pos : pos + CHUNK_SIZE])
+        out += (_U32.pack(len(frame)), frame)
+    return b"".join(out)
+
+
+def _text(s: str) -> bytes:
+    raw = s.encode("utf-8")
+    return _U32.pack(len(raw)) + raw
+
+
+class FmfWriter:
+    """
+    Stream files into a new .fmf.  Data is written as it is added; the
+    directory goes at the end and the header is patched on close(), so
+    *stream* must be seekable (file, BytesIO).
+    """
+
+    def __init__(self, stream: BinaryIO, root: str = "simatch", level: int = ZSTD_LEVEL):
+        self.stream, self.root, self.level = stream, root, level
+        self.entries: list[FmfEntry] = []
+        self._start = stream.tell()
+        self._pos = 0                                   # relative to the data section
+        stream.write(FMF_MAGIC + _HEADER.pack(0, _HEADER.size, COMPRESSION_ZSTD))
+
+    def add(self, path: str, data: bytes | memoryview, modified: int | None = None) -> FmfEntry:
+        return self.add_packed(path, pack_chunks(data, self.level), len(data), modified)
+
+    def add_packed(self, path: str, packed: bytes | memoryview, size: int,
+                   modified: int | None = None) -> FmfEntry:
+        """Append an already-packed chunk run (e.g. FmfArchive.packed())."""
+        stamp = int(time.time() if modified is None else modified)
+        entry = FmfEntry(path, self._pos, len(packed), size, stamp, stamp)
+        self.stream.write(packed)
+        self._pos += len(packed)
+        self.entries.append(entry)
+        return entry
+
+    def _directory(self) -> bytes:
+        tree: dict = {}                                 # {"": [entries], name: subtree}
+        for e in self.entries:
+            node = tree
+            *dirs, name = e.path.split("/")
+            for d in dirs:
+                node = node.setdefault(d, {})
+            node.setdefault("", []).append((name, e))
+
+        def emit(node: dict) -> list[bytes]:
+            files = node.get("", [])
+            out = [_U32.pack(len(files))]
+            for name, e in files:
+                stem, dot, ext = name.rpartition(".")
+                stem, ext = (stem, dot + ext) if dot else (name, "")
+                out += (_text(stem), _text(ext),
+                        _FILE.pack(e.offset, e.packed_size, e.size, e.created, e.modified))
+            subdirs = [k for k in node if k]
+            out.append(_U32.pack(len(subdirs)))
+            for k in subdirs:
+                out += (_text(k), *emit(node[k]))
+            return out
+
+        return b"".join([_text(self.root), *emit(tree)])
+
+    def close(self) -> None:
+        dir_rel = _HEADER.size + self._pos              # both offsets count from 0x09
+        self.stream.write(FMF_MAGIC + pack_chunks(self._directory(), self.level))
+        end = self.stream.tell()
+        self.stream.seek(self._start + len(FMF_MAGIC))
+        self.stream.write(_HEADER.pack(dir_rel, _HEADER.size, COMPRESSION_ZSTD))
+        self.stream.seek(end)
+
+    def __enter__(self) -> "FmfWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+
+
+def pack_folder(folder: Path, out: Path, level: int = ZSTD_LEVEL, root: str = "simatch") -> int:
+    """Pack *folder* as <root>/…; *out* only appears once the archive is complete."""
+    folder, out = Path(folder), Path(out)
+    files = sorted(p for p in folder.rglob("*") if p.is_file())
+    tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as fh, FmfWriter(fh, root, level) as w:
+            for p in files:
+                w.add(p.relative_to(folder).as_posix(), p.read_bytes(), int(os.stat(p).st_mtime))
+        os.replace(tmp, out)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return len(files)
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main(argv: list[str]) -> None:
+    try:
+        _zstd()                                         # fail before any work is done
+    except RuntimeError as e:
+        sys.exit(f"⛔ {e}")
+    if argv[:1] == ["--pack"]:
+        if len(argv) != 3:
+            sys.exit("usage: fmf_archive.py --pack <folder> <out.fmf>")
+        n = pack_folder(Path(argv[1]), Path(argv[2]))
+        print(f"✓ Packed {n} files → {argv[2]}")
+        return
+    path = Path(argv[0]) if argv else SIMATCH_FMF
+    if not path.exists():
+        sys.exit(f"Archive not found: {path}")
+    with FmfArchive(path) as fmf:
+        for e in fmf.entries.values():
+            print(f"{e.size:>10}  {e.packed_size:>9}  {fmf.root}/{e.path}")
+        print(f"✓ {len(fmf.entries)} files in {path.name}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
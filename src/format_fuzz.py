@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+format_fuzz.py — randomised corpus + round-trip fuzz harness for .jsb/.tac/.stra
+--------------------------------------------------------------------------------
+• Generators build random but *valid* files from a seed:
+      jsb   every tag form – inline/i32/u32/u64/i64 ints, inline and full
+            doubles (±0.0, inf, nan), short/long UTF-8 strings, containers
+            either side of the 15-entry inline-count boundary, 255-byte
+            keys; "raw" cases also use non-canonical encodings (long-form
+            headers, i32 for small ints, u32/u64 tags for small values)
+      stra  random strategy blocks (levels, instruction bits, names, tags)
+      tac   random headers/slot markers, 0-11 slots, role lists, trailers
+• Properties checked for each case
+      decode(encode(v)) == v          types and float bits included
+      encode(decode(b)) == b          canonical bytes
+      decode(encode(decode(b))) == decode(b)   non-canonical bytes
+      jsb_stream events, with a tiny read window, rebuild the same value
+      jsb_schema FastDecoder agrees (same shape, and a reshaped sibling
+      that must fall back)
+      every strict prefix of a buffer is rejected, never half-decoded
+  The stock clean_simatch files run first as fixed seeds.
+• --bench times each decoder/encoder on the generated corpus (MB/s);
+  --baseline bench.json compares with a saved run and fails on a drop of
+  more than --tolerance.
+• Failing cases are written to fuzz_failures/ with their seed.
+
+python format_fuzz.py [-n 500] [--seed 1] [--bench] [--save-bench f.json] [--baseline f.json]
+python format_fuzz.py --write-corpus <dir> [-n 200]
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+import argparse
+import io
+import json
+import math
+import random
+import struct
+import sys
+import time
+
+from jsb_codec import (
+    T_ARRAY, T_DOUBLE, T_INT, T_INT64, T_OBJECT, T_STRING, T_UINT32, T_UINT64,
+    decode_jsb, encode_jsb,
+)
+from jsb_schema import FastDecoder
+from jsb_stream import (
+    END_ARRAY, END_OBJECT, KEY, START_ARRAY, START_OBJECT, JsbReader,
+)
+from tactics_decoder import (
+    PlayerSlot, RoleOption, Strategy, StrategyFile, Tactic,
+    decode_stra, decode_tac, encode_stra, encode_tac,
+)
+
+# ───────────────────────── paths ────────────────────────────────
+ROOT_DIR     = Path(__file__).resolve().parent.parent
+SIMATCH_DIR  = ROOT_DIR / "src" / "clean_simatch"
+FAILURES_DIR = ROOT_DIR / "fuzz_failures"
+
+STREAM_WINDOW = 7           # tiny window so every refill boundary gets hit
+MAX_DEPTH = 5
+DEFAULT_TOLERANCE = 0.25
+
+_ALPHABET = "abcdefghijklmnopqrstuvwxyz_:0123456789 ABCXYZ-é漢🙂"
+_ROLE_TAIL_LEN = len(RoleOption(0).tail)
+_SLOT_END_LEN = len(PlayerSlot((0, 0, 0), []).end)
+_ERRORS = (ValueError, IndexError, struct.error, UnicodeDecodeError, EOFError)
+
+
+# ═════════════════════════ EQUALITY ═════════════════════════════
+def same(a: Any, b: Any) -> bool:
+    """Strict equality: types must match, floats compared bit for bit."""
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, float):
+        return struct.pack("<d", a) == struct.pack("<d", b)
+    if isinstance(a, dict):
+        return list(a) == list(b) and all(same(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+# ═════════════════════════ JSB GENERATORS ═══════════════════════
+def _text(rng: random.Random, max_len: int) -> str:
+    n = rng.choice((0, 1, rng.randint(2, 13), 14, 15, rng.randint(16, max_len)))
+    return "".join(rng.choice(_ALPHABET) for _ in range(min(n, max_len)))
+
+
+def _key(rng: random.Random) -> str:
+    if rng.random() < 0.02:
+        return "k" * 255                                  # longest encodable key
+    while True:
+        k = _text(rng, 40)
+        if len(k.encode("utf-8")) <= 255:
+            return k
+
+
+def _int(rng: random.Random) -> int:
+    return rng.choice((
+        rng.randint(-7, 7), -8, 8, rng.randint(-(1 << 31), (1 << 31) - 1),
+        -(1 << 31), (1 << 31) - 1, (1 << 31), rng.randint(1 << 31, (1 << 32) - 1),
+        rng.randint(1 << 32, (1 << 64) - 1), rng.randint(-(1 << 63), -(1 << 31) - 1),
+    ))
+
+
+def _float(rng: random.Random) -> float:
+    return rng.choice((
+        0.0, 0.5, -0.0, -0.5, 1.0, rng.uniform(-1e6, 1e6), rng.random(),
+        math.inf, -math.inf, math.nan, 5e-324, 1.7976931348623157e308,
+    ))
+
+
+def _count(rng: random.Random, depth: int) -> int:
+    if depth >= MAX_DEPTH:
+        return 0
+    return rng.choice((0, 1, rng.randint(2, 6), 14, 15, 16) if depth < 3 else (0, 1, 2, 3))
+
+
+def random_value(rng: random.Random, depth: int = 0) -> Any:
+    r = rng.random()
+    if depth < MAX_DEPTH and r < 0.25:
+        obj: dict[str, Any] = {}
+        for _ in range(_count(rng, depth)):
+            obj[_key(rng)] = random_value(rng, depth + 1)
+        return obj
+    if depth < MAX_DEPTH and r < 0.45:
+        return [random_value(rng, depth + 1) for _ in range(_count(rng, depth))]
+    if r < 0.7:
+        return _int(rng)
+    if r < 0.85:
+        return _float(rng)
+    return _text(rng, 300)
+
+
+def random_doc(rng: random.Random) -> Any:
+    """Top level is a container, like every real .jsb."""
+    doc = random_value(rng)
+    while not isinstance(doc, (dict, list)):
+        doc = random_value(rng)
+    return doc
+
+
+# ---- non-canonical byte encoder ------------------------------------
+def _raw_header(out: bytearray, rng: random.Random, typ: int, count: int) -> None:
+    if count < 15 and rng.random() < 0.7:
+        out.append(((count + 1) << 4) | typ)
+    else:
+        out.append(typ)
+        out += struct.pack("<I", count)
+
+
+def encode_loose(value: Any, rng: random.Random, out: bytearray) -> None:
+    """Like encode_value(), but picks among *all* valid encodings."""
+    if isinstance(value, int):
+        forms = []
+        if -7 <= value <= 7:
+            forms.append(lambda: out.append(((value + 8) << 4) | T_INT))
+        if -(1 << 31) <= value < (1 << 31):
+            forms.append(lambda: out.extend(bytes((T_INT,)) + struct.pack("<i", value)))
+        if 0 <= value < (1 << 32):
+            forms.append(lambda: out.extend(bytes((T_UINT32,)) + struct.pack("<I", value)))
+        if 0 <= value < (1 << 64):
+            forms.append(lambda: out.extend(bytes((T_UINT64,)) + struct.pack("<Q", value)))
+        if -(1 << 63) <= value < (1 << 63):
+            forms.append(lambda: out.extend(bytes((T_INT64,)) + struct.pack("<q", value)))
+        rng.choice(forms)()
+    elif isinstance(value, float):
+        bits = struct.pack("<d", value)
+        if bits == struct.pack("<d", 0.0) and rng.random() < 0.5:
+            out.append(0x17)
+        elif bits == struct.pack("<d", 0.5) and rng.random() < 0.5:
+            out.append(0x27)
+        else:
+            out.append(T_DOUBLE)
+            out += bits
+    elif isinstance(value, str):
+        raw = value.encode("utf-8")
+        _raw_header(out, rng, T_STRING, len(raw))
+        out += raw
+    elif isinstance(value, dict):
+        _raw_header(out, rng, T_OBJECT, len(value))
+        for k, v in value.items():
+            kraw = k.encode("utf-8")
+            out.append(len(kraw))
+            out += kraw
+            encode_loose(v, rng, out)
+    else:
+        _raw_header(out, rng, T_ARRAY, len(value))
+        for v in value:
+            encode_loose(v, rng, out)
+
+
+def reshape(rng: random.Random, doc: Any) -> Any:
+    """A sibling of *doc* with one leaf changed in type – schema fallback bait."""
+    if isinstance(doc, dict) and doc:
+        k = rng.choice(list(doc))
+        return {**doc, k: reshape(rng, doc[k])}
+    if isinstance(doc, list) and doc:
+        i = rng.randrange(len(doc))
+        return doc[:i] + [reshape(rng, doc[i])] + doc[i + 1:]
+    if isinstance(doc, str):
+        return 1
+    return "x"
+
+
+# ═════════════════════════ TACTICS GENERATORS ═══════════════════
+def _bytes(rng: random.Random, n: int) -> bytes:
+    return bytes(rng.getrandbits(8) for _ in range(n))
+
+
+def random_strategy(rng: random.Random) -> Strategy:
+    return Strategy(
+        kind=3, level_a=rng.getrandbits(32), level_b=rng.getrandbits(32),
+        marker=_bytes(rng, 3), instruction_bits=_bytes(rng, 12),
+        name=_text(rng, 60), tag=_bytes(rng, 4),
+    )
+
+
+def random_stra(rng: random.Random) -> StrategyFile:
+    return StrategyFile(rng.getrandbits(16), rng.getrandbits(16), rng.getrandbits(32), random_strategy(rng))
+
+
+def random_tac(rng: random.Random) -> Tactic:
+    tac = Tactic(_bytes(rng, 10), _text(rng, 40), _bytes(rng, 13), random_strategy(rng))
+    marker = tac.slot_marker
+    for _ in range(rng.choice((0, 1, rng.randint(2, 10), 11))):
+        roles = [RoleOption(rng.getrandbits(64), _bytes(rng, _ROLE_TAIL_LEN)) for _ in range(rng.choice((0, 1, 2, 5)))]
+        end = _bytes(rng, _SLOT_END_LEN)
+        pos = (rng.getrandbits(32), rng.getrandbits(32), rng.getrandbits(32))
+        tac.slots.append(PlayerSlot(pos, roles, end))
+    if rng.random() < 0.7:
+        tac.trailer_ids = [rng.getrandbits(64) for _ in range(rng.randint(0, 20))]
+    rest = _bytes(rng, rng.choice((0, 1, 3, 183)))
+    # the grammar is only unambiguous if the trailer does not look like
+    # another slot (or like trailer ids when there are none)
+    while rest[:3] == marker or (tac.trailer_ids is None and rest[:1] == b"\x01"):
+        rest = _bytes(rng, len(rest))
+    tac.trailer_rest = rest
+    return tac
+
+
+# ═════════════════════════ PROPERTIES ═══════════════════════════
+class Failure(Exception):
+    pass
+
+
+def _from_events(reader: JsbReader) -> Any:
+    stack: list[Any] = []
+    keys: list[str | None] = []
+    root: Any = None
+
+    def put(value: Any) -> None:
+        nonlocal root
+        if not stack:
+            root = value
+        elif isinstance(stack[-1], dict):
+            stack[-1][keys[-1]] = value
+        else:
+            stack[-1].append(value)
+
+    for ev in reader:
+        if ev.kind in (START_OBJECT, START_ARRAY):
+            container: Any = {} if ev.kind == START_OBJECT else []
+            put(container)
+            stack.append(container)
+            keys.append(None)
+        elif ev.kind in (END_OBJECT, END_ARRAY):
+            stack.pop()
+            keys.pop()
+        elif ev.kind == KEY:
+            keys[-1] = ev.value
+        else:
+            put(ev.value)
+    return root
+
+
+def _rejects_prefixes(buf: bytes, decode: Callable[[bytes], Any], what: str) -> None:
+    cuts = {len(buf) - 1, len(buf) // 2, 1} | {random.Random(len(buf)).randrange(len(buf)) for _ in range(3)}
+    for cut in sorted(c for c in cuts if 0 < c < len(buf)):
+        try:
+            decode(buf[:cut])
+        except _ERRORS:
+            continue
+        raise Failure(f"{what}: {cut}-byte prefix of {len(buf)} decoded without error")
+
+
+def check_jsb(doc: Any, rng: random.Random) -> int:
+    buf = encode_jsb(doc)
+    back = decode_jsb(buf)
+    if not same(back, doc):
+        raise Failure("decode(encode(v)) != v")
+    if encode_jsb(back) != buf:
+        raise Failure("encode(decode(b)) != b for canonical bytes")
+
+    loose = bytearray()
+    encode_loose(doc, rng, loose)
+    loose_doc = decode_jsb(bytes(loose))
+    if not same(loose_doc, doc):
+        raise Failure("non-canonical encoding decodes to a different value")
+    if not same(decode_jsb(encode_jsb(loose_doc)), loose_doc):
+        raise Failure("decode(encode(decode(b))) != decode(b)")
+
+    for src in (buf, bytes(loose)):
+        if not same(_from_events(JsbReader(io.BytesIO(src), STREAM_WINDOW)), doc):
+            raise Failure("jsb_stream events rebuild a different value")
+
+    fast = FastDecoder.learn(buf, cache_dir=None)
+    if not same(fast.decode(buf), doc) or fast.fallback:
+        raise Failure("jsb_schema decoder disagrees on its own sample")
+    sibling = reshape(rng, doc)
+    if not same(fast.decode(encode_jsb(sibling)), sibling):
+        raise Failure("jsb_schema decoder disagrees on a reshaped sibling")
+
+    _rejects_prefixes(buf, decode_jsb, "decode_jsb")
+    return len(buf)
+
+
+def check_stra(sf: StrategyFile) -> int:
+    buf = encode_stra(sf)
+    if decode_stra(buf) != sf:
+        raise Failure(".stra: decode(encode(v)) != v")
+    if encode_stra(decode_stra(buf)) != buf:
+        raise Failure(".stra: encode(decode(b)) != b")
+    _rejects_prefixes(buf, decode_stra, "decode_stra")
+    return len(buf)
+
+
+def check_tac(tac: Tactic) -> int:
+    buf = encode_tac(tac)
+    back = decode_tac(buf)
+    if back != tac:
+        raise Failure(".tac: decode(encode(v)) != v")
+    if encode_tac(back) != buf:
+        raise Failure(".tac: encode(decode(b)) != b")
+    return len(buf)
+
+
+# ═════════════════════════ RUNNER ═══════════════════════════════
+@dataclass
+class FuzzReport:
+    cases: int = 0
+    bytes: int = 0
+    failures: list[str] = field(default_factory=list)
+
+
+def _save_failure(kind: str, seed: int, payload: bytes, msg: str) -> Path:
+    FAILURES_DIR.mkdir(exist_ok=True)
+    path = FAILURES_DIR / f"{kind}_{seed}.bin"
+    path.write_bytes(payload)
+    path.with_suffix(".txt").write_text(f"seed {seed}\n{msg}\n", "utf-8")
+    return path
+
+
+def stock_files() -> list[Path]:
+    return sorted(p for p in SIMATCH_DIR.rglob("*") if p.suffix in (".jsb", ".tac", ".stra"))
+
+
+def run_fuzz(iterations: int, seed: int, log=print) -> FuzzReport:
+    report = FuzzReport()
+
+    for path in stock_files():                                # fixed seeds first
+        buf = path.read_bytes()
+        try:
+            if path.suffix == ".jsb":
+                check_jsb(decode_jsb(buf), random.Random(seed))
+                if encode_jsb(decode_jsb(buf)) != buf:
+                    raise Failure("stock file does not round-trip byte-for-byte")
+            elif path.suffix == ".stra":
+                if encode_stra(decode_stra(buf)) != buf:
+                    raise Failure("stock file does not round-trip byte-for-byte")
+            elif encode_tac(decode_tac(buf)) != buf:
+                raise Failure("stock file does not round-trip byte-for-byte")
+        except Exception as exc:
+            report.failures.append(f"{path.relative_to(SIMATCH_DIR)}: {type(exc).__name__}: {exc}")
+        report.cases += 1
+        report.bytes += len(buf)
+
+    checks = (
+        ("jsb", lambda rng: random_doc(rng), lambda v, rng: check_jsb(v, rng), encode_jsb),
+        ("stra", random_stra, lambda v, rng: check_stra(v), encode_stra),
+        ("tac", random_tac, lambda v, rng: check_tac(v), encode_tac),
+    )
+    for i in range(iterations):
+        case_seed = seed * 1_000_003 + i
+        for kind, make, check, encode in checks:
+            rng = random.Random(f"{kind}:{case_seed}")
+            value = make(rng)
+            try:
+                report.bytes += check(value, rng)
+            except Exception as exc:
+                msg = f"{type(exc).__name__}: {exc}"
+                try:
+                    saved = _save_failure(kind, case_seed, encode(value), msg)
+                except Exception:
+                    saved = None
+                report.failures.append(f"{kind} seed {case_seed}: {msg}" + (f"  → {saved}" if saved else ""))
+            report.cases += 1
+        if log and (i + 1) % 100 == 0:
+            log(f"  {i + 1}/{iterations} iterations, {len(report.failures)} failure(s)")
+    return report
+
+
+# ═════════════════════════ CORPUS + BENCH ═══════════════════════
+def generate_corpus(n: int, seed: int) -> dict[str, list[bytes]]:
+    corpus: dict[str, list[bytes]] = {"jsb": [], "jsb_loose": [], "stra": [], "tac": []}
+    for i in range(n):
+        rng = random.Random(f"corpus:{seed}:{i}")
+        doc = random_doc(rng)
+        corpus["jsb"].append(encode_jsb(doc))
+        loose = bytearray()
+        encode_loose(doc, rng, loose)
+        corpus["jsb_loose"].append(bytes(loose))
+        corpus["stra"].append(encode_stra(random_stra(rng)))
+        corpus["tac"].append(encode_tac(random_tac(rng)))
+    return corpus
+
+
+def write_corpus(out: Path, n: int, seed: int) -> int:
+    out.mkdir(parents=True, exist_ok=True)
+    count = 0
+    for kind, bufs in generate_corpus(n, seed).items():
+        ext = "jsb" if kind.startswith("jsb") else kind
+        for i, buf in enumerate(bufs):
+            (out / f"{kind}_{i:05d}.{ext}").write_bytes(buf)
+            count += 1
+    return count
+
+
+def _stream_decode(buf: bytes) -> Any:
+    return _from_events(JsbReader(io.BytesIO(buf)))
+
+
+def bench(n: int, seed: int, repeat: int = 3) -> dict[str, float]:
+    """MB/s per codec on a generated corpus (stock jsb files included)."""
+    corpus = generate_corpus(n, seed)
+    jsb = corpus["jsb"] + [p.read_bytes() for p in stock_files() if p.suffix == ".jsb"]
+    docs = [decode_jsb(b) for b in jsb]
+    fast = [FastDecoder.learn(b, cache_dir=None) for b in jsb]
+    cases: dict[str, tuple[list, Callable, int]] = {
+        "decode_jsb": (jsb, decode_jsb, sum(map(len, jsb))),
+        "decode_jsb (loose)": (corpus["jsb_loose"], decode_jsb, sum(map(len, corpus["jsb_loose"]))),
+        "encode_jsb": (docs, encode_jsb, sum(map(len, jsb))),
+        "jsb_schema": (list(zip(fast, jsb)), lambda fb: fb[0].decode(fb[1]), sum(map(len, jsb))),
+        "jsb_stream": (jsb, _stream_decode, sum(map(len, jsb))),
+        "decode_stra": (corpus["stra"], decode_stra, sum(map(len, corpus["stra"]))),
+        "decode_tac": (corpus["tac"], decode_tac, sum(map(len, corpus["tac"]))),
+    }
+    out = {}
+    for name, (items, fn, size) in cases.items():
+        best = math.inf
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for x in items:
+                fn(x)
+            best = min(best, time.perf_counter() - t0)
+        out[name] = size / 1e6 / best
+    return out
+
+
+def compare_bench(now: dict[str, float], baseline: dict[str, float], tolerance: float) -> list[str]:
+    return [f"{k}: {now[k]:.1f} MB/s vs baseline {baseline[k]:.1f} MB/s"
+            for k in now if k in baseline and now[k] < baseline[k] * (1 - tolerance)]
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main(argv: list[str]) -> None:
+    ap = argparse.ArgumentParser(description="Round-trip fuzzing and throughput for .jsb/.tac/.stra codecs.")
+    ap.add_argument("-n", "--iterations", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--write-corpus", type=Path, default=None, help="only write a generated corpus")
+    ap.add_argument("--bench", action="store_true", help="also measure throughput")
+    ap.add_argument("--save-bench", type=Path, default=None, help="store throughput as a baseline")
+    ap.add_argument("--baseline", type=Path, default=None, help="fail on a throughput drop vs this file")
+    ap.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = ap.parse_args(argv)
+
+    if args.write_corpus:
+        n = write_corpus(args.write_corpus, args.iterations, args.seed)
+        print(f"✓ Wrote {n} files → {args.write_corpus}")
+        return
+
+    t0 = time.perf_counter()
+    report = run_fuzz(args.iterations, args.seed)
+    for f in report.failures[:20]:
+        print(f"⚠️  {f}")
+    print(f"{'✓' if not report.failures else '✗'} {report.cases} cases, {report.bytes / 1e6:.1f} MB, "
+          f"{len(report.failures)} failure(s) in {time.perf_counter() - t0:.1f}s")
+
+    slow: list[str] = []
+    if args.bench or args.save_bench or args.baseline:
+        speeds = bench(min(args.iterations, 200), args.seed)
+        for name, mbs in speeds.items():
+            print(f"  {name:<20} {mbs:8.1f} MB/s")
+        if args.save_bench:
+            args.save_bench.write_text(json.dumps(speeds, indent=2), "utf-8")
+        if args.baseline:
+            slow = compare_bench(speeds, json.loads(args.baseline.read_text("utf-8")), args.tolerance)
+            for s in slow:
+                print(f"⚠️  slower: {s}")
+    if report.failures or slow:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
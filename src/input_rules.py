@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+input_rules.py — declarative validation of editable inputs, batch-wide
+----------------------------------------------------------------------
+• Covers everything a build consumes: physics overrides
+  (physical_constraints.json), ratings edits (player_ratings_data.xlsx)
+  and replacement weights (weights.json).
+• Rules are plain data (RULES below, or extra ones from a JSON file):
+
+      {"id": "physics.walk_to_sprint", "input": "physics", "check": "increasing",
+       "fields": ["walk_speed", "jog_speed", "run_speed", "sprint_speed"], "strict": true}
+
+  checks   number      value is numeric (xlsx text cells, JSON strings …)
+           integer     value has no fractional part
+           range       min ≤ value ≤ max
+           increasing  fields in the given order never decrease (strict: rise)
+           pairs       "a_*" ≤ "b_*" for every shared wildcard part
+           known       field exists in the clean tree           (warning)
+           present     clean-tree field is supplied   (opt-in, e.g. for weights)
+  fields are patterns (* and ? wildcards); field names are physics keys, "<block>:<name>"
+  for ratings and jsb paths ("WEIGHTS[0].ME_VERSION.…") for weights.
+• Unedited fields take their clean-tree value, so a variant that only
+  raises run_speed is still checked against the stock sprint_speed.
+• validate_batch() lays every variant out as rows of one float matrix per
+  input kind and evaluates each rule as a single numpy expression over all
+  rows, so a sweep of thousands of variants is checked before anything is
+  copied.
+
+python input_rules.py [physics.json …] [--weights weights.json] [--rules extra.json] [--list]
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field, fields as dc_fields
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterator, NamedTuple
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from jsb_codec import load_jsb
+
+# ───────────────────────── paths ────────────────────────────────
+ROOT_DIR     = Path(__file__).resolve().parent.parent
+SIMATCH_DIR  = ROOT_DIR / "src" / "clean_simatch"
+PHYSICS_JSON = ROOT_DIR / "physical_constraints.json"
+WEIGHTS_JSON = ROOT_DIR / "weights.json"
+
+I32_MIN, I32_MAX = -(1 << 31), (1 << 31) - 1
+
+INPUTS = ("physics", "ratings", "weights")
+
+RULES: list[dict[str, Any]] = [
+    # physics ------------------------------------------------------------
+    {"id": "physics.number", "input": "physics", "check": "number"},
+    {"id": "physics.integer", "input": "physics", "check": "integer"},
+    {"id": "physics.known", "input": "physics", "check": "known", "severity": "warning"},
+    # patched as the 4-byte payload of an int tag: anything outside this
+    # range either fails to_bytes() or reads back negative in the engine
+    {"id": "physics.int32", "input": "physics", "check": "range", "min": 0, "max": I32_MAX},
+    {"id": "physics.scalers", "input": "physics", "check": "range", "fields": ["*_scaler"], "min": 1},
+    {"id": "physics.walk_to_sprint", "input": "physics", "check": "increasing", "strict": True,
+     "fields": ["very_slow_walk_speed", "slow_walk_speed", "walk_speed", "fast_walk_speed",
+                "slow_jog_speed", "jog_speed", "moderate_jog_speed", "fast_jog_speed",
+                "run_speed", "sprint_speed"]},
+    {"id": "physics.top_speeds", "input": "physics", "check": "increasing",
+     "fields": ["sprint_speed", "base_top_speed", "top_speed", "theoretical_max_running_speed"]},
+    {"id": "physics.kick_speeds", "input": "physics", "check": "increasing", "strict": True,
+     "fields": ["soft_kick_speed", "soft_to_medium_kick_speed", "medium_kick_speed",
+                "medium_to_moderate_kick_speed", "moderate_kick_speed", "quite_hard_kick_speed",
+                "hard_kick_speed", "very_hard_kick_speed"]},
+    {"id": "physics.theoretical_min_max", "input": "physics", "check": "pairs",
+     "fields": ["theoretical_min_*", "theoretical_max_*"]},
+    # ratings ------------------------------------------------------------
+    {"id": "ratings.number", "input": "ratings", "check": "number"},
+    {"id": "ratings.integer", "input": "ratings", "check": "integer"},
+    {"id": "ratings.known", "input": "ratings", "check": "known", "severity": "warning"},
+    {"id": "ratings.int32", "input": "ratings", "check": "range", "min": I32_MIN, "max": I32_MAX},
+    # weights ------------------------------------------------------------
+    {"id": "weights.number", "input": "weights", "check": "number"},
+    {"id": "weights.integer", "input": "weights", "check": "integer"},
+    {"id": "weights.known", "input": "weights", "check": "known", "severity": "warning"},
+    {"id": "weights.int32", "input": "weights", "check": "range", "min": I32_MIN, "max": I32_MAX},
+]
+
+
+# ═════════════════════════ MODEL ════════════════════════════════
+@dataclass(frozen=True)
+class Rule:
+    id: str
+    input: str
+    check: str
+    fields: tuple[str, ...] = ("*",)
+    min: float | None = None
+    max: float | None = None
+    strict: bool = False
+    severity: str = "error"
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> "Rule":
+        allowed = {f.name for f in dc_fields(cls)}
+        unknown = set(d) - allowed
+        if unknown:
+            raise ValueError(f"rule {d.get('id', '?')}: unknown keys {sorted(unknown)}")
+        rule = cls(**{**d, "fields": tuple(d.get("fields", ("*",)))})
+        if rule.input not in INPUTS:
+            raise ValueError(f"rule {rule.id}: input must be one of {INPUTS}")
+        if rule.check not in _CHECKS:
+            raise ValueError(f"rule {rule.id}: unknown check '{rule.check}'")
+        if rule.check == "pairs" and (len(rule.fields) != 2 or any(f.count("*") != 1 for f in rule.fields)):
+            raise ValueError(f"rule {rule.id}: pairs needs two patterns with one '*' each")
+        return rule
+
+
+class Issue(NamedTuple):
+    variant: str
+    rule: str
+    severity: str
+    where: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.where}: {self.message} [{self.rule}]"
+
+
+class InvalidInputs(ValueError):
+    """Raised for a variant rejected by validation; .issues lists why."""
+
+    def __init__(self, name: str, issues: list[Issue]):
+        self.name, self.issues = name, issues
+        errors = [i for i in issues if i.severity == "error"]
+        super().__init__(f"{name}: {len(errors)} invalid input value(s) – " +
+                         "; ".join(map(str, errors[:3])) + (" …" if len(errors) > 3 else ""))
+
+
+@dataclass
+class VariantInputs:
+    """Parsed edits of one variant; None = that input is left stock."""
+    name: str
+    physics: dict[str, Any] | None = None
+    ratings: dict[int, dict[str, Any]] | None = None
+    weights: Any = None
+
+
+def load_rules(extra: Path | None = None) -> list[Rule]:
+    specs = list(RULES)
+    if extra is not None:
+        specs += json.loads(Path(extra).read_text("utf-8"))
+    return [Rule.from_dict(d) for d in specs]
+
+
+# ═════════════════════════ BASELINES ════════════════════════════
+def _leaves(doc: Any, path: str = "") -> Iterator[tuple[str, Any]]:
+    if isinstance(doc, dict):
+        for k, v in doc.items():
+            yield from _leaves(v, f"{path}.{k}" if path else k)
+    elif isinstance(doc, list):
+        for i, v in enumerate(doc):
+            yield from _leaves(v, f"{path}[{i}]")
+    else:
+        yield path, doc
+
+
+@lru_cache(maxsize=None)
+def _baseline(kind: str) -> tuple[list[str], list[dict[str, Any]]]:
+    """(row labels, clean values per row) – physics has one row per version_array block."""
+    if kind == "physics":
+        blocks = load_jsb(SIMATCH_DIR / "physics" / "physical_constraints.jsb")["version_array"]
+        return ([f"version_array[{i}]" for i in range(len(blocks))],
+                [{k: v for k, v in b.items() if not isinstance(v, dict)} for b in blocks])
+    if kind == "ratings":
+        role_data = load_jsb(SIMATCH_DIR / "player_ratings_data.jsb")["values"][0]["role_data"]
+        return [""], [{f"{b}:{c['name']}": c["value"]
+                       for b, block in enumerate(role_data) for c in block["coefficients"]}]
+    if kind == "weights":
+        return [""], [dict(_leaves(load_jsb(SIMATCH_DIR / "weights.jsb")))]
+    raise ValueError(kind)
+
+
+def _edits(kind: str, inputs: VariantInputs) -> dict[str, Any] | None:
+    if kind == "physics":
+        if inputs.physics is None:
+            return None
+        return {k: v for k, v in inputs.physics.items() if not k.startswith("version_")}
+    if kind == "ratings":
+        if inputs.ratings is None:
+            return None
+        return {f"{b}:{name}": v for b, values in inputs.ratings.items() for name, v in values.items()}
+    if inputs.weights is None:
+        return None
+    return dict(_leaves(inputs.weights))
+
+
+# ═════════════════════════ BATCH MATRIX ═════════════════════════
+@dataclass
+class _Table:
+    """All rows of one input kind: rows = variants × baseline rows."""
+    fields: list[str]
+    index: dict[str, int]
+    values: np.ndarray          # float64 [R, F], NaN = non-numeric / absent
+    raw: dict[tuple[int, int], Any]     # (variant, column) → non-numeric input
+    given: np.ndarray           # bool [R, F] – supplied by the variant
+    nonnum: np.ndarray          # bool [R, F]
+    nonint: np.ndarray          # bool [R, F]
+    known: np.ndarray           # bool [F]
+    owner: np.ndarray           # int [R] – variant index
+    labels: list[str] = field(default_factory=list)
+
+
+def _numeric(v: Any) -> float | None:
+    if isinstance(v, bool) or not isinstance(v, (int, float)):
+        return None
+    return float(v)
+
+
+def _table(kind: str, batch: list[VariantInputs]) -> _Table | None:
+    edits = [(i, e) for i, e in ((i, _edits(kind, v)) for i, v in enumerate(batch)) if e is not None]
+    if not edits:
+        return None
+    labels, base = _baseline(kind)
+    names = list(base[0])
+    seen = set(names)
+    for _, e in edits:
+        for k in e:
+            if k not in seen:
+                seen.add(k)
+                names.append(k)
+    index = {k: j for j, k in enumerate(names)}
+    known = np.zeros(len(names), bool)
+    known[: len(base[0])] = True
+
+    base_row = np.full((len(base), len(names)), np.nan)
+    for r, row in enumerate(base):
+        for k, v in row.items():
+            x = _numeric(v)
+            if x is not None:
+                base_row[r, index[k]] = x
+
+    n_rows = len(edits) * len(base)
+    values = np.repeat(base_row[None], len(edits), axis=0).reshape(n_rows, len(names))
+    given = np.zeros((n_rows, len(names)), bool)
+    nonnum = np.zeros_like(given)
+    nonint = np.zeros_like(given)
+    raw: dict[tuple[int, int], Any] = {}
+    owner = np.repeat(np.array([i for i, _ in edits]), len(base))
+
+    for e_i, (i, e) in enumerate(edits):
+        rows = slice(e_i * len(base), (e_i + 1) * len(base))
+        for k, v in e.items():
+            j = index[k]
+            x = _numeric(v)
+            given[rows, j] = True
+            if x is None:
+                values[rows, j] = np.nan
+                nonnum[rows, j] = True
+                raw[(i, j)] = v
+            else:
+                values[rows, j] = x
+                nonint[rows, j] = not float(x).is_integer()
+    return _Table(names, index, values, raw, given, nonnum, nonint, known, owner,
+                  labels * len(edits))
+
+
+# ═════════════════════════ CHECKS ═══════════════════════════════
+# each returns [(row, column, message)] for the failing cells
+
+def match_field(name: str, pattern: str) -> bool:
+    """fnmatch with only * and ? as wildcards – "[0]" in jsb paths is literal."""
+    return fnmatchcase(name, pattern.replace("[", "[[]"))
+
+
+def _columns(t: _Table, patterns: tuple[str, ...]) -> np.ndarray:
+    return np.array([j for j, f in enumerate(t.fields) if any(match_field(f, p) for p in patterns)], int)
+
+
+def _fmt(x: float) -> str:
+    return str(int(x)) if np.isfinite(x) and float(x).is_integer() else repr(float(x))
+
+
+def _check_number(t: _Table, rule: Rule):
+    cols = _columns(t, rule.fields)
+    rows, js = np.nonzero(t.nonnum[:, cols])
+    return [(r, cols[j], f"not a number: {t.raw.get((int(t.owner[r]), cols[j]))!r}") for r, j in zip(rows, js)]
+
+
+def _check_integer(t: _Table, rule: Rule):
+    cols = _columns(t, rule.fields)
+    rows, js = np.nonzero(t.nonint[:, cols])
+    return [(r, cols[j], f"{_fmt(t.values[r, cols[j]])} is not a whole number") for r, j in zip(rows, js)]
+
+
+def _check_range(t: _Table, rule: Rule):
+    cols = _columns(t, rule.fields)
+    v = t.values[:, cols]
+    bad = np.zeros(v.shape, bool)
+    with np.errstate(invalid="ignore"):
+        if rule.min is not None:
+            bad |= v < rule.min
+        if rule.max is not None:
+            bad |= v > rule.max
+    lo = "-∞" if rule.min is None else _fmt(rule.min)
+    hi = "∞" if rule.max is None else _fmt(rule.max)
+    rows, js = np.nonzero(bad)
+    return [(r, cols[j], f"{_fmt(v[r, j])} outside [{lo}, {hi}]") for r, j in zip(rows, js)]
+
+
+def _check_increasing(t: _Table, rule: Rule):
+    cols = np.array([t.index[f] for f in rule.fields if f in t.index], int)
+    if len(cols) < 2:
+        return []
+    v = t.values[:, cols]
+    with np.errstate(invalid="ignore"):
+        bad = v[:, 1:] <= v[:, :-1] if rule.strict else v[:, 1:] < v[:, :-1]
+    op = ">" if rule.strict else "≥"
+    rows, js = np.nonzero(bad)
+    return [(r, cols[j + 1],
+             f"{_fmt(v[r, j + 1])} must be {op} {t.fields[cols[j]]} ({_fmt(v[r, j])})")
+            for r, j in zip(rows, js)]
+
+
+def _check_pairs(t: _Table, rule: Rule):
+    (lo_pat, hi_pat) = rule.fields
+    lo_pre, lo_suf = lo_pat.split("*")
+    hi_pre, hi_suf = hi_pat.split("*")
+    lo_cols, hi_cols = [], []
+    for j, f in enumerate(t.fields):
+        if match_field(f, lo_pat):
+            mid = f[len(lo_pre): len(f) - len(lo_suf)]
+            partner = t.index.get(hi_pre + mid + hi_suf)
+            if partner is not None:
+                lo_cols.append(j)
+                hi_cols.append(partner)
+    if not lo_cols:
+        return []
+    lo, hi = t.values[:, lo_cols], t.values[:, hi_cols]
+    with np.errstate(invalid="ignore"):
+        bad = lo > hi
+    rows, js = np.nonzero(bad)
+    return [(r, hi_cols[j], f"{_fmt(hi[r, j])} is below {t.fields[lo_cols[j]]} ({_fmt(lo[r, j])})")
+            for r, j in zip(rows, js)]
+
+
+def _check_known(t: _Table, rule: Rule):
+    cols = _columns(t, rule.fields)
+    mask = t.given[:, cols] & ~t.known[cols]
+    rows, js = np.nonzero(mask)
+    return [(r, cols[j], "not in the clean tree – ignored by the build") for r, j in zip(rows, js)]
+
+
+def _check_present(t: _Table, rule: Rule):
+    cols = _columns(t, rule.fields)
+    mask = ~t.given[:, cols] & t.known[cols]
+    rows, js = np.nonzero(mask)
+    return [(r, cols[j], "missing – the engine falls back to its built-in default") for r, j in zip(rows, js)]
+
+
+_CHECKS = {
+    "number": _check_number,
+    "integer": _check_integer,
+    "range": _check_range,
+    "increasing": _check_increasing,
+    "pairs": _check_pairs,
+    "known": _check_known,
+    "present": _check_present,
+}
+
+
+# ═════════════════════════ DRIVER ═══════════════════════════════
+def validate_batch(batch: list[VariantInputs], rules: list[Rule] | None = None) -> dict[str, list[Issue]]:
+    """Check every variant against every rule; returns {variant name: issues}."""
+    rules = load_rules() if rules is None else rules
+    issues: dict[str, list[Issue]] = {v.name: [] for v in batch}
+    for kind in INPUTS:
+        kind_rules = [r for r in rules if r.input == kind]
+        if not kind_rules:
+            continue
+        t = _table(kind, batch)
+        if t is None:
+            continue
+        for rule in kind_rules:
+            reported: set[tuple[int, int, str]] = set()
+            for r, j, msg in _CHECKS[rule.check](t, rule):
+                owner = int(t.owner[r])
+                if (owner, j, msg) in reported:       # same failure in another physics block
+                    continue
+                reported.add((owner, j, msg))
+                where = f"{kind}.{t.fields[j]}"
+                if t.labels[r] and rule.check in ("range", "increasing", "pairs"):
+                    where += f" ({t.labels[r]})"
+                name = batch[owner].name
+                issues[name].append(Issue(name, rule.id, rule.severity, where, msg))
+    return issues
+
+
+def has_errors(issues: list[Issue]) -> bool:
+    return any(i.severity == "error" for i in issues)
+
+
+def require_valid(inputs: VariantInputs, rules: list[Rule] | None = None) -> list[Issue]:
+    """Validate one variant; raise InvalidInputs on errors, return the warnings."""
+    found = validate_batch([inputs], rules)[inputs.name]
+    if has_errors(found):
+        raise InvalidInputs(inputs.name, found)
+    return found
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main(argv: list[str]) -> None:
+    ap = argparse.ArgumentParser(description="Validate physics / weights inputs before a build.")
+    ap.add_argument("physics", nargs="*", type=Path, help="physical_constraints.json files (one variant each)")
+    ap.add_argument("--weights", type=Path, default=None)
+    ap.add_argument("--rules", type=Path, default=None, help="JSON list of extra rules")
+    ap.add_argument("--list", action="store_true", help="print the active rules and exit")
+    args = ap.parse_args(argv)
+
+    rules = load_rules(args.rules)
+    if args.list:
+        for r in rules:
+            print(f"{r.id:<30} {r.severity:<8} {r.check:<11} {', '.join(r.fields)}")
+        return
+
+    physics_files = args.physics or ([PHYSICS_JSON] if PHYSICS_JSON.exists() else [])
+    weights_file = args.weights or (WEIGHTS_JSON if WEIGHTS_JSON.exists() else None)
+    weights = json.loads(weights_file.read_text("utf-8")) if weights_file else None
+    batch = [VariantInputs(str(p), json.loads(p.read_text("utf-8")), None, weights)
+             for p in physics_files] or [VariantInputs(str(weights_file), weights=weights)]
+
+    results = validate_batch(batch, rules)
+    bad = 0
+    for name, found in results.items():
+        for issue in found:
+            print(f"{'⚠️ ' if issue.severity == 'warning' else '✗ '} {name}: {issue}")
+        bad += has_errors(found)
+    if bad:
+        sys.exit(f"⚠️  {bad}/{len(results)} input set(s) rejected")
+    print(f"✓ {len(results)} input set(s) valid ({len(rules)} rules)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+jsb_codec.py — generic SI *.jsb  ⇄  Python objects
+---------------------------------------------------
+• Walks the whole tagged tree instead of hard-seeking to offsets, so it
+  works on any stock or modded .jsb (momentum, physics, weights, ratings,
+  QME, xG coefficient files).
+• decode_jsb(buf)  → dict / list / int / float / str
+• encode_jsb(obj)  → bytes (byte-identical for every stock file)
+
+Tag byte  =  (n << 4) | type     — n is a small inline payload
+
+    type 0x2  INT      n = 0   → INT32 follows (4 bytes, little-endian)
+                       n ≥ 1   → inline value n - 8   (-7 … 7)
+    type 0x3  INT64    8 bytes
+    type 0x4  UINT32   4 bytes  (role bit-masks above 2^31)
+    type 0x5  UINT64   8 bytes  (role bit-masks above 2^32)
+    type 0x7  DOUBLE   n = 0   → 8-byte IEEE-754 follows
+                       n = 1   → 0.0,  n = 2 → 0.5   (only ones seen so far)
+    type 0x8  STRING   n = 0   → u32 length + UTF-8,  else length n - 1
+    type 0x9  ARRAY    n = 0   → u32 count,           else count  n - 1
+    type 0xA  OBJECT   n = 0   → u32 count,           else count  n - 1
+                       each member: 1-byte key length + key text + value
+
+The "prefix 0x2A/4A/5A/6A ➜ next byte = length" rule in the ratings
+quick-spec is simply an OBJECT tag followed by its first key.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Any
+import json
+import math
+import struct
+import sys
+
+# ───────────────────────── tag constants ────────────────────────
+T_INT = 0x2
+T_INT64 = 0x3
+T_UINT32 = 0x4
+T_UINT64 = 0x5
+T_DOUBLE = 0x7
+T_STRING = 0x8
+T_ARRAY = 0x9
+T_OBJECT = 0xA
+
+_I32 = struct.Struct("<i")
+_I64 = struct.Struct("<q")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_F64 = struct.Struct("<d")
+
+INLINE_INT_MIN, INLINE_INT_MAX = -7, 7
+INLINE_DOUBLES: dict[int, float] = {1: 0.0, 2: 0.5}
+_DOUBLE_TO_NIBBLE = {v: n for n, v in INLINE_DOUBLES.items()}
+
+
+# ═════════════════════════ DECODER ══════════════════════════════
+def _count(buf: bytes, pos: int, n: int) -> tuple[int, int]:
+    """Return (length/count, cursor) for STRING/ARRAY/OBJECT headers."""
+    if n:
+        return n - 1, pos
+    return _U32.unpack_from(buf, pos)[0], pos + 4
+
+
+def decode_value(buf: bytes, pos: int = 0) -> tuple[Any, int]:
+    """Decode the value whose tag byte is at *pos*. Returns (value, cursor)."""
+    tag = buf[pos]
+    typ, n = tag & 0x0F, tag >> 4
+    pos += 1
+
+    if typ == T_INT:
+        if n:
+            return n - 8, pos
+        return _I32.unpack_from(buf, pos)[0], pos + 4
+    if typ == T_OBJECT:
+        count, pos = _count(buf, pos, n)
+        out: dict[str, Any] = {}
+        for _ in range(count):
+            klen = buf[pos]
+            key = buf[pos + 1 : pos + 1 + klen].decode("utf-8")
+            out[key], pos = decode_value(buf, pos + 1 + klen)
+        return out, pos
+    if typ == T_STRING:
+        slen, pos = _count(buf, pos, n)
+        return buf[pos : pos + slen].decode("utf-8"), pos + slen
+    if typ == T_ARRAY:
+        count, pos = _count(buf, pos, n)
+        items = []
+        for _ in range(count):
+            item, pos = decode_value(buf, pos)
+            items.append(item)
+        return items, pos
+    if typ == T_DOUBLE:
+        if n:
+            if n not in INLINE_DOUBLES:
+                raise ValueError(f"unknown inline double 0x{tag:02X} at 0x{pos - 1:08X}")
+            return INLINE_DOUBLES[n], pos
+        return _F64.unpack_from(buf, pos)[0], pos + 8
+    if typ == T_INT64:
+        return _I64.unpack_from(buf, pos)[0], pos + 8
+    if typ == T_UINT32:
+        return _U32.unpack_from(buf, pos)[0], pos + 4
+    if typ == T_UINT64:
+        return _U64.unpack_from(buf, pos)[0], pos + 8
+
+    raise ValueError(f"unknown tag 0x{tag:02X} at 0x{pos - 1:08X}")
+
+
+def decode_jsb(buf: bytes) -> Any:
+    """Decode a complete .jsb buffer; trailing bytes are an error."""
+    value, end = decode_value(buf, 0)
+    if end != len(buf):
+        raise ValueError(f"{len(buf) - end} trailing byte(s) after 0x{end:08X}")
+    return value
+
+
+def load_jsb(path: Path) -> Any:
+    return decode_jsb(Path(path).read_bytes())
+
+
+# ═════════════════════════ ENCODER ══════════════════════════════
+def _header(out: bytearray, typ: int, count: int) -> None:
+    if count < 15:
+        out.append(((count + 1) << 4) | typ)
+    else:
+        out.append(typ)
+        out += _U32.pack(count)
+
+
+def encode_value(value: Any, out: bytearray) -> None:
+    """Append the tagged encoding of *value* to *out*."""
+    if isinstance(value, bool):
+        raise TypeError("bool has no known .jsb encoding")
+    if isinstance(value, int):
+        if INLINE_INT_MIN <= value <= INLINE_INT_MAX:
+            out.append(((value + 8) << 4) | T_INT)
+        elif -(1 << 31) <= value < (1 << 31):
+            out.append(T_INT)
+            out += _I32.pack(value)
+        elif 0 <= value < (1 << 32):
+            out.append(T_UINT32)
+            out += _U32.pack(value)
+        elif 0 <= value < (1 << 64):
+            out.append(T_UINT64)
+            out += _U64.pack(value)
+        else:
+            out.append(T_INT64)
+            out += _I64.pack(value)
+    elif isinstance(value, float):
+        nib = _DOUBLE_TO_NIBBLE.get(value)
+        if nib is not None and math.copysign(1.0, value) > 0:
+            out.append((nib << 4) | T_DOUBLE)
+        else:
+            out.append(T_DOUBLE)
+            out += _F64.pack(value)
+    elif isinstance(value, str):
+        raw = value.encode("utf-8")
+        _header(out, T_STRING, len(raw))
+        out += raw
+    elif isinstance(value, dict):
+        _header(out, T_OBJECT, len(value))
+        for key, item in value.items():
+            kraw = key.encode("utf-8")
+            if len(kraw) > 0xFF:
+                raise ValueError(f"key too long for .jsb: {key!r}")
+            out.append(len(kraw))
+            out += kraw
+            encode_value(item, out)
+    elif isinstance(value, (list, tuple)):
+        _header(out, T_ARRAY, len(value))
+        for item in value:
+            encode_value(item, out)
+    else:
+        raise TypeError(f"cannot encode {type(value).__name__} as .jsb")
+
+
+def encode_jsb(value: Any) -> bytes:
+    out = bytearray()
+    encode_value(value, out)
+    return bytes(out)
+
+
+def dump_jsb(value: Any, path: Path) -> None:
+    Path(path).write_bytes(encode_jsb(value))
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main(argv: list[str]) -> None:
+    """python jsb_codec.py <file.jsb> [out.json]  — dump any .jsb as JSON."""
+    if not argv:
+        sys.exit("usage: jsb_codec.py <file.jsb> [out.json]")
+    src = Path(argv[0])
+    doc = load_jsb(src)
+    text = json.dumps(doc, indent=2, ensure_ascii=False)
+    if len(argv) > 1:
+        Path(argv[1]).write_text(text, "utf-8")
+        print(f"✓ Decoded {src.name} → {argv[1]}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+jsb_patch.py — path-addressed in-place edits for any *.jsb
+----------------------------------------------------------
+• patch(buf, {"values[2].role_data[14].coefficients[7].value": 120, …})
+  rewrites only the bytes of the addressed values; everything between them
+  is copied through untouched, so a few hundred edits on the 500 KB
+  ratings file never re-serialise the document.
+• Paths use the tree_diff / jsb_stream form ("a.b[3].c") or a JSON pointer
+  ("/a/b/3/c" – the only way to reach keys that contain "." or "[").
+• A structural index (path → byte span of every scalar, count of every
+  container, member names of every object) is built in one walk and cached by content hash.  The
+  patched buffer inherits its parent's index with the spans shifted, so a
+  chain of patches never re-walks the file.
+• New values are encoded canonically (same bytes encode_jsb would write)
+  and keep the slot's kind: int slots take ints (or integral floats),
+  double slots take numbers, string slots take str.  A value whose
+  encoding is wider or narrower than the old one just shifts the rest –
+  JSB containers store counts, not byte lengths, so nothing else changes.
+
+python jsb_patch.py <file.jsb> <path>=<value> … [-o out.jsb]
+python jsb_patch.py <file.jsb> --get <path> …
+"""
+
+from __future__ import annotations
+from bisect import bisect_right
+from collections import OrderedDict
+from itertools import accumulate
+from pathlib import Path
+from typing import Any, Iterator, Mapping
+import argparse
+import hashlib
+import json
+import sys
+
+from jsb_codec import (
+    T_ARRAY, T_DOUBLE, T_INT, T_INT64, T_OBJECT, T_STRING, T_UINT32, T_UINT64,
+    decode_value, encode_value,
+)
+from jsb_stream import compile_pattern, format_path
+
+INDEX_CACHE_SIZE = 16
+
+_KIND = {T_INT: "int", T_INT64: "int", T_UINT32: "int", T_UINT64: "int",
+         T_DOUBLE: "float", T_STRING: "str"}
+_FIXED = {T_INT64: 8, T_UINT32: 4, T_UINT64: 8}
+
+Parts = tuple  # tuple[str | int, ...]
+
+
+class PatchError(ValueError):
+    """An edit that cannot be applied: unknown path, container target or wrong kind."""
+
+
+# ═════════════════════════ PATHS ════════════════════════════════
+def parse_path(path: str | Parts) -> Parts:
+    """'a.b[3].c' or '/a/b/3/c' → ("a", "b", 3, "c")."""
+    if isinstance(path, tuple):
+        return path
+    if path.startswith("/"):
+        toks = [t.replace("~1", "/").replace("~0", "~") for t in path[1:].split("/")]
+        return tuple(int(t) if t.isdigit() else t for t in toks)
+    parts = []
+    for _, label in compile_pattern(path):
+        if label is None:
+            raise PatchError(f"{path}: wildcards are not allowed in a patch path")
+        parts.append(label)
+    return tuple(parts)
+
+
+# ═════════════════════════ INDEX ════════════════════════════════
+class JsbIndex:
+    """Byte span + kind of every scalar and the shape of every container in one buffer."""
+
+    __slots__ = ("leaves", "containers", "keys", "size")
+
+    def __init__(self, leaves: dict[Parts, tuple[int, int, str]], containers: dict[Parts, int],
+                 keys: dict[Parts, list[str]], size: int):
+        self.leaves = leaves                  # parts → (start, end, kind)
+        self.containers = containers          # parts → element count
+        self.keys = keys                      # object parts → member names
+        self.size = size
+
+    @classmethod
+    def build(cls, buf: bytes | memoryview) -> "JsbIndex":
+        leaves: dict[Parts, tuple[int, int, str]] = {}
+        containers: dict[Parts, int] = {}
+        keys: dict[Parts, list[str]] = {}
+
+        def walk(pos: int, parts: Parts) -> int:
+            tag = buf[pos]
+            typ, n = tag & 0x0F, tag >> 4
+            start, pos = pos, pos + 1
+            if typ == T_OBJECT or typ == T_ARRAY:
+                if n:
+                    count = n - 1
+                else:
+                    count = int.from_bytes(buf[pos:pos + 4], "little")
+                    pos += 4
+                containers[parts] = count
+                names: list[str] | None = None
+                if typ == T_OBJECT:
+                    names = keys[parts] = []
+                for i in range(count):
+                    if names is not None:
+                        klen = buf[pos]
+                        label: str | int = bytes(buf[pos + 1:pos + 1 + klen]).decode("utf-8")
+                        names.append(label)
+                        pos += 1 + klen
+                    else:
+                        label = i
+                    pos = walk(pos, parts + (label,))
+                return pos
+            if typ == T_STRING:
+                if n:
+                    pos += n - 1
+                else:
+                    pos += 4 + int.from_bytes(buf[pos:pos + 4], "little")
+            elif typ == T_INT or typ == T_DOUBLE:
+                if not n:
+                    pos += 4 if typ == T_INT else 8
+            elif typ in _FIXED:
+                pos += _FIXED[typ]
+            else:
+                raise ValueError(f"unknown tag 0x{tag:02X} at 0x{start:08X}")
+            leaves[parts] = (start, pos, _KIND[typ])
+            return pos
+
+        end = walk(0, ())
+        if end != len(buf):
+            raise ValueError(f"{len(buf) - end} trailing byte(s) after 0x{end:08X}")
+        return cls(leaves, containers, keys, len(buf))
+
+    def shifted(self, spans: list[tuple[int, int, bytes]]) -> "JsbIndex":
+        """Index of the buffer produced by splicing *spans* (sorted, non-overlapping)."""
+        starts = [s for s, _, _ in spans]
+        deltas = list(accumulate(len(raw) - (e - s) for s, e, raw in spans))
+        replaced = {s: s + d - (len(raw) - (e - s)) for (s, e, raw), d in zip(spans, deltas)}
+        leaves = {}
+        for parts, (s, e, kind) in self.leaves.items():
+            i = bisect_right(starts, s)
+            if i and starts[i - 1] == s:               # an edited slot: new span length
+                ns = replaced[s]
+                leaves[parts] = (ns, ns + len(spans[i - 1][2]), kind)
+            else:
+                d = deltas[i - 1] if i else 0
+                leaves[parts] = (s + d, e + d, kind)
+        return JsbIndex(leaves, self.containers, self.keys, self.size + (deltas[-1] if deltas else 0))
+
+    # ---- lookups ------------------------------------------------------
+    def span(self, path: str | Parts) -> tuple[int, int, str]:
+        parts = parse_path(path)
+        hit = self.leaves.get(parts)
+        if hit is None and isinstance(path, str) and path.startswith("/"):
+            hit = self.leaves.get(tuple(str(p) for p in parts))   # numeric object keys
+        if hit is None:
+            what = "a container, not a value" if parts in self.containers else "not in this file"
+            raise PatchError(f"{path if isinstance(path, str) else format_path(list(path))}: {what}")
+        return hit
+
+    def count(self, path: str | Parts) -> int:
+        return self.containers[parse_path(path)]
+
+    def children(self, parts: Parts) -> list[str] | range:
+        """Member names of an object, indexes of an array, nothing for a scalar."""
+        if parts in self.keys:
+            return self.keys[parts]
+        return range(self.containers.get(parts, 0))
+
+    def __contains__(self, path: str | Parts) -> bool:
+        return parse_path(path) in self.leaves
+
+    def __iter__(self) -> Iterator[Parts]:
+        return iter(self.leaves)
+
+    def __len__(self) -> int:
+        return len(self.leaves)
+
+
+_INDEXES: OrderedDict[bytes, JsbIndex | tuple[bytes, list]] = OrderedDict()
+
+
+def _digest(buf: bytes | memoryview) -> bytes:
+    return hashlib.blake2b(buf, digest_size=16).digest()
+
+
+def _cached(key: bytes) -> JsbIndex | None:
+    entry = _INDEXES.get(key)
+    if isinstance(entry, tuple):                        # a patched child: shift lazily
+        parent, spans = entry
+        base = _cached(parent)
+        entry = base.shifted(spans) if base is not None else None
+    return entry
+
+
+def index_for(buf: bytes | memoryview) -> JsbIndex:
+    """Cached JsbIndex for *buf* (keyed by content hash)."""
+    key = _digest(buf)
+    entry = _cached(key)
+    if entry is None:
+        entry = JsbIndex.build(buf)
+    _INDEXES[key] = entry
+    _INDEXES.move_to_end(key)
+    while len(_INDEXES) > INDEX_CACHE_SIZE:
+        _INDEXES.popitem(last=False)
+    return entry
+
+
+# ═════════════════════════ PATCH ════════════════════════════════
+def _coerce(path: str, kind: str, value: Any) -> Any:
+    if kind == "int":
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    elif kind == "float":
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    elif isinstance(value, str):
+        return value
+    raise PatchError(f"{path}: {kind} slot cannot hold {value!r}")
+
+
+def patch(buf: bytes | memoryview, edits: Mapping[str | Parts, Any],
+          index: JsbIndex | None = None) -> bytes:
+    """Return *buf* with every edited scalar rewritten in place."""
+    idx = index or index_for(buf)
+    spans: dict[int, tuple[int, int, bytes]] = {}
+    for path, value in edits.items():
+        start, end, kind = idx.span(path)
+        raw = bytearray()
+        encode_value(_coerce(str(path), kind, value), raw)
+        spans[start] = (start, end, bytes(raw))
+    if not spans:
+        return bytes(buf)
+
+    ordered = sorted(spans.values())
+    out = bytearray()
+    pos = 0
+    for start, end, raw in ordered:
+        out += buf[pos:start]
+        out += raw
+        pos = end
+    out += buf[pos:]
+    out = bytes(out)
+
+    if index is None:                                   # let the next patch find its index
+        _INDEXES[_digest(out)] = (_digest(buf), ordered)
+    return out
+
+
+def get(buf: bytes | memoryview, path: str | Parts, index: JsbIndex | None = None) -> Any:
+    """Decode just the scalar at *path*."""
+    start, end, _ = (index or index_for(buf)).span(path)
+    return decode_value(bytes(buf[start:end]))[0]
+
+
+def patch_file(path: Path, edits: Mapping[str | Parts, Any], out: Path | None = None) -> int:
+    """Patch *path* (or write the result to *out*); returns the number of edits."""
+    path = Path(path)
+    data = patch(path.read_bytes(), edits)
+    Path(out or path).write_bytes(data)
+    return len(edits)
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def _cli_value(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
+
+
+def main(argv: list[str]) -> None:
+    ap = argparse.ArgumentParser(description="Patch scalar values of a .jsb file in place.")
+    ap.add_argument("file", type=Path)
+    ap.add_argument("edits", nargs="*", help='path=value, e.g. "values[0].start_value=100"')
+    ap.add_argument("--get", action="append", default=[], metavar="PATH")
+    ap.add_argument("-o", "--out", type=Path, default=None, help="write here instead of in place")
+    args = ap.parse_intermixed_args(argv)
+
+    buf = args.file.read_bytes()
+    try:
+        for p in args.get:
+            print(f"{p} = {json.dumps(get(buf, p), ensure_ascii=False)}")
+        if not args.edits:
+            return
+        edits = {}
+        for e in args.edits:
+            path, sep, value = e.rpartition("=")
+            if not sep:
+                sys.exit(f"not a path=value edit: {e!r}")
+            edits[path] = _cli_value(value)
+        data = patch(buf, edits)
+    except PatchError as exc:
+        sys.exit(f"⛔ {exc}")
+    (args.out or args.file).write_bytes(data)
+    print(f"✓ {len(edits)} edit(s), {len(buf):,} → {len(data):,} bytes → {args.out or args.file}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
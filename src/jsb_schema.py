@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+jsb_schema.py — learn a .jsb file's shape once, then decode it with
+generated straight-line code
+--------------------------------------------------------------------
+• infer_schema(doc) reduces a decoded tree to its shape:
+      "i" int   "f" float   "n" int-or-float   "s" string   "?" anything
+      ["obj", [[key, schema], …]]          fixed keys, fixed order
+      ["arr", item]                         any length, one item shape
+      ["tup", [schema, …]]                  fixed length, mixed shapes
+• generate_source(schema) emits a Python module: one function per
+  distinct container shape, key bytes checked with precompiled constants,
+  ints/doubles read through precompiled struct.Struct objects and leaf
+  objects (e.g. {name, value} coefficients) inlined into their array loop.
+• compile_decoder(schema) caches the compiled module per schema hash in
+  memory.  The source is always regenerated from the schema (well under a
+  millisecond); the copy under .jsb_schema_cache/ is only written for
+  tracebacks and reading, and is never executed from disk.
+• FastDecoder.decode() runs the generated code and falls back to the
+  generic jsb_codec.decode_jsb() whenever a shape check fails, so the
+  result is always identical to decode_jsb().
+
+python jsb_schema.py <file.jsb> [repeat]   → schema hash, codegen, benchmark
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Callable
+import hashlib
+import json
+import struct
+import sys
+import time
+
+from jsb_codec import T_ARRAY, T_OBJECT, decode_jsb, decode_value
+
+# ───────────────────────── paths ────────────────────────────────
+ROOT_DIR     = Path(__file__).resolve().parent.parent
+SCHEMA_CACHE = ROOT_DIR / ".jsb_schema_cache"
+
+CODEGEN_VERSION = 2
+INLINE_LEAF_KEYS = 8        # leaf objects up to this size are inlined
+
+
+class ShapeMismatch(ValueError):
+    """The buffer does not have the shape the decoder was generated for."""
+
+
+# ═════════════════════════ INFERENCE ════════════════════════════
+def infer_schema(doc: Any) -> Any:
+    if isinstance(doc, bool):
+        raise TypeError("bool has no .jsb encoding")
+    if isinstance(doc, int):
+        return "i"
+    if isinstance(doc, float):
+        return "f"
+    if isinstance(doc, str):
+        return "s"
+    if isinstance(doc, dict):
+        return ["obj", [[k, infer_schema(v)] for k, v in doc.items()]]
+    if isinstance(doc, list):
+        items = [infer_schema(v) for v in doc]
+        if not items:
+            return ["arr", None]
+        merged = items[0]
+        for it in items[1:]:
+            merged = _unify(merged, it)
+            if merged is None:
+                return ["tup", items]
+        return ["arr", merged]
+    raise TypeError(f"cannot infer schema for {type(doc).__name__}")
+
+
+def _unify(a: Any, b: Any) -> Any:
+    """One shape covering both *a* and *b*, or None if they are incompatible."""
+    if a == b:
+        return a
+    if a == "?" or b == "?":
+        return "?"
+    if a in ("i", "f", "n") and b in ("i", "f", "n"):
+        return "n"
+    if not (isinstance(a, list) and isinstance(b, list)):
+        return None
+    if a[0] == "obj" and b[0] == "obj":
+        if [k for k, _ in a[1]] != [k for k, _ in b[1]]:
+            return None
+        members = []
+        for (k, sa), (_, sb) in zip(a[1], b[1]):
+            m = _unify(sa, sb)
+            members.append([k, "?" if m is None else m])    # one odd member → generic
+        return ["obj", members]
+    # arrays: collapse both sides to one item shape
+    items_a = a[1] if a[0] == "tup" else [a[1]] if a[0] == "arr" else None
+    items_b = b[1] if b[0] == "tup" else [b[1]] if b[0] == "arr" else None
+    if items_a is None or items_b is None:
+        return None
+    known = [s for s in items_a + items_b if s is not None]
+    if not known:
+        return ["arr", None]
+    merged = known[0]
+    for s in known[1:]:
+        merged = _unify(merged, s)
+        if merged is None:
+            return None
+    return ["arr", merged]
+
+
+def schema_hash(schema: Any) -> str:
+    text = json.dumps([CODEGEN_VERSION, schema], separators=(",", ":"))
+    return hashlib.blake2b(text.encode(), digest_size=12).hexdigest()
+
+
+# ═════════════════════════ CODEGEN ══════════════════════════════
+def _header(typ: int, count: int) -> bytes:
+    if count < 15:
+        return bytes((((count + 1) << 4) | typ,))
+    return bytes((typ,)) + struct.pack("<I", count)
+
+
+def _is_leaf_object(schema: Any) -> bool:
+    return (isinstance(schema, list) and schema[0] == "obj"
+            and len(schema[1]) <= INLINE_LEAF_KEYS
+            and all(isinstance(s, str) for _, s in schema[1]))
+
+
+class _Gen:
+    def __init__(self) -> None:
+        self.consts: dict[bytes, str] = {}
+        self.funcs: dict[str, list[str]] = {}
+        self.n = 0
+
+    def var(self, prefix: str = "v") -> str:
+        self.n += 1
+        return f"{prefix}{self.n}"
+
+    def const(self, raw: bytes) -> str:
+        if raw not in self.consts:
+            self.consts[raw] = f"K{len(self.consts)}"
+        return self.consts[raw]
+
+    # ---- value emitters: append lines that leave the value in *out* ----
+    def value(self, schema: Any, out: str, ind: str, lines: list[str]) -> None:
+        if schema == "i":
+            lines += [
+                f"{ind}t = buf[p]",
+                f"{ind}if t == 0x02:",
+                f"{ind}    {out} = I32(buf, p + 1)[0]; p += 5",
+                f"{ind}elif t & 15 == 2:",
+                f"{ind}    {out} = (t >> 4) - 8; p += 1",
+                f"{ind}else:",
+                f"{ind}    {out}, p = _wide_int(buf, p)",
+            ]
+        elif schema == "f":
+            lines += [
+                f"{ind}t = buf[p]",
+                f"{ind}if t == 0x07:",
+                f"{ind}    {out} = F64(buf, p + 1)[0]; p += 9",
+                f"{ind}elif t == 0x17:",
+                f"{ind}    {out} = 0.0; p += 1",
+                f"{ind}elif t == 0x27:",
+                f"{ind}    {out} = 0.5; p += 1",
+                f"{ind}else:",
+                f"{ind}    raise ShapeMismatch(p)",
+            ]
+        elif schema == "n":
+            lines += [
+                f"{ind}t = buf[p]",
+                f"{ind}if t == 0x02:",
+                f"{ind}    {out} = I32(buf, p + 1)[0]; p += 5",
+                f"{ind}elif t & 15 == 2:",
+                f"{ind}    {out} = (t >> 4) - 8; p += 1",
+                f"{ind}elif t == 0x07:",
+                f"{ind}    {out} = F64(buf, p + 1)[0]; p += 9",
+                f"{ind}elif t == 0x17:",
+                f"{ind}    {out} = 0.0; p += 1",
+                f"{ind}elif t == 0x27:",
+                f"{ind}    {out} = 0.5; p += 1",
+                f"{ind}else:",
+                f"{ind}    {out}, p = _wide_int(buf, p)",
+            ]
+        elif schema == "s":
+            lines += [
+                f"{ind}t = buf[p]",
+                f"{ind}if t & 15 != 8:",
+                f"{ind}    raise ShapeMismatch(p)",
+                f"{ind}if t > 15:",
+                f"{ind}    n = (t >> 4) - 1; p += 1",
+                f"{ind}else:",
+                f"{ind}    n = U32(buf, p + 1)[0]; p += 5",
+                f"{ind}{out} = buf[p:p + n].decode(); p += n",
+            ]
+        elif schema is None or schema == "?":
+            lines.append(f"{ind}{out}, p = decode_value(buf, p)")
+        elif _is_leaf_object(schema):
+            self.object_body(schema, out, ind, lines)
+        else:
+            lines.append(f"{ind}{out}, p = {self.function(schema)}(buf, p)")
+
+    def object_body(self, schema: Any, out: str, ind: str, lines: list[str]) -> None:
+        members = schema[1]
+        prefix = _header(T_OBJECT, len(members))
+        names = []
+        for i, (key, sub) in enumerate(members):
+            kraw = key.encode("utf-8")
+            raw = (prefix if i == 0 else b"") + bytes((len(kraw),)) + kraw
+            k = self.const(raw)
+            lines += [
+                f"{ind}if not at({k}, p):",
+                f"{ind}    raise ShapeMismatch(p)",
+                f"{ind}p += {len(raw)}",
+            ]
+            name = self.var()
+            self.value(sub, name, ind, lines)
+            names.append((key, name))
+        if not members:
+            k = self.const(prefix)
+            lines += [f"{ind}if not at({k}, p):",
+                      f"{ind}    raise ShapeMismatch(p)",
+                      f"{ind}p += {len(prefix)}"]
+        body = ", ".join(f"{key!r}: {name}" for key, name in names)
+        lines.append(f"{ind}{out} = {{{body}}}")
+
+    def function(self, schema: Any) -> str:
+        fname = f"_d_{schema_hash(schema)}"
+        if fname in self.funcs:
+            return fname
+        self.funcs[fname] = []                      # reserve (recursion guard)
+        lines = [f"def {fname}(buf, p):"]
+        ind = "    "
+        lines.append(f"{ind}at = buf.startswith")
+        kind = schema[0]
+        if kind == "obj":
+            self.object_body(schema, "out", ind, lines)
+        elif kind == "tup":
+            items = schema[1]
+            head = _header(T_ARRAY, len(items))
+            k = self.const(head)
+            lines += [f"{ind}if not at({k}, p):",
+                      f"{ind}    raise ShapeMismatch(p)",
+                      f"{ind}p += {len(head)}"]
+            names = []
+            for sub in items:
+                name = self.var()
+                self.value(sub, name, ind, lines)
+                names.append(name)
+            lines.append(f"{ind}out = [{', '.join(names)}]")
+        else:                                       # "arr"
+            item = self.var("it")
+            lines += [
+                f"{ind}t = buf[p]",
+                f"{ind}if t & 15 != {T_ARRAY}:",
+                f"{ind}    raise ShapeMismatch(p)",
+                f"{ind}if t > 15:",
+                f"{ind}    n = (t >> 4) - 1; p += 1",
+                f"{ind}else:",
+                f"{ind}    n = U32(buf, p + 1)[0]; p += 5",
+                f"{ind}out = []",
+                f"{ind}add = out.append",
+                f"{ind}for _ in range(n):",
+            ]
+            self.value(schema[1], item, ind + "    ", lines)
+            lines.append(f"{ind}    add({item})")
+        lines.append(f"{ind}return out, p")
+        self.funcs[fname] = lines
+        return fname
+
+
+def generate_source(schema: Any) -> str:
+    gen = _Gen()
+    body: list[str] = []
+    gen.value(schema, "out", "    ", body)
+    funcs = "\n\n".join("\n".join(lines) for lines in gen.funcs.values())
+    consts = "\n".join(f"{name} = {raw!r}" for raw, name in gen.consts.items())
+    return f'''# generated by jsb_schema.py – schema {schema_hash(schema)}
+{consts}
+
+
+{funcs}
+
+
+def decode(buf):
+    p = 0
+    at = buf.startswith
+{chr(10).join(body)}
+    if p != len(buf):
+        raise ShapeMismatch(p)
+    return out
+'''
+
+
+# ═════════════════════════ RUNTIME ══════════════════════════════
+def _wide_int(buf: bytes, p: int) -> tuple[int, int]:
+    typ = buf[p] & 0x0F
+    if typ in (0x3, 0x4, 0x5):                       # i64 / u32 / u64
+        return decode_value(buf, p)
+    raise ShapeMismatch(p)
+
+
+_RUNTIME = {
+    "I32": struct.Struct("<i").unpack_from,
+    "U32": struct.Struct("<I").unpack_from,
+    "F64": struct.Struct("<d").unpack_from,
+    "ShapeMismatch": ShapeMismatch,
+    "decode_value": decode_value,
+    "_wide_int": _wide_int,
+}
+
+_COMPILED: dict[str, Callable[[bytes], Any]] = {}
+
+
+def compile_decoder(schema: Any, cache_dir: Path | None = SCHEMA_CACHE) -> Callable[[bytes], Any]:
+    """Generated decode(buf) for *schema*, cached per schema hash."""
+    h = schema_hash(schema)
+    if h in _COMPILED:
+        return _COMPILED[h]
+    source = generate_source(schema)                 # never exec what happens to be on disk
+    src_path = Path(cache_dir) / f"{h}.py" if cache_dir else None
+    if src_path is not None and (not src_path.exists() or src_path.read_text("utf-8") != source):
+        src_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = src_path.with_suffix(".tmp")
+        tmp.write_text(source, "utf-8")
+        tmp.replace(src_path)                        # stale / edited copies are overwritten
+    namespace = dict(_RUNTIME)
+    exec(compile(source, str(src_path or f"<jsb schema {h}>"), "exec"), namespace)
+    _COMPILED[h] = namespace["decode"]
+    return _COMPILED[h]
+
+
+class FastDecoder:
+    """Decode same-shaped files with generated code; fall back on any mismatch."""
+
+    def __init__(self, schema: Any, cache_dir: Path | None = SCHEMA_CACHE):
+        self.schema = schema
+        self.hash = schema_hash(schema)
+        self._decode = compile_decoder(schema, cache_dir)
+        self.fast = self.fallback = 0
+
+    @classmethod
+    def learn(cls, sample: bytes, cache_dir: Path | None = SCHEMA_CACHE) -> "FastDecoder":
+        return cls(infer_schema(decode_jsb(sample)), cache_dir)
+
+    def decode(self, buf: bytes) -> Any:
+        try:
+            doc = self._decode(buf)
+            self.fast += 1
+            return doc
+        except (ShapeMismatch, IndexError, struct.error, UnicodeDecodeError):
+            self.fallback += 1
+            return decode_jsb(buf)
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main(argv: list[str]) -> None:
+    if not argv:
+        sys.exit("usage: jsb_schema.py <file.jsb> [repeat]")
+    path = Path(argv[0])
+    repeat = int(argv[1]) if len(argv) > 1 else 20
+    buf = path.read_bytes()
+
+    t0 = time.perf_counter()
+    fast = FastDecoder.learn(buf)
+    learn_s = time.perf_counter() - t0
+    if fast.decode(buf) != decode_jsb(buf) or fast.fallback:
+        sys.exit("⚠️  generated decoder disagrees with decode_jsb()")
+
+    def bench(fn) -> float:
+        t = time.perf_counter()
+        for _ in range(repeat):
+            fn(buf)
+        return (time.perf_counter() - t) / repeat
+
+    generic, compiled = bench(decode_jsb), bench(fast.decode)
+    print(f"✓ {path.name}: schema {fast.hash} (learned + compiled in {learn_s * 1000:.1f} ms)")
+    print(f"  generic  {generic * 1000:8.2f} ms")
+    print(f"  compiled {compiled * 1000:8.2f} ms   ×{generic / compiled:.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+jsb_stream.py — pull-style (SAX-like) reader for *.jsb streams
+---------------------------------------------------------------
+• Works on any binary stream (open file, socket, zip member …) through a
+  fixed 64 KiB window, so memory stays constant however big the file is.
+• JsbReader yields typed events with the current path available as
+  reader.path – stop iterating whenever you have what you need.
+
+      start_object(count)  key(name)  end_object
+      start_array(count)   end_array
+      int(value)  float(value)  string(value)
+
+  reader.skip() right after a start_* event fast-forwards to its end_*.
+• select(stream, "values[*].role_data[*].coefficients") walks the stream
+  once, skips every subtree that cannot match without building it, and
+  yields (path, value) for each match.  Patterns use "key", "*" (any key),
+  "[n]" and "[*]".
+
+python jsb_stream.py <file.jsb> <pattern>   → print matches as JSON lines
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, NamedTuple
+import json
+import re
+import struct
+import sys
+
+from jsb_codec import (
+    INLINE_DOUBLES, T_ARRAY, T_DOUBLE, T_INT, T_INT64, T_OBJECT, T_STRING,
+    T_UINT32, T_UINT64,
+)
+
+WINDOW = 1 << 16
+
+_I32 = struct.Struct("<i")
+_I64 = struct.Struct("<q")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_F64 = struct.Struct("<d")
+
+START_OBJECT, END_OBJECT = "start_object", "end_object"
+START_ARRAY, END_ARRAY = "start_array", "end_array"
+KEY, INT, FLOAT, STRING = "key", "int", "float", "string"
+
+_SCALARS = {T_INT64: _I64, T_UINT32: _U32, T_UINT64: _U64}
+
+
+class Event(NamedTuple):
+    kind: str
+    value: Any = None
+
+
+# ═════════════════════ BUFFERED SOURCE ══════════════════════════
+class _Source:
+    """Sliding read window over a binary stream."""
+
+    def __init__(self, stream: BinaryIO, window: int = WINDOW):
+        self.stream, self.window = stream, window
+        self.buf, self.pos, self.base = b"", 0, 0
+
+    def _fill(self, n: int) -> None:
+        tail = self.buf[self.pos :]
+        self.base += self.pos
+        chunk = self.stream.read(max(self.window, n - len(tail)))
+        self.buf, self.pos = tail + chunk, 0
+        if len(self.buf) < n:
+            raise EOFError(f"unexpected end of .jsb stream at 0x{self.base + len(self.buf):08X}")
+
+    def byte(self) -> int:
+        if self.pos >= len(self.buf):
+            self._fill(1)
+        b = self.buf[self.pos]
+        self.pos += 1
+        return b
+
+    def take(self, n: int) -> bytes:
+        if self.pos + n > len(self.buf):
+            self._fill(n)
+        out = self.buf[self.pos : self.pos + n]
+        self.pos += n
+        return out
+
+    def unpack(self, st) -> Any:
+        return st.unpack(self.take(st.size))[0]
+
+    def skip(self, n: int) -> None:
+        avail = len(self.buf) - self.pos
+        if n <= avail:
+            self.pos += n
+            return
+        n -= avail
+        self.base += len(self.buf)
+        self.buf, self.pos = b"", 0
+        while n:
+            got = len(self.stream.read(min(n, self.window)))
+            if not got:
+                raise EOFError("unexpected end of .jsb stream while skipping")
+            n -= got
+            self.base += got
+
+    @property
+    def offset(self) -> int:
+        return self.base + self.pos
+
+
+# ───────────────────── shared value helpers ─────────────────────
+def _count(src: _Source, n: int) -> int:
+    return n - 1 if n else src.unpack(_U32)
+
+
+def _key(src: _Source) -> str:
+    return src.take(src.byte()).decode("utf-8")
+
+
+def _scalar(src: _Source, typ: int, n: int, tag: int) -> Any:
+    if typ == T_INT:
+        return n - 8 if n else src.unpack(_I32)
+    if typ == T_STRING:
+        return src.take(_count(src, n)).decode("utf-8")
+    if typ == T_DOUBLE:
+        if n:
+            if n not in INLINE_DOUBLES:
+                raise ValueError(f"unknown inline double 0x{tag:02X} at 0x{src.offset - 1:08X}")
+            return INLINE_DOUBLES[n]
+        return src.unpack(_F64)
+    if typ in _SCALARS:
+        return src.unpack(_SCALARS[typ])
+    raise ValueError(f"unknown tag 0x{tag:02X} at 0x{src.offset - 1:08X}")
+
+
+def _read_value(src: _Source) -> Any:
+    """Materialise the value at the cursor (used for matched subtrees only)."""
+    tag = src.byte()
+    typ, n = tag & 0x0F, tag >> 4
+    if typ == T_OBJECT:
+        return {_key(src): _read_value(src) for _ in range(_count(src, n))}
+    if typ == T_ARRAY:
+        return [_read_value(src) for _ in range(_count(src, n))]
+    return _scalar(src, typ, n, tag)
+
+
+_FIXED = {T_INT64: 8, T_UINT32: 4, T_UINT64: 8}
+
+
+def _skip_value(src: _Source) -> None:
+    """Consume the value at the cursor without building anything."""
+    tag = src.byte()
+    typ, n = tag & 0x0F, tag >> 4
+    if typ == T_OBJECT:
+        for _ in range(_count(src, n)):
+            src.skip(src.byte())
+            _skip_value(src)
+    elif typ == T_ARRAY:
+        for _ in range(_count(src, n)):
+            _skip_value(src)
+    elif typ == T_STRING:
+        src.skip(_count(src, n))
+    elif typ == T_INT:
+        if not n:
+            src.skip(4)
+    elif typ == T_DOUBLE:
+        if not n:
+            src.skip(8)
+    elif typ in _FIXED:
+        src.skip(_FIXED[typ])
+    else:
+        raise ValueError(f"unknown tag 0x{tag:02X} at 0x{src.offset - 1:08X}")
+
+
+def format_path(parts: list[str | int]) -> str:
+    out = []
+    for p in parts:
+        out.append(f"[{p}]" if isinstance(p, int) else (f".{p}" if out else p))
+    return "".join(out)
+
+
+# ═════════════════════════ EVENT READER ═════════════════════════
+class JsbReader:
+    """Iterate a .jsb stream as Events; reader.path is the current location."""
+
+    def __init__(self, stream: BinaryIO, window: int = WINDOW):
+        self._src = _Source(stream, window)
+        self._stack: list[list] = []        # [is_object, remaining, next_index]
+        self._parts: list[str | int] = []
+
+    @property
+    def path(self) -> str:
+        return format_path(self._parts)
+
+    @property
+    def depth(self) -> int:
+        return len(self._stack)
+
+    def skip(self) -> None:
+        """After start_object/start_array: consume the rest; end_* comes next."""
+        if not self._stack:
+            raise RuntimeError("skip() is only valid inside a container")
+        frame = self._stack[-1]
+        for _ in range(frame[1]):
+            if frame[0]:
+                self._src.skip(self._src.byte())
+            _skip_value(self._src)
+        frame[1] = 0
+
+    def __iter__(self) -> Iterator[Event]:
+        src, stack, parts = self._src, self._stack, self._parts
+        while True:
+            if stack:
+                frame = stack[-1]
+                if frame[1] == 0:
+                    stack.pop()
+                    yield Event(END_OBJECT if frame[0] else END_ARRAY)
+                    if not stack:
+                        return
+                    parts.pop()
+                    continue
+                frame[1] -= 1
+                if frame[0]:
+                    key = _key(src)
+                    parts.append(key)
+                    yield Event(KEY, key)
+                else:
+                    parts.append(frame[2])
+                    frame[2] += 1
+
+            tag = src.byte()
+            typ, n = tag & 0x0F, tag >> 4
+            if typ == T_OBJECT or typ == T_ARRAY:
+                count = _count(src, n)
+                stack.append([typ == T_OBJECT, count, 0])
+                yield Event(START_OBJECT if typ == T_OBJECT else START_ARRAY, count)
+                continue
+
+            value = _scalar(src, typ, n, tag)
+            kind = STRING if typ == T_STRING else FLOAT if typ == T_DOUBLE else INT
+            yield Event(kind, value)
+            if not stack:
+                return
+            parts.pop()
+
+
+# ═════════════════════════ PATH SELECT ══════════════════════════
+_SEGMENT = re.compile(r"\[(\*|\d+)\]|([^.\[\]]+)")
+
+
+def compile_pattern(pattern: str) -> list[tuple[bool, str | int | None]]:
+    """"a[*].b" → [(False, "a"), (True, None), (False, "b")]  (None = wildcard)"""
+    segs = []
+    for m in _SEGMENT.finditer(pattern):
+        idx, key = m.groups()
+        if idx is not None:
+            segs.append((True, None if idx == "*" else int(idx)))
+        else:
+            segs.append((False, None if key == "*" else key))
+    if not segs:
+        raise ValueError(f"empty JSB path pattern: {pattern!r}")
+    return segs
+
+
+def _select(src: _Source, segs: list, depth: int, parts: list) -> Iterator[tuple[str, Any]]:
+    tag = src.byte()
+    typ, n = tag & 0x0F, tag >> 4
+    if typ not in (T_OBJECT, T_ARRAY):
+        _scalar(src, typ, n, tag)             # leaf above the pattern depth
+        return
+    is_index, want = segs[depth]
+    last = depth + 1 == len(segs)
+    is_obj = typ == T_OBJECT
+    for i in range(_count(src, n)):
+        label: str | int = _key(src) if is_obj else i
+        if is_obj == is_index or (want is not None and want != label):
+            _skip_value(src)
+            continue
+        parts.append(label)
+        if last:
+            yield format_path(parts), _read_value(src)
+        else:
+            yield from _select(src, segs, depth + 1, parts)
+        parts.pop()
+
+
+def select(stream: BinaryIO, pattern: str, window: int = WINDOW) -> Iterator[tuple[str, Any]]:
+    """Yield (path, value) for every node matching *pattern*, in file order."""
+    yield from _select(_Source(stream, window), compile_pattern(pattern), 0, [])
+
+
+def select_file(path: Path, pattern: str) -> Iterator[tuple[str, Any]]:
+    with open(path, "rb") as fh:
+        yield from select(fh, pattern)
+
+
+def first(path: Path, pattern: str, default: Any = None) -> Any:
+    """Value of the first match – stops reading as soon as it is found."""
+    for _, value in select_file(path, pattern):
+        return value
+    return default
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main(argv: list[str]) -> None:
+    if len(argv) != 2:
+        sys.exit("usage: jsb_stream.py <file.jsb> <pattern>   e.g. values[*].start_value")
+    n = 0
+    for path, value in select_file(Path(argv[0]), argv[1]):
+        print(json.dumps({"path": path, "value": value}, ensure_ascii=False))
+        n += 1
+    print(f"✓ {n} match(es)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
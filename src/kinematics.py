@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+kinematics.py — time-to-reach grids and pitch control from physical_constraints
+-------------------------------------------------------------------------------
+• A MovementModel is built from one physics block: the sprint speed and
+  max acceleration / deceleration, the walk / jog / run gait speeds, the
+  theoretical_max_potential_direction_change_* limit per gait and
+  theoretical_max_turning_rate.  Units: speeds ÷ speed_scaler → m/s,
+  accelerations ÷ acceleration_scaler → m/s², angles in degrees,
+  turning rate in °/s.
+• Time for a player (position, velocity) to reach every grid cell:
+      reaction  +  turn within the gait's free direction change: carry the
+                   current speed along the new heading
+                   sharper turn: brake to a stop (the drift moves the start)
+                   while turning the rest of the angle, then start from rest
+                +  accelerate to sprint speed, then hold it
+  Everything is NumPy over (frames, 22 players, cells) – no Python loop
+  per player or per cell; frames go through in chunks to cap memory.
+• Pitch control: P(home) = logistic(π / (√3·σ) · (t_away − t_home)) on
+  each team's earliest arrival (σ = arrival-time uncertainty).
+• compare() runs the same frames through several physics variants and
+  reports space coverage per variant (home share, contested area,
+  mean arrival time, area owned per player) plus how far each control
+  surface moves against the first variant.
+• Variants are physics JSON files (physical_constraints.json layout,
+  laid over the clean block), built simatch trees or .fmf/.zip archives.
+  Frames come from an .npz (positions (F, 22, 2) in metres, optional
+  velocities, players 0-10 home) or are synthetic formations.
+
+python kinematics.py [<physics.json|tree|fmf> …] [--frames tracks.npz | --synthetic 1000]
+                     [--grid 1.0] [--sigma 0.45] [--json report.json]
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from jsb_codec import load_jsb
+from tree_decoder import decode_cached
+from tree_diff import open_source
+
+# ───────────────────────── paths ────────────────────────────────
+ROOT_DIR    = Path(__file__).resolve().parent.parent
+SIMATCH_DIR = ROOT_DIR / "src" / "clean_simatch"
+
+PHYSICS_REL = "physics/physical_constraints.jsb"
+PITCH = (105.0, 68.0)             # metres
+N_PLAYERS = 22                    # 0-10 home, 11-21 away
+REACTION_S = 0.7
+SIGMA_S = 0.45
+CHUNK = 4                         # frames per vectorised step (keeps temporaries in cache)
+GAITS = ("walk", "jog", "run")
+
+# 4-4-2 for the home side (left half, attacking right); away is mirrored
+_FORMATION = np.array([
+    (5, 34), (25, 10), (22, 27), (22, 41), (25, 58),
+    (40, 10), (38, 27), (38, 41), (40, 58), (50, 28), (50, 40),
+], dtype=np.float32)
+
+
+# ═════════════════════════ PHYSICS ══════════════════════════════
+@lru_cache(maxsize=1)
+def clean_block() -> dict[str, int]:
+    block = load_jsb(SIMATCH_DIR / PHYSICS_REL)["version_array"][0]
+    return {k: v for k, v in block.items() if not isinstance(v, dict)}
+
+
+def load_physics(src: Path) -> dict[str, int]:
+    """Physics block from a physics JSON (over the clean block), a tree or an archive."""
+    if src.suffix == ".json":
+        updates = json.loads(src.read_text("utf-8"))
+        return {**clean_block(), **{k: v for k, v in updates.items() if k in clean_block()}}
+    if src.suffix == ".jsb":
+        doc = decode_cached("jsb", src.read_bytes())
+    else:
+        source = open_source(src)
+        if PHYSICS_REL not in source.sizes:
+            raise FileNotFoundError(f"no {PHYSICS_REL} in {src}")
+        doc = decode_cached("jsb", source.read(PHYSICS_REL))
+    return {k: v for k, v in doc["version_array"][0].items() if not isinstance(v, dict)}
+
+
+@dataclass(frozen=True)
+class MovementModel:
+    """The movement envelope of one physics block, in SI units."""
+
+    vmax: float                                   # m/s
+    accel: float                                  # m/s²
+    decel: float                                  # m/s²
+    turn_rate: float                              # rad/s
+    gait_speeds: tuple[float, float, float]       # walk, jog, run (m/s)
+    free_turn: tuple[float, float, float]         # rad, per gait
+    reaction: float = REACTION_S
+
+    @classmethod
+    def from_physics(cls, p: dict[str, int], speed_key: str = "sprint_speed",
+                     reaction: float = REACTION_S) -> "MovementModel":
+        sc, ac = p["speed_scaler"], p["acceleration_scaler"]
+        return cls(
+            vmax=max(p[speed_key] / sc, 1e-3),
+            accel=max(p["theoretical_max_acceleration"] / ac, 1e-3),
+            decel=max(p["theoretical_max_deceleration"] / ac, 1e-3),
+            turn_rate=max(float(np.radians(p["theoretical_max_turning_rate"])), 1e-3),
+            gait_speeds=tuple(p[f"{g}_speed"] / sc for g in GAITS),
+            free_turn=tuple(float(np.radians(p[f"theoretical_max_potential_direction_change_{g}"])) for g in GAITS),
+            reaction=reaction,
+        )
+
+    def free_angle(self, speed: np.ndarray) -> np.ndarray:
+        """Direction change possible without stopping, interpolated between gaits."""
+        return np.interp(speed, self.gait_speeds, self.free_turn).astype(np.float32)
+
+    def _run(self, d: np.ndarray, u0: np.ndarray | float, vmax: np.ndarray, accel: np.ndarray) -> np.ndarray:
+        """Seconds to cover *d* starting at *u0*, accelerating to *vmax*."""
+        d_acc = (vmax * vmax - u0 * u0) / (2 * accel)
+        t_acc = (np.sqrt(u0 * u0 + 2 * accel * d) - u0) / accel
+        return np.where(d <= d_acc, t_acc, (vmax - u0) / accel + (d - d_acc) / vmax)
+
+    def time_to_reach(self, pos: np.ndarray, vel: np.ndarray, cells: np.ndarray,
+                      pace: np.ndarray | None = None) -> np.ndarray:
+        """(…, P, 2) positions/velocities × (G, 2) cells → (…, P, G) seconds (float32).
+
+        *pace* (P,) scales each player's top speed and acceleration."""
+        f32 = np.float32
+        vmax = np.full(pos.shape[-2], self.vmax, f32)
+        accel = np.full(pos.shape[-2], self.accel, f32)
+        if pace is not None:
+            vmax *= np.asarray(pace, f32)
+            accel *= np.asarray(pace, f32)
+        vel = vel.astype(f32, copy=False)
+        speed = np.minimum(np.hypot(vel[..., 0], vel[..., 1]), vmax)       # (…, P)
+        inv = 1 / np.maximum(speed, f32(1e-6))
+        hx, hy = vel[..., 0] * inv, vel[..., 1] * inv
+
+        dx = cells[:, 0].astype(f32) - pos[..., 0, None].astype(f32)       # (…, P, G)
+        dy = cells[:, 1].astype(f32) - pos[..., 1, None].astype(f32)
+        dist = np.hypot(dx, dy)
+        along = dx * hx[..., None] + dy * hy[..., None]                    # distance along the heading
+        del dx, dy
+        cos = along / np.maximum(dist, f32(1e-6))
+
+        s = speed[..., None]
+        free = np.minimum(self.free_angle(speed), f32(np.pi))[..., None]
+        sharp = (cos < np.cos(free)) & (s > 0)
+        vmax, accel = vmax[:, None], accel[:, None]
+
+        brake = s * s / f32(2 * self.decel)                                # drift along the old heading
+        moved = np.sqrt(np.maximum(dist * dist - 2 * brake * along + brake * brake, 0))
+        turn = (np.arccos(np.clip(cos, -1, 1)) - free) / f32(self.turn_rate)
+        pivot = np.maximum(s / f32(self.decel), turn)
+
+        u0 = np.where(sharp, f32(0), np.maximum(s * cos, 0))
+        out = self._run(np.where(sharp, moved, dist), u0, vmax, accel)
+        out += np.where(sharp, pivot, f32(0))
+        out += f32(self.reaction)
+        return out
+
+
+# ═════════════════════════ PITCH ════════════════════════════════
+def pitch_grid(step: float = 1.0) -> tuple[np.ndarray, tuple[int, int]]:
+    """Cell centres (H·W, 2) and the (H, W) shape of a *step*-metre grid."""
+    xs = np.arange(step / 2, PITCH[0], step, dtype=np.float32)
+    ys = np.arange(step / 2, PITCH[1], step, dtype=np.float32)
+    gx, gy = np.meshgrid(xs, ys)
+    return np.stack([gx.ravel(), gy.ravel()], axis=-1), gx.shape
+
+
+def pitch_control(times: np.ndarray, sigma: float = SIGMA_S) -> np.ndarray:
+    """(…, 22, G) arrival times → (…, G) probability that the home side controls each cell."""
+    home = times[..., :11, :].min(axis=-2)
+    away = times[..., 11:, :].min(axis=-2)
+    return 1 / (1 + np.exp(np.float32(-np.pi / (3 ** 0.5 * sigma)) * (away - home)))
+
+
+def synthetic_frames(n: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """*n* jittered 4-4-2 v 4-4-2 frames: positions and velocities (n, 22, 2)."""
+    rng = np.random.default_rng(seed)
+    away = np.column_stack([PITCH[0] - _FORMATION[:, 0], _FORMATION[:, 1]])
+    base = np.concatenate([_FORMATION, away]).astype(np.float32)
+    shift = rng.normal(0, 12, (n, 1, 1)) * np.array([1, 0.3], np.float32)     # the block moves together
+    pos = base + shift + rng.normal(0, 5, (n, N_PLAYERS, 2))
+    pos = np.clip(pos, 0, PITCH).astype(np.float32)
+    speed = rng.gamma(2.0, 1.5, (n, N_PLAYERS, 1))
+    theta = rng.uniform(0, 2 * np.pi, (n, N_PLAYERS, 1))
+    vel = np.concatenate([np.cos(theta), np.sin(theta)], axis=-1) * speed
+    return pos, vel.astype(np.float32)
+
+
+def load_frames(path: Path) -> tuple[np.ndarray, np.ndarray]:
+    with np.load(path) as npz:
+        pos = npz["positions"].astype(np.float32)
+        vel = npz["velocities"].astype(np.float32) if "velocities" in npz else np.zeros_like(pos)
+    if pos.ndim != 3 or pos.shape[1:] != (N_PLAYERS, 2):
+        raise ValueError(f"{path.name}: positions must be (frames, {N_PLAYERS}, 2), got {pos.shape}")
+    return pos, vel
+
+
+# ═════════════════════════ COVERAGE ═════════════════════════════
+def _chunks(n: int, size: int) -> Iterator[slice]:
+    for i in range(0, n, size):
+        yield slice(i, min(i + size, n))
+
+
+def compare(models: dict[str, MovementModel], pos: np.ndarray, vel: np.ndarray, step: float = 1.0,
+            sigma: float = SIGMA_S, chunk: int = CHUNK) -> dict[str, dict[str, float]]:
+    """Space-coverage metrics per model over the same frames (first model = reference)."""
+    cells, _ = pitch_grid(step)
+    cell_area = step * step
+    n = len(pos)
+    sums = {name: dict.fromkeys(("home_share", "contested_share", "reach_s", "home_area_m2",
+                                 "player_area_m2_sd", "shift_vs_ref"), 0.0) for name in models}
+    ref = next(iter(models))
+    for sl in _chunks(n, chunk):
+        ref_ctrl = None
+        for name, model in models.items():
+            times = model.time_to_reach(pos[sl], vel[sl], cells)      # (f, 22, G)
+            ctrl = pitch_control(times, sigma)
+            owner = times.argmin(axis=-2)                             # (f, G)
+            area = np.stack([np.bincount(o, minlength=N_PLAYERS) for o in owner]) * cell_area
+            s = sums[name]
+            s["home_share"] += float(ctrl.mean(axis=-1).sum())
+            s["contested_share"] += float((np.abs(ctrl - 0.5) < 0.25).mean(axis=-1).sum())
+            s["reach_s"] += float(times.min(axis=-2).mean(axis=-1).sum())
+            s["home_area_m2"] += float(area[:, :11].sum(axis=-1).sum())
+            s["player_area_m2_sd"] += float(area.std(axis=-1).sum())
+            if name == ref:
+                ref_ctrl = ctrl
+            else:
+                s["shift_vs_ref"] += float(np.abs(ctrl - ref_ctrl).mean(axis=-1).sum())
+    return {name: {k: v / n for k, v in s.items()} for name, s in sums.items()}
+
+
+def control_surface(model: MovementModel, pos: np.ndarray, vel: np.ndarray, step: float = 1.0,
+                    sigma: float = SIGMA_S, chunk: int = CHUNK) -> np.ndarray:
+    """(F, H, W) home control for every frame."""
+    cells, shape = pitch_grid(step)
+    out = np.empty((len(pos), *shape), np.float32)
+    for sl in _chunks(len(pos), chunk):
+        out[sl] = pitch_control(model.time_to_reach(pos[sl], vel[sl], cells), sigma).reshape(-1, *shape)
+    return out
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def _label(src: Path) -> str:
+    return src.stem if src.is_file() else src.name
+
+
+def main(argv: list[str]) -> None:
+    ap = argparse.ArgumentParser(description="Compare the space coverage of physics variants.")
+    ap.add_argument("variants", nargs="*", type=Path,
+                    help="physics JSON files, simatch trees or .fmf/.zip archives (the clean tree is always first)")
+    ap.add_argument("--frames", type=Path, default=None, help=".npz with positions (F, 22, 2) [, velocities]")
+    ap.add_argument("--synthetic", type=int, default=500, help="synthetic frames when --frames is not given")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--grid", type=float, default=1.0, help="cell size in metres")
+    ap.add_argument("--sigma", type=float, default=SIGMA_S, help="arrival-time uncertainty (s)")
+    ap.add_argument("--reaction", type=float, default=REACTION_S, help="reaction time (s)")
+    ap.add_argument("--json", type=Path, default=None, help="also write the metrics here")
+    args = ap.parse_args(argv)
+
+    try:
+        models = {"clean": MovementModel.from_physics(clean_block(), reaction=args.reaction)}
+        for src in args.variants:
+            models[_label(src)] = MovementModel.from_physics(load_physics(src), reaction=args.reaction)
+        pos, vel = load_frames(args.frames) if args.frames else synthetic_frames(args.synthetic, args.seed)
+    except (OSError, KeyError, ValueError) as exc:
+        sys.exit(f"⛔ {exc}")
+
+    t0 = time.perf_counter()
+    report = compare(models, pos, vel, args.grid, args.sigma)
+    secs = time.perf_counter() - t0
+
+    metrics = list(next(iter(report.values())))
+    print(f"{'variant':<24}" + "".join(f"{m:>19}" for m in metrics))
+    for name, row in report.items():
+        print(f"{name:<24}" + "".join(f"{row[m]:>19.4f}" for m in metrics))
+    if args.json:
+        args.json.write_text(json.dumps({"frames": len(pos), "grid_m": args.grid, "sigma_s": args.sigma,
+                                         "variants": report}, indent=2), "utf-8")
+    cells = len(pitch_grid(args.grid)[0])
+    print(f"✓ {len(models)} variant(s) × {len(pos)} frame(s) × {cells:,} cells in {secs:.2f}s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
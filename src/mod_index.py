@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+mod_index.py — index a corpus of engine mods into one SQLite database
+---------------------------------------------------------------------
+• Scans a corpus folder for mods: *.fmf archives or extracted simatch
+  trees, either flat ("Some ME v1.4.fmf") or nested ("Some ME/1.4.fmf",
+  "Some ME/1.4/").
+• Decodes physics, weights, player ratings and xG coefficient .jsb files
+  in a process pool and flattens them into one row per leaf value.
+• Rows are stored per *content hash*, so a stock weights.jsb shipped by
+  two hundred mods is decoded and stored once.
+• Incremental: a mod whose archive / tree fingerprint (size + mtime +
+  DECODER_VERSION) is unchanged is skipped; changed mods are re-hashed,
+  and only file contents the current decoder has not stored are decoded.
+
+    SELECT name, version, num FROM mod_params
+    WHERE param = 'sprint_speed' AND num > 70000;
+
+python mod_index.py <corpus_dir> [-j N] [--db mods.sqlite]
+python mod_index.py --db mods.sqlite --query "<SQL>"
+"""
+
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import time
+
+from jsb_codec import decode_jsb
+from tree_decoder import DECODER_VERSION
+from tree_diff import open_source
+
+# ───────────────────────── paths ────────────────────────────────
+ROOT_DIR = Path(__file__).resolve().parent.parent
+INDEX_DB = ROOT_DIR / "mods.sqlite"
+
+INDEXED_FILES = ("weights.jsb", "player_ratings_data.jsb")
+INDEXED_DIRS = ("physics/", "expected_goals/")
+
+_VERSIONED = re.compile(r"^(?P<name>.*?)[\s_-]+v?(?P<version>\d+(?:\.\d+)*)$", re.I)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mods (
+    id          INTEGER PRIMARY KEY,
+    name        TEXT NOT NULL,
+    version     TEXT NOT NULL,
+    source      TEXT NOT NULL UNIQUE,
+    fingerprint TEXT NOT NULL,
+    indexed_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    mod_id  INTEGER NOT NULL REFERENCES mods(id) ON DELETE CASCADE,
+    rel     TEXT NOT NULL,
+    hash    TEXT NOT NULL,
+    PRIMARY KEY (mod_id, rel)
+);
+CREATE TABLE IF NOT EXISTS docs (
+    hash    TEXT PRIMARY KEY,
+    decoder INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS params (
+    hash    TEXT NOT NULL,
+    path    TEXT NOT NULL,
+    param   TEXT NOT NULL,
+    num     REAL,
+    text    TEXT
+);
+CREATE INDEX IF NOT EXISTS params_by_param ON params(param, num);
+CREATE INDEX IF NOT EXISTS params_by_hash  ON params(hash);
+CREATE INDEX IF NOT EXISTS files_by_hash   ON files(hash);
+CREATE VIEW IF NOT EXISTS mod_params AS
+    SELECT m.name, m.version, f.rel, p.path, p.param, p.num, p.text
+    FROM mods m JOIN files f ON f.mod_id = m.id JOIN params p ON p.hash = f.hash;
+"""
+
+
+# ═════════════════════════ DISCOVERY ════════════════════════════
+@dataclass
+class ModSource:
+    name: str
+    version: str
+    path: Path
+
+
+def _is_tree(path: Path) -> bool:
+    return (path / "weights.jsb").exists() or (path / "physics").is_dir()
+
+
+def _split_name(stem: str) -> tuple[str, str]:
+    m = _VERSIONED.match(stem)
+    return (m["name"], m["version"]) if m else (stem, "")
+
+
+def _mod_root(path: Path) -> Path | None:
+    """The simatch tree / archive inside *path*, or None."""
+    if path.is_file():
+        return path if path.suffix.lower() == ".fmf" else None
+    if _is_tree(path):
+        return path
+    if _is_tree(path / "simatch"):
+        return path / "simatch"
+    fmf = path / "simatch.fmf"
+    return fmf if fmf.exists() else None
+
+
+def discover(corpus: Path) -> list[ModSource]:
+    mods = []
+    for item in sorted(Path(corpus).iterdir()):
+        root = _mod_root(item)
+        if root is not None:
+            stem = item.stem if item.is_file() else item.name
+            mods.append(ModSource(*_split_name(stem), root))
+        elif item.is_dir():
+            for sub in sorted(item.iterdir()):         # <mod>/<version>
+                root = _mod_root(sub)
+                if root is not None:
+                    mods.append(ModSource(item.name, sub.stem if sub.is_file() else sub.name, root))
+    return mods
+
+
+def fingerprint(root: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"decoder|{DECODER_VERSION}\n".encode())     # a new decoder re-indexes every mod
+    paths = [root] if root.is_file() else sorted(p for p in root.rglob("*.jsb"))
+    for p in paths:
+        st = p.stat()
+        h.update(f"{p.as_posix()}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+# ═════════════════════════ FLATTEN ══════════════════════════════
+def flatten(doc: Any, path: str = "") -> Iterator[tuple[str, str, Any]]:
+    """
+    Yield (path, param, leaf) for every scalar in a decoded .jsb tree.
+
+    *param* is the leaf's key with any "ns::" prefix dropped; a "value"
+    next to a "name" string (ratings / xG coefficients) takes the name.
+    """
+    if isinstance(doc, dict):
+        label = doc.get("name") if isinstance(doc.get("name"), str) else None
+        for k, v in doc.items():
+            sub = f"{path}.{k}" if path else k
+            if isinstance(v, (dict, list)):
+                yield from flatten(v, sub)
+            else:
+                yield sub, (label if k == "value" and label else k.rsplit("::", 1)[-1]), v
+    elif isinstance(doc, list):
+        for i, v in enumerate(doc):
+            yield from flatten(v, f"{path}[{i}]")
+    else:
+        yield path, path, doc
+
+
+def _rows(doc: Any) -> list[tuple[str, str, float | None, str | None]]:
+    out = []
+    for path, param, v in flatten(doc):
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            out.append((path, param, float(v), None))
+        else:
+            out.append((path, param, None, str(v)))
+    return out
+
+
+# ═════════════════════════ WORKERS ══════════════════════════════
+def indexed(rel: str) -> bool:
+    return rel.endswith(".jsb") and (rel in INDEXED_FILES or rel.startswith(INDEXED_DIRS))
+
+
+def _scan_mod(task: tuple[str, frozenset[str]]) -> tuple[str, dict[str, str], dict[str, list], dict[str, str]]:
+    """Hash every indexed file; decode only contents not in *known*."""
+    root, known = task
+    src = open_source(root)
+    hashes: dict[str, str] = {}
+    new_docs: dict[str, list] = {}
+    errors: dict[str, str] = {}
+    for rel in sorted(r for r in src.sizes if indexed(r)):
+        try:
+            buf = src.read(rel)
+            h = hashlib.blake2b(buf, digest_size=16).hexdigest()
+            hashes[rel] = h
+            if h not in known and h not in new_docs:
+                new_docs[h] = _rows(decode_jsb(buf))
+        except Exception as exc:
+            errors[rel] = f"{type(exc).__name__}: {exc}"
+    return root, hashes, new_docs, errors
+
+
+# ═════════════════════════ INDEXER ══════════════════════════════
+def connect(db: Path = INDEX_DB) -> sqlite3.Connection:
+    con = sqlite3.connect(db)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute("PRAGMA foreign_keys=ON")
+    con.executescript(SCHEMA)
+    return con
+
+
+def index_corpus(corpus: Path, db: Path = INDEX_DB, workers: int | None = None,
+                 log=print) -> dict[str, int]:
+    """(Re)index every new or changed mod under *corpus*."""
+    con = connect(db)
+    stats = {"mods": 0, "skipped": 0, "indexed": 0, "new_docs": 0, "errors": 0}
+
+    current = {row[0]: (row[1], row[2]) for row in con.execute("SELECT source, id, fingerprint FROM mods")}
+    mods = discover(corpus)
+    stats["mods"] = len(mods)
+    todo: list[tuple[ModSource, str]] = []
+    for mod in mods:
+        fp = fingerprint(mod.path)
+        if current.get(str(mod.path), (None, None))[1] == fp:
+            stats["skipped"] += 1
+        else:
+            todo.append((mod, fp))
+
+    known = frozenset(h for (h,) in con.execute("SELECT hash FROM docs WHERE decoder = ?", (DECODER_VERSION,)))
+    by_root = {str(mod.path): (mod, fp) for mod, fp in todo}
+    tasks = [(root, known) for root in by_root]
+    workers = workers or os.cpu_count() or 1
+
+    def results():
+        if workers == 1 or len(tasks) <= 1:
+            yield from map(_scan_mod, tasks)
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+                yield from pool.map(_scan_mod, tasks)
+
+    for root, hashes, new_docs, errors in results():       # single writer: this process
+        mod, fp = by_root[root]
+        with con:
+            for h, rows in new_docs.items():
+                if con.execute("SELECT 1 FROM docs WHERE hash = ? AND decoder = ?",
+                               (h, DECODER_VERSION)).fetchone():
+                    continue                                 # another mod in this run had it
+                con.execute("DELETE FROM params WHERE hash = ?", (h,))      # rows from an older decoder
+                con.execute("INSERT OR REPLACE INTO docs VALUES (?, ?)", (h, DECODER_VERSION))
+                con.executemany("INSERT INTO params VALUES (?, ?, ?, ?, ?)",
+                                ((h, *row) for row in rows))
+                stats["new_docs"] += 1
+            con.execute("DELETE FROM mods WHERE source = ?", (root,))
+            cur = con.execute(
+                "INSERT INTO mods (name, version, source, fingerprint, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                (mod.name, mod.version, root, fp, time.time()))
+            con.executemany("INSERT INTO files VALUES (?, ?, ?)",
+                            ((cur.lastrowid, rel, h) for rel, h in hashes.items()))
+        stats["indexed"] += 1
+        stats["errors"] += len(errors)
+        log(f"  indexed {mod.name} {mod.version}".rstrip() + f"  ({len(hashes)} files, {len(new_docs)} new)")
+        for rel, err in errors.items():
+            log(f"⚠️  {mod.name} {mod.version}: {rel}: {err}")
+
+    with con:                                                # mods removed from the corpus
+        live = {str(m.path) for m in mods}
+        gone = [s for s in current if s not in live]
+        con.executemany("DELETE FROM mods WHERE source = ?", ((s,) for s in gone))
+        con.execute("DELETE FROM params WHERE hash NOT IN (SELECT hash FROM files)")
+        con.execute("DELETE FROM docs WHERE hash NOT IN (SELECT hash FROM files)")
+    con.close()
+    return stats
+
+
+def query(sql: str, params: tuple = (), db: Path = INDEX_DB) -> list[tuple]:
+    con = connect(db)
+    try:
+        return con.execute(sql, params).fetchall()
+    finally:
+        con.close()
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main(argv: list[str]) -> None:
+    ap = argparse.ArgumentParser(description="Index a corpus of engine mods into SQLite.")
+    ap.add_argument("corpus", nargs="?", type=Path)
+    ap.add_argument("--db", type=Path, default=INDEX_DB)
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    ap.add_argument("--query", default=None, help="run one SQL statement and print the rows")
+    args = ap.parse_args(argv)
+
+    if args.query:
+        t0 = time.perf_counter()
+        rows = query(args.query, db=args.db)
+        for row in rows:
+            print(" | ".join("" if v is None else str(v) for v in row))
+        print(f"✓ {len(rows)} row(s) in {(time.perf_counter() - t0) * 1000:.1f} ms")
+        return
+    if args.corpus is None or not args.corpus.is_dir():
+        sys.exit("usage: mod_index.py <corpus_dir> [-j N] [--db mods.sqlite]")
+
+    t0 = time.perf_counter()
+    stats = index_corpus(args.corpus, args.db, args.jobs)
+    print(f"✓ {stats['indexed']} indexed, {stats['skipped']} unchanged of {stats['mods']} mods, "
+          f"{stats['new_docs']} new file contents, {stats['errors']} error(s)  "
+          f"({time.perf_counter() - t0:.2f}s) → {args.db}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+momentum_weightings_data.jsb  ⇄  momentum_weightings_data.json
+----------------------------------------------------------------
+• Decodes the flat `values` list of
+      {CBE_EVENT_TYPE, HORIZONTAL_THIRDS, MOMENTUM, VERTICAL_ZONES}
+  records into a dense (event type × horizontal third × vertical zone)
+  int32 weight tensor.  Cells with no record stay 0 and are *not* written
+  back, so decode → encode is byte-identical.
+• Editable JSON layout:  {event: {zone: {third: momentum}}}  (file order)
+• momentum_curves() replays many matches' event logs through the tensor
+  in one NumPy pass and returns per-minute momentum curves.
+
+python momentum_decoder.py           → decode  clean .jsb → JSON
+python momentum_decoder.py encode    → encode  JSON → momentum_weightings_data.jsb
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+import csv
+import json
+import sys
+
+import numpy as np
+
+from jsb_codec import decode_jsb, encode_jsb
+
+# ───────────────────────── paths ────────────────────────────────
+ROOT_DIR      = Path(__file__).resolve().parent.parent
+MOMENTUM_JSB  = ROOT_DIR / "src" / "clean_simatch" / "momentum_weightings_data.jsb"
+MOMENTUM_JSON = ROOT_DIR / "momentum_weightings_data.json"
+MOMENTUM_OUT  = ROOT_DIR / "momentum_weightings_data.jsb"
+
+# ───────────────────── record keys & axes ───────────────────────
+K_EVENT, K_THIRD, K_ZONE, K_VALUE = (
+    "CBE_EVENT_TYPE", "HORIZONTAL_THIRDS", "VERTICAL_ZONES", "MOMENTUM",
+)
+
+# Canonical axis order (SI's own spelling, FIVTH included).  Labels found
+# in a modded file that are not listed here are appended in file order.
+THIRDS = ("LEFT_THIRD", "CENTRAL_THIRD", "RIGHT_THIRD")
+ZONES = (
+    "FIRST_SIXTH", "SECOND_SIXTH", "THIRD_SIXTH",
+    "FOURTH_SIXTH", "FIVTH_SIXTH", "FINAL_SIXTH",
+)
+
+
+@dataclass
+class MomentumTable:
+    """Dense view of momentum_weightings_data.jsb."""
+
+    event_types: list[str]
+    thirds: list[str]
+    zones: list[str]
+    weights: np.ndarray                     # int32 [E, H, V]
+    present: np.ndarray                     # bool  [E, H, V] – has a record
+    order: list[tuple[int, int, int]] = field(default_factory=list)
+
+    def index(self, event: str, third: str, zone: str) -> tuple[int, int, int]:
+        return (self.event_types.index(event), self.thirds.index(third),
+                self.zones.index(zone))
+
+    def get(self, event: str, third: str, zone: str) -> int:
+        return int(self.weights[self.index(event, third, zone)])
+
+    def set(self, event: str, third: str, zone: str, value: int) -> None:
+        """Set one cell; adds a new record when the cell was absent."""
+        idx = self.index(event, third, zone)
+        self.weights[idx] = value
+        if not self.present[idx]:
+            self.present[idx] = True
+            self.order.append(idx)
+
+
+def _axis(seen: Iterable[str], canonical: tuple[str, ...]) -> list[str]:
+    seen = list(dict.fromkeys(seen))
+    return [c for c in canonical if c in seen] + [s for s in seen if s not in canonical]
+
+
+# ═════════════════════════ DECODER ══════════════════════════════
+def table_from_records(records: list[dict[str, Any]]) -> MomentumTable:
+    events = list(dict.fromkeys(r[K_EVENT] for r in records))
+    thirds = _axis((r[K_THIRD] for r in records), THIRDS)
+    zones = _axis((r[K_ZONE] for r in records), ZONES)
+
+    shape = (len(events), len(thirds), len(zones))
+    table = MomentumTable(events, thirds, zones,
+                          np.zeros(shape, np.int32), np.zeros(shape, bool))
+    for r in records:
+        idx = table.index(r[K_EVENT], r[K_THIRD], r[K_ZONE])
+        if table.present[idx]:
+            raise ValueError(f"duplicate momentum record {r}")
+        table.weights[idx] = r[K_VALUE]
+        table.present[idx] = True
+        table.order.append(idx)
+    return table
+
+
+def decode_momentum(buf: bytes) -> MomentumTable:
+    doc = decode_jsb(buf)
+    if not isinstance(doc, dict) or "values" not in doc:
+        raise ValueError("momentum file: top-level 'values' array not found")
+    return table_from_records(doc["values"])
+
+
+# ═════════════════════════ ENCODER ══════════════════════════════
+def table_to_records(table: MomentumTable) -> list[dict[str, Any]]:
+    """Records in original file order (new cells last), keys in SI order."""
+    return [
+        {
+            K_EVENT: table.event_types[e],
+            K_THIRD: table.thirds[h],
+            K_VALUE: int(table.weights[e, h, v]),
+            K_ZONE: table.zones[v],
+        }
+        for e, h, v in table.order
+        if table.present[e, h, v]
+    ]
+
+
+def encode_momentum(table: MomentumTable) -> bytes:
+    return encode_jsb({"values": table_to_records(table)})
+
+
+# ───────────────────── editable JSON form ───────────────────────
+def table_to_json(table: MomentumTable) -> dict[str, dict[str, dict[str, int]]]:
+    out: dict[str, dict[str, dict[str, int]]] = {}
+    for e, h, v in table.order:
+        (out.setdefault(table.event_types[e], {})
+            .setdefault(table.zones[v], {}))[table.thirds[h]] = int(table.weights[e, h, v])
+    return out
+
+
+def table_from_json(doc: dict[str, dict[str, dict[str, int]]]) -> MomentumTable:
+    return table_from_records([
+        {K_EVENT: ev, K_THIRD: th, K_ZONE: zn, K_VALUE: int(val)}
+        for ev, zones in doc.items()
+        for zn, thirds in zones.items()
+        for th, val in thirds.items()
+    ])
+
+
+# ═════════════════════ MOMENTUM EVALUATOR ═══════════════════════
+@dataclass
+class EventLog:
+    """
+    Column-oriented event stream for any number of matches.
+
+    match  : int   match number (0 … n_matches-1)
+    minute : float match clock in minutes
+    team   : int   0 = home, 1 = away  (away momentum counts negative)
+    event / third / zone : int indices into a MomentumTable's axes,
+                           -1 = label not in the table (weight 0)
+    """
+
+    match: np.ndarray
+    minute: np.ndarray
+    team: np.ndarray
+    event: np.ndarray
+    third: np.ndarray
+    zone: np.ndarray
+
+
+def _codes(labels: Iterable[str], axis: list[str]) -> np.ndarray:
+    lookup = {name: i for i, name in enumerate(axis)}
+    return np.fromiter((lookup.get(x, -1) for x in labels), np.int64)
+
+
+def event_log_from_rows(table: MomentumTable, rows: Iterable[dict[str, Any]]) -> EventLog:
+    """Build an EventLog from dict rows (match, minute, team, event, third, zone)."""
+    rows = list(rows)
+    return EventLog(
+        match=np.fromiter((int(r["match"]) for r in rows), np.int64),
+        minute=np.fromiter((float(r["minute"]) for r in rows), np.float64),
+        team=np.fromiter((int(r["team"]) for r in rows), np.int64),
+        event=_codes((r["event"] for r in rows), table.event_types),
+        third=_codes((r["third"] for r in rows), table.thirds),
+        zone=_codes((r["zone"] for r in rows), table.zones),
+    )
+
+
+def load_event_log(table: MomentumTable, csv_path: Path) -> EventLog:
+    """CSV with header: match,minute,team,event,third,zone"""
+    with open(csv_path, newline="", encoding="utf-8") as fh:
+        return event_log_from_rows(table, csv.DictReader(fh))
+
+
+def momentum_curves(
+    weights: np.ndarray,
+    log: EventLog,
+    n_matches: int | None = None,
+    minutes: int = 90,
+    bin_minutes: float = 1.0,
+    decay: float = 1.0,
+) -> np.ndarray:
+    """
+    Replay *log* through *weights* ([E, H, V] or a stack [K, E, H, V] of
+    variants) and return momentum curves shaped [n_matches, n_bins] or
+    [K, n_matches, n_bins].
+
+    Home events add their weight, away events subtract it.  Each bin's
+    momentum is  m[t] = decay * m[t-1] + Σ weights in bin t,  so decay=1.0
+    is a plain running total and decay<1 lets old swings fade.
+    """
+    weights = np.asarray(weights)
+    stacked = weights.ndim == 4
+    w = weights if stacked else weights[None]
+
+    # pad every axis with a zero slot so index -1 (unknown label) scores 0
+    padded = np.zeros((w.shape[0],) + tuple(s + 1 for s in w.shape[1:]), np.float64)
+    padded[:, :-1, :-1, :-1] = w
+    per_event = padded[:, log.event, log.third, log.zone]            # [K, N]
+    per_event *= np.where(log.team == 0, 1.0, -1.0)
+
+    if n_matches is None:
+        n_matches = int(log.match.max()) + 1 if log.match.size else 0
+    elif log.match.size and not 0 <= int(log.match.min()) <= int(log.match.max()) < n_matches:
+        raise ValueError(f"match ids {int(log.match.min())}..{int(log.match.max())} "
+                         f"do not fit n_matches={n_matches}")
+    n_bins = int(np.ceil(minutes / bin_minutes))
+    bins = np.clip((log.minute // bin_minutes).astype(np.int64), 0, n_bins - 1)
+    flat = log.match * n_bins + bins
+
+    per_bin = np.empty((w.shape[0], n_matches * n_bins))
+    for k in range(w.shape[0]):
+        per_bin[k] = np.bincount(flat, per_event[k], n_matches * n_bins)
+    per_bin = per_bin.reshape(w.shape[0], n_matches, n_bins)
+
+    if decay == 1.0:
+        curves = np.cumsum(per_bin, axis=2)
+    else:
+        curves = np.empty_like(per_bin)
+        acc = np.zeros(per_bin.shape[:2])
+        for t in range(n_bins):                     # vectorised over K × matches
+            acc = acc * decay + per_bin[:, :, t]
+            curves[:, :, t] = acc
+    return curves if stacked else curves[0]
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main(mode: str = "decode") -> None:
+    if mode == "encode":
+        table = table_from_json(json.loads(MOMENTUM_JSON.read_text("utf-8")))
+        MOMENTUM_OUT.write_bytes(encode_momentum(table))
+        print(f"✓ Encoded {MOMENTUM_JSON.name} → {MOMENTUM_OUT.name} "
+              f"({len(table.order)} records)")
+        return
+
+    if not MOMENTUM_JSB.exists():
+        sys.exit(f"JSB not found: {MOMENTUM_JSB}")
+    table = decode_momentum(MOMENTUM_JSB.read_bytes())
+    MOMENTUM_JSON.write_text(json.dumps(table_to_json(table), indent=2), "utf-8")
+    print(f"✓ Decoded {MOMENTUM_JSB.relative_to(ROOT_DIR)} "
+          f"({len(table.event_types)} events × {len(table.thirds)} thirds × "
+          f"{len(table.zones)} zones)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "decode")
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+patch_plan.py — one batched edit format for every editable .jsb
+---------------------------------------------------------------
+• A plan is a list of (file, path, op, value) rows, read from CSV, JSON or
+  TOML:
+
+      file,path,op,value
+      physics,version_array[*].sprint_speed,set,70000
+      ratings,values[*].role_data[role:Central Defender].coefficients[name=Tackles Won].value,mul,1.1
+      weights,WEIGHTS[*].*.simatchshared::TSF_CA,add,5
+
+      {"edits": [{"file": "physics", "path": "…", "op": "set", "value": 70000}, …]}
+      [[edits]]  file = "ratings"  path = "…"  value = "*1.1"
+
+  file   "physics" / "weights" / "ratings" or any .jsb path in the tree
+         (relative, "/"-separated; anything else is refused)
+  op     set | mul (*, x, ×) | add (+); left empty, a value written as
+         "*1.1", "×1.1" or "+50" is relative and anything else is a set
+  path   jsb_patch paths plus
+            *  [*]          any member / element
+            [field=value]  elements whose field equals value
+            [role:Name]    role_data blocks whose role_lookup mask includes
+                           Name (or a role bit) – see player_ratings_decoder
+
+• The planner groups rows by target file; each file is indexed once
+  (jsb_patch), every row is resolved and folded in plan order (×1.1 then
+  +50 compose), and the file is written with a single patch() call.
+  Relative results on int slots are rounded.  Resolved paths are cached
+  per file content, so the same plan over many variants resolves once.
+• A row that matches nothing is an error (strict=false in the row, or
+  physics rows converted by from_physics(), only skip).
+
+python patch_plan.py <plan.csv|.json|.toml> [--src clean_simatch|x.fmf] [-o out.fmf|out.zip|dir] [--dry-run]
+"""
+
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path, PurePosixPath
+from typing import Any, Callable, Iterable, Iterator, NamedTuple
+import argparse
+import csv
+import hashlib
+import io
+import json
+import re
+import sys
+import time
+
+from jsb_patch import JsbIndex, PatchError, get, index_for, patch
+from player_ratings_decoder import ROLE_BIT_TO_NAME
+
+# ───────────────────────── paths ────────────────────────────────
+ROOT_DIR    = Path(__file__).resolve().parent.parent
+SIMATCH_DIR = ROOT_DIR / "src" / "clean_simatch"
+
+FILE_ALIASES = {
+    "physics": "physics/physical_constraints.jsb",
+    "weights": "weights.jsb",
+    "ratings": "player_ratings_data.jsb",
+}
+OPS = {"set": "set", "=": "set", "mul": "mul", "*": "mul", "x": "mul", "×": "mul", "add": "add", "+": "add"}
+_RELATIVE = re.compile(r"^\s*([*x×+])\s*(-?[\d.]+(?:e-?\d+)?)\s*$", re.I)
+_SEGMENT = re.compile(r"\[([^\]]*)\]|([^.\[\]]+)")
+RESOLVE_CACHE_SIZE = 16
+
+
+class PlanError(ValueError):
+    """A plan row that cannot be parsed or applied."""
+
+
+class PlanOp(NamedTuple):
+    file: str          # path inside the simatch tree
+    path: str
+    op: str            # "set" | "mul" | "add"
+    value: Any
+    strict: bool = True
+
+    def apply(self, current: Any) -> Any:
+        if self.op == "set":
+            return self.value
+        if not isinstance(current, (int, float)) or isinstance(current, bool):
+            raise PlanError(f"{self.file}: {self.path}: cannot {self.op} a {type(current).__name__}")
+        new = current * self.value if self.op == "mul" else current + self.value
+        return round(new) if isinstance(current, int) else float(new)
+
+
+# ═════════════════════════ PARSING ══════════════════════════════
+def _number(text: Any) -> Any:
+    if not isinstance(text, str):
+        return text
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
+
+
+def make_op(row: dict[str, Any], where: str = "") -> PlanOp:
+    """One plan row (dict with file/path/op/value[/strict]) → PlanOp."""
+    try:
+        file, path = str(row["file"]).strip(), str(row["path"]).strip()
+        value = row["value"]
+    except KeyError as e:
+        raise PlanError(f"{where}missing column {e}") from None
+    op = str(row.get("op") or "").strip().lower()
+    if not op:
+        m = _RELATIVE.match(value) if isinstance(value, str) else None
+        op, value = (OPS[m.group(1).lower()], m.group(2)) if m else ("set", value)
+    elif op not in OPS:
+        raise PlanError(f"{where}unknown op {op!r} ({', '.join(sorted(set(OPS.values())))})")
+    op, value = OPS[op], _number(value)
+    if not isinstance(value, (str, int, float, bool)):
+        raise PlanError(f"{where}value must be a number or a string, not a {type(value).__name__}")
+    if op != "set" and (not isinstance(value, (int, float)) or isinstance(value, bool)):
+        raise PlanError(f"{where}{op} needs a number, got {value!r}")
+    strict = row.get("strict", True)
+    if isinstance(strict, str):
+        strict = strict.strip().lower() not in ("0", "false", "no", "")
+    return PlanOp(tree_file(file, where), path, op, value, bool(strict))
+
+
+def tree_file(file: str, where: str = "") -> str:
+    """An alias or a relative .jsb path inside the simatch tree; nothing that could leave it."""
+    rel = FILE_ALIASES.get(file, file)
+    parts = PurePosixPath(rel).parts
+    if (not rel.endswith(".jsb") or rel.startswith("/") or "\\" in rel or ":" in rel
+            or any(p in (".", "..") for p in parts)):
+        raise PlanError(f"{where}file must be {', '.join(FILE_ALIASES)} or a .jsb path inside the tree")
+    return rel
+
+
+def _toml():
+    try:
+        import tomllib                                  # Python 3.11+
+    except ImportError:
+        raise PlanError("TOML plans need Python 3.11 or newer – use CSV or JSON") from None
+    return tomllib
+
+
+def parse_plan(text: str, fmt: str) -> list[PlanOp]:
+    """*fmt*: "csv", "json" or "toml"."""
+    if fmt == "csv":
+        rows = list(csv.DictReader(io.StringIO(text)))
+    elif fmt in ("json", "toml"):
+        doc = json.loads(text) if fmt == "json" else _toml().loads(text)
+        rows = doc if isinstance(doc, list) else doc.get("edits", [])
+    else:
+        raise PlanError(f"unknown plan format {fmt!r}")
+    return [make_op(r, f"row {i + 1}: ") for i, r in enumerate(rows)]
+
+
+def load_plan(src: Path | list) -> list[PlanOp]:
+    """A plan file, or an already-parsed list of row dicts (e.g. inline in variants.json)."""
+    if isinstance(src, list):
+        return [make_op(r, f"row {i + 1}: ") for i, r in enumerate(src)]
+    src = Path(src)
+    return parse_plan(src.read_text("utf-8-sig"), src.suffix.lower().lstrip("."))
+
+
+def from_physics(updates: dict[str, Any]) -> list[PlanOp]:
+    """physical_constraints.json → set rows for every version_array copy."""
+    return [PlanOp(FILE_ALIASES["physics"], f"version_array[*].{key}", "set", int(val), False)
+            for key, val in updates.items() if not key.startswith("version_")]
+
+
+def group_by_file(ops: Iterable[PlanOp]) -> dict[str, list[PlanOp]]:
+    groups: dict[str, list[PlanOp]] = {}
+    for op in ops:
+        groups.setdefault(op.file, []).append(op)
+    return groups
+
+
+# ═════════════════════════ SELECTORS ════════════════════════════
+def _role_bits(name: str) -> int:
+    if name.isdigit():
+        return int(name)
+    want = name.strip().lower()
+    bits = 0
+    for bit, label in ROLE_BIT_TO_NAME.items():
+        if label.lower() == want:
+            bits |= bit
+    if not bits:
+        raise PlanError(f"unknown role {name!r}")
+    return bits
+
+
+def _role_selector(target: "PlanTarget", parent: tuple, label: Any, arg: str) -> bool:
+    """role_data[role:Name] – the block's role_lookup_data mask includes Name."""
+    if not parent or parent[-1] != "role_data":
+        raise PlanError("[role:…] only applies to role_data")
+    return bool(target.role_masks(parent[:-1]).get(label, 0) & _role_bits(arg))
+
+
+SELECTORS: dict[str, Callable[["PlanTarget", tuple, Any, str], bool]] = {
+    "role": _role_selector,
+}
+
+
+# ═════════════════════════ RESOLUTION ═══════════════════════════
+class PlanTarget:
+    """One file's bytes + index, with resolved paths cached."""
+
+    def __init__(self, buf: bytes):
+        self.buf = buf
+        self.index: JsbIndex = index_for(buf)
+        self._paths: dict[str, list[tuple]] = {}
+        self._masks: dict[tuple, dict[int, int]] = {}
+
+    def value(self, parts: tuple) -> Any:
+        return get(self.buf, parts, self.index)
+
+    def role_masks(self, season: tuple) -> dict[int, int]:
+        if season not in self._masks:
+            lookup = season + ("role_lookup_data",)
+            masks: dict[int, int] = {}
+            for i in self.index.children(lookup):
+                idx = self.value(lookup + (i, "index"))
+                masks[idx] = masks.get(idx, 0) | self.value(lookup + (i, "role"))
+            self._masks[season] = masks
+        return self._masks[season]
+
+    def _matches(self, parent: tuple, label: Any, seg: str) -> bool:
+        if seg == "*":
+            return True
+        if seg.isdigit():
+            return label == int(seg)
+        name, sep, arg = seg.partition(":")
+        if sep and name in SELECTORS:
+            return SELECTORS[name](self, parent, label, arg)
+        field, sep, want = seg.partition("=")
+        if not sep:
+            raise PlanError(f"bad selector [{seg}]")
+        parts = parent + (label, field.strip())
+        if parts not in self.index.leaves:
+            return False
+        have = self.value(parts)
+        return str(have) == want.strip() or have == _number(want.strip())
+
+    def resolve(self, path: str) -> list[tuple]:
+        """Every scalar path *path* addresses, in file order."""
+        if path not in self._paths:
+            found: list[tuple] = [()]
+            for m in _SEGMENT.finditer(path):
+                bracket, key = m.groups()
+                nxt = []
+                for parent in found:
+                    if bracket is None:
+                        labels = self.index.keys.get(parent, ())
+                        nxt += [parent + (k,) for k in labels if key == "*" or k == key]
+                    else:
+                        if parent in self.index.keys:
+                            continue
+                        nxt += [parent + (i,) for i in self.index.children(parent)
+                                if self._matches(parent, i, bracket.strip())]
+                found = nxt
+            self._paths[path] = [p for p in found if p in self.index.leaves]
+        return self._paths[path]
+
+
+_TARGETS: OrderedDict[bytes, PlanTarget] = OrderedDict()
+
+
+def target_for(buf: bytes) -> PlanTarget:
+    """Cached PlanTarget – the same file content is resolved once per process."""
+    key = hashlib.blake2b(buf, digest_size=16).digest()
+    hit = _TARGETS.get(key)
+    if hit is None:
+        hit = _TARGETS[key] = PlanTarget(buf)
+    _TARGETS.move_to_end(key)
+    while len(_TARGETS) > RESOLVE_CACHE_SIZE:
+        _TARGETS.popitem(last=False)
+    return hit
+
+
+def plan_edits(buf: bytes, ops: list[PlanOp]) -> dict[tuple, Any]:
+    """Fold *ops* (all for this file) into {parts: new value}."""
+    target = target_for(buf)
+    values: dict[tuple, Any] = {}
+    for op in ops:
+        hits = target.resolve(op.path)
+        if not hits and op.strict:
+            raise PlanError(f"{op.file}: {op.path}: matches nothing")
+        for parts in hits:
+            current = values[parts] if parts in values else target.value(parts)
+            values[parts] = op.apply(current)
+    return values
+
+
+def apply_file(buf: bytes, ops: list[PlanOp]) -> tuple[bytes, int]:
+    """One file, one pass: returns (patched bytes, number of values written)."""
+    values = plan_edits(buf, ops)
+    try:
+        return patch(buf, values, target_for(buf).index), len(values)
+    except PatchError as e:
+        raise PlanError(f"{ops[0].file}: {e}") from None
+
+
+def apply_plan(read: Callable[[str], bytes], ops: Iterable[PlanOp]) -> Iterator[tuple[str, bytes, int]]:
+    """Yield (file, patched bytes, values written) per target file; *read* gives the base bytes."""
+    for rel, group in group_by_file(ops).items():
+        try:
+            base = read(rel)
+        except (KeyError, FileNotFoundError):
+            raise PlanError(f"{rel}: not in the tree") from None
+        data, n = apply_file(bytes(base), group)
+        yield rel, data, n
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main(argv: list[str]) -> None:
+    ap = argparse.ArgumentParser(description="Apply a patch plan to a simatch tree or .fmf.")
+    ap.add_argument("plan", type=Path)
+    ap.add_argument("--src", type=Path, default=SIMATCH_DIR, help="clean tree or .fmf to start from")
+    ap.add_argument("-o", "--out", type=Path, default=None, help="out.fmf, out.zip or a folder")
+    ap.add_argument("--dry-run", action="store_true", help="resolve and report, write nothing")
+    args = ap.parse_args(argv)
+    if not args.dry_run and args.out is None:
+        sys.exit("give -o <out.fmf|out.zip|dir> or --dry-run")
+
+    from virtual_tree import VirtualTree                # .fmf sources / outputs need zstandard
+
+    t0 = time.perf_counter()
+    try:
+        ops = load_plan(args.plan)
+        with VirtualTree.open(args.src) as tree:
+            for rel, data, n in apply_plan(tree.read, ops):
+                print(f"  {rel:<40} {n:6} value(s)")
+                tree.set(rel, data)
+            if not args.dry_run:
+                tree.write(args.out)
+    except (PlanError, RuntimeError) as e:             # RuntimeError: .fmf without zstandard
+        sys.exit(f"⛔ {e}")
+    print(f"✓ {len(ops)} plan row(s) in {(time.perf_counter() - t0) * 1000:.0f} ms"
+          + ("" if args.dry_run else f" → {args.out}"))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -155,8 +155,6 @@ import json
 from pathlib import Path
 from dataclasses import dataclass, asdict
 import sys
-from collections import defaultdict
-from openpyxl import Workbook  # single lightweight dependency
 import importlib.util
 import importlib
 import subprocess
@@ -935,29 +933,6 @@ def _role_numbers_string(mask: int) -> str:
     nums = [str(bit) for bit in ROLE_BIT_TO_NAME.keys() if mask & bit]
     return "; ".join(nums) if nums else f"0x{mask:X}"
 
-def _build_matrix(blocks, lookups):
-    idx_to_mask = defaultdict(int)
-    for rl in lookups:
-        idx_to_mask[rl.index] |= rl.role  # Combine masks per index
-
-    idx_to_header = {i: _role_header(m) for i, m in idx_to_mask.items()}
-    idx_to_role_num = {i: _role_numbers_string(m) for i, m in idx_to_mask.items()}
-    ordered_idx = sorted(idx_to_header)
-
-    indices = ordered_idx
-    role_nums = [idx_to_role_num[i] for i in ordered_idx]
-    headers = [idx_to_header[i] for i in ordered_idx]
-
-    matrix = {}
-    for idx, block in enumerate(blocks):
-        if idx not in idx_to_header:
-            continue
-        col = idx_to_header[idx]
-        for coeff in block:
-            matrix.setdefault(coeff.name, {})[col] = coeff.value
-
-    return indices, role_nums, headers, list(matrix), matrix
-
 
 # ────────────────────────────────────────────────────────────────
 # 4.  Main routine — JSON + Excel
@@ -979,47 +954,11 @@ def main():
     )
     print("✓ Saved", JSON_PATH.name)
 
-    # 4-B  Excel workbook (corrected)
-    indices, roles, headers, actions, matrix = _build_matrix(
-        season_obj.role_data, season_obj.role_lookup_data
-    )
-
-    wb = Workbook()              # ✔ create ONE workbook
-    ws = wb.active               # ✔ worksheet belongs to the same wb
-
-    if ws is None: # This should never be activated, but stops the linter complaining
-        input("No active worksheet found in the workbook...")
-        raise RuntimeError("No active worksheet found in the workbook.")
-
-    # Header rows
-    ws.append([""] + indices)    # row-1: raw index
-    ws.append([""] + roles)      # row-2: original role number
-    ws.append([""] + headers)    # row-3: readable role name(s)
-    ws["A1"] = "Index:"
-    ws["A2"] = "Role_Num:"
-    ws["A3"] = "Role_Name:"
-    # Data rows
-    for act in actions:
-        ws.append([act] + [matrix.get(act, {}).get(h, None) for h in headers])
-
-    atempts = 0 
-    while atempts < 1:
-        try:
-            wb.save(XLSX_PATH)
-            print("✓ Saved", XLSX_PATH.name)
-            break                             # success → leave loop
-        except PermissionError:
-            print(
-                f"\n⛔  Permission denied while writing "
-                f"'{XLSX_PATH.name}'.\n"
-                "The file is probably open in Excel.\n"
-                "Close it and press Enter to try again…",
-                flush=True
-            )
-            input()
-            atempts += 1
-
-
+    # 4-B  Excel workbook – streamed in write-only mode; a workbook left
+    #      open in Excel fails the run instead of waiting for it.
+    #      Every season / other mods: python ratings_export.py
+    from ratings_export import season_table, write_xlsx   # it imports this module
+    write_xlsx([season_table(ratingsobject_to_dict(season_obj), SEASON_TO_RUN)], XLSX_PATH)
     print("✓ Saved", XLSX_PATH.name)
 
     _pause("Finished - press Enter to exit…")
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+ratings_export.py — every season of player_ratings_data to xlsx / CSV / Parquet
+------------------------------------------------------------------------------
+• Sources may be player_ratings_data .jsb/.json files, extracted simatch
+  trees or .fmf archives (read in place); a whole corpus of mods exports
+  in one run, one source per worker process.
+• Every season in "values" becomes one table with the layout of
+  player_ratings_data.xlsx:
+      row 1  Index:      role_data block index
+      row 2  Role_Num:   role bits from role_lookup_data
+      row 3  Role_Name:  readable role name(s)
+      rows   one per coefficient, one column per block
+• xlsx is written in openpyxl write-only mode (rows stream to disk, one
+  sheet per season – the first sheet is season 0, so prepare_simatch.py
+  can read an export directly).  The file is written next to the target
+  and swapped in, so a workbook held open in Excel fails that one source
+  instead of stalling the run.
+• --csv / --parquet also write <out>/<name>/<season>.csv|.parquet with the
+  same layout (Parquet: header rows go into the schema metadata; needs
+  pyarrow).
+
+python ratings_export.py <src> [<src> …] [-o ratings_export] [--csv] [--parquet] [-j N]
+"""
+
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from openpyxl import Workbook
+
+from player_ratings_decoder import _role_header, _role_numbers_string
+
+# ───────────────────────── paths ────────────────────────────────
+ROOT_DIR   = Path(__file__).resolve().parent.parent
+EXPORT_DIR = ROOT_DIR / "ratings_export"
+
+RATINGS_REL = "player_ratings_data.jsb"
+FORMATS = ("xlsx", "csv", "parquet")
+HEAD_LABELS = ("Index:", "Role_Num:", "Role_Name:")
+_SHEET_BAD = str.maketrans({c: "_" for c in "[]:*?/\\"})
+
+
+# ═════════════════════════ TABLES ═══════════════════════════════
+@dataclass
+class SeasonTable:
+    """One season as a coefficient × role-block grid."""
+
+    label: str
+    indices: list[int]
+    role_nums: list[str]
+    role_names: list[str]
+    coefficients: list[str]
+    rows: list[list[int | None]]
+
+    def header_rows(self) -> list[list[Any]]:
+        return [[HEAD_LABELS[0], *self.indices],
+                [HEAD_LABELS[1], *self.role_nums],
+                [HEAD_LABELS[2], *self.role_names]]
+
+    def iter_rows(self):
+        yield from self.header_rows()
+        for name, row in zip(self.coefficients, self.rows):
+            yield [name, *row]
+
+
+def season_label(season: dict[str, Any], i: int) -> str:
+    """'0 fm21 0.0.6' – short enough for a sheet title, unique per file."""
+    v = season.get("version") or {}
+    if not v:
+        return str(i)
+    return (f"{i} fm{v.get('version_year', '?')} "
+            f"{v.get('version_major', 0)}.{v.get('version_minor', 0)}.{v.get('version_release', 0)}")
+
+
+def season_table(season: dict[str, Any], label: str) -> SeasonTable:
+    masks: dict[int, int] = {}
+    for rl in season.get("role_lookup_data", []):
+        masks[rl["index"]] = masks.get(rl["index"], 0) | rl["role"]
+
+    blocks = season["role_data"]
+    indices = list(range(len(blocks)))
+    columns: dict[str, list[int | None]] = {}
+    for b, block in enumerate(blocks):
+        for c in block["coefficients"]:
+            columns.setdefault(c["name"], [None] * len(blocks))[b] = c["value"]
+
+    return SeasonTable(
+        label=label,
+        indices=indices,
+        role_nums=[_role_numbers_string(masks[b]) if b in masks else "" for b in indices],
+        role_names=[_role_header(masks[b]) if b in masks else "" for b in indices],
+        coefficients=list(columns),
+        rows=list(columns.values()),
+    )
+
+
+def season_tables(doc: dict[str, Any]) -> list[SeasonTable]:
+    return [season_table(s, season_label(s, i)) for i, s in enumerate(doc["values"])]
+
+
+# ═════════════════════════ WRITERS ══════════════════════════════
+def _swap_in(tmp: Path, path: Path) -> None:
+    try:
+        os.replace(tmp, path)
+    except PermissionError:
+        tmp.unlink(missing_ok=True)
+        raise PermissionError(f"{path.name} is locked – probably open in Excel") from None
+
+
+def write_xlsx(tables: list[SeasonTable], path: Path) -> None:
+    """One write-only sheet per season; the first sheet is the active one."""
+    wb = Workbook(write_only=True)
+    for t in tables:
+        ws = wb.create_sheet(t.label.translate(_SHEET_BAD)[:31])
+        ws.freeze_panes = "B4"
+        ws.column_dimensions["A"].width = 32
+        for row in t.iter_rows():
+            ws.append(row)
+    tmp = path.with_name(f".{path.name}.tmp")
+    wb.save(tmp)
+    _swap_in(tmp, path)
+
+
+def write_csv(table: SeasonTable, path: Path) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "w", newline="", encoding="utf-8") as fh:
+        csv.writer(fh).writerows(table.iter_rows())
+    _swap_in(tmp, path)
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+def write_parquet(table: SeasonTable, path: Path) -> None:
+    """Column "coefficient" + one int column per block; header rows in the metadata."""
+    pa = _pyarrow()
+    cols = {"coefficient": pa.array(table.coefficients, pa.string())}
+    for j, b in enumerate(table.indices):
+        cols[str(b)] = pa.array([row[j] for row in table.rows], pa.int64())
+    meta = {"season": table.label, "role_num": table.role_nums, "role_name": table.role_names}
+    pa_table = pa.table(cols).replace_schema_metadata({"ratings_export": json.dumps(meta)})
+    tmp = path.with_name(f".{path.name}.tmp")
+    pa.parquet.write_table(pa_table, tmp)
+    _swap_in(tmp, path)
+
+
+# ═════════════════════════ SOURCES ══════════════════════════════
+def load_ratings(src: Path) -> dict[str, Any]:
+    """Decoded player_ratings_data from a .jsb/.json file, a tree or an .fmf."""
+    # imported here: player_ratings_decoder's xlsx step only needs the writers above
+    from tree_decoder import decode_cached
+    from tree_diff import open_source
+
+    if src.suffix == ".json":
+        return json.loads(src.read_text("utf-8"))
+    if src.suffix == ".jsb":
+        return decode_cached("jsb", src.read_bytes())
+    source = open_source(src)
+    if RATINGS_REL not in source.sizes:
+        raise FileNotFoundError(f"no {RATINGS_REL} in {src}")
+    return decode_cached("jsb", source.read(RATINGS_REL))
+
+
+def export_name(src: Path) -> str:
+    """Mods ship the same file name, so a bare ratings file is named after its folder."""
+    if src.is_file() and src.stem == Path(RATINGS_REL).stem:
+        return src.resolve().parent.name
+    return src.stem if src.is_file() else src.name
+
+
+def _unique_names(sources: list[Path]) -> list[str]:
+    seen: dict[str, int] = {}
+    names = []
+    for src in sources:
+        base = export_name(src)
+        seen[base] = seen.get(base, 0) + 1
+        names.append(base if seen[base] == 1 else f"{base}_{seen[base]}")
+    return names
+
+
+def export_source(task: tuple[str, str, str, tuple[str, ...]]) -> tuple[str, list[str], str | None]:
+    """Worker: (src, name, out_dir, formats) → (src, written paths, error)."""
+    src, name, out_dir, formats = task
+    out, written = Path(out_dir), []
+    try:
+        tables = season_tables(load_ratings(Path(src)))
+        if "xlsx" in formats:
+            write_xlsx(tables, out / f"{name}.xlsx")
+            written.append(f"{name}.xlsx")
+        flat = [f for f in formats if f != "xlsx"]
+        if flat:
+            (out / name).mkdir(exist_ok=True)
+        for t in tables:
+            stem = t.label.replace(" ", "_")
+            if "csv" in flat:
+                write_csv(t, out / name / f"{stem}.csv")
+                written.append(f"{name}/{stem}.csv")
+            if "parquet" in flat:
+                write_parquet(t, out / name / f"{stem}.parquet")
+                written.append(f"{name}/{stem}.parquet")
+    except Exception as exc:
+        return src, written, f"{type(exc).__name__}: {exc}"
+    return src, written, None
+
+
+def export(sources: list[Path], out_dir: Path = EXPORT_DIR, formats: tuple[str, ...] = ("xlsx",),
+           workers: int | None = None, log=print) -> dict[str, int]:
+    if "parquet" in formats:
+        _pyarrow()                                      # fail before any work is done
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tasks = [(str(s), n, str(out_dir), tuple(formats)) for s, n in zip(sources, _unique_names(sources))]
+    workers = workers or os.cpu_count() or 1
+    stats = {"sources": len(tasks), "files": 0, "errors": 0}
+
+    def results():
+        if workers == 1 or len(tasks) <= 1:
+            yield from map(export_source, tasks)
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+                yield from pool.map(export_source, tasks)
+
+    for src, written, err in results():
+        stats["files"] += len(written)
+        stats["errors"] += err is not None
+        if log:
+            log(f"⚠️  {src}: {err}" if err else f"  {Path(src).name}  → {', '.join(written)}")
+    return stats
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main(argv: list[str]) -> None:
+    ap = argparse.ArgumentParser(description="Export every player_ratings season to xlsx / CSV / Parquet.")
+    ap.add_argument("sources", nargs="*", type=Path,
+                    help=".jsb/.json ratings files, simatch trees or .fmf archives "
+                         "(default: the clean player_ratings_data.jsb)")
+    ap.add_argument("-o", "--out", type=Path, default=EXPORT_DIR)
+    ap.add_argument("--csv", action="store_true", help="also write one CSV per season")
+    ap.add_argument("--parquet", action="store_true", help="also write one Parquet file per season")
+    ap.add_argument("--no-xlsx", action="store_true")
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    args = ap.parse_args(argv)
+
+    sources = args.sources or [ROOT_DIR / "src" / "clean_simatch" / RATINGS_REL]
+    formats = tuple(f for f, on in zip(FORMATS, (not args.no_xlsx, args.csv, args.parquet)) if on)
+    if not formats:
+        sys.exit("nothing to export – drop --no-xlsx or add --csv / --parquet")
+
+    t0 = time.perf_counter()
+    try:
+        stats = export(sources, args.out, formats, args.jobs)
+    except RuntimeError as exc:
+        sys.exit(f"⛔ {exc}")
+    print(f"✓ {stats['sources'] - stats['errors']}/{stats['sources']} source(s), {stats['files']} file(s) "
+          f"in {time.perf_counter() - t0:.2f}s → {args.out}")
+    if stats["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+sensitivity.py — design-of-experiments runner over editable parameters
+----------------------------------------------------------------------
+• A design file lists factors (physics keys, "<block>:<coefficient>"
+  ratings fields, weights jsb paths – the same names input_rules uses)
+  with an absolute range or a relative spread around the stock value:
+
+      {"method": "sobol", "samples": 256, "seed": 0,
+       "evaluators": ["kinematics", "ratings", "selection"],
+       "factors": [
+         {"input": "physics", "field": "sprint_speed", "min": 60000, "max": 75000},
+         {"input": "physics", "field": "*_walk_speed", "rel": 0.15},
+         {"input": "ratings", "field": "*:Passes Completed", "min": 5, "max": 20},
+         {"input": "weights", "field": "WEIGHTS[1].*TSF_REPUTATION", "rel": 0.5}]}
+
+  A field pattern may match several fields; they move together.
+• method "sobol": Saltelli design on a digitally shifted Sobol sequence,
+  N·(k+2) evaluations → first-order (S1) and total (ST) indices with
+  bootstrap 95 % intervals.  method "lhs": N Latin-hypercube rows →
+  standardised regression coefficients and Spearman rank correlations.
+• Each sample is built in memory on top of the clean tree and scored by
+  the offline evaluators in EVALUATORS:
+      kinematics  sprint/jog times, pass/shot/header flight times, recovery delays
+      ratings     expected match rating per position: QME mean stat line
+                  (qme_distribution_data, ability ~120) × ratings coefficients
+      selection   how the picking weights split between ability, fitness
+                  and reputation for the user and AI first-team picks
+• Samples are evaluated in a process pool in chunks; every finished chunk
+  is appended to results.jsonl, so an interrupted run resumes where it
+  stopped.
+
+python sensitivity.py <design.json> [-o out_dir] [-j N] [--fresh]
+"""
+
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from input_rules import VariantInputs, has_errors, match_field, validate_batch
+from jsb_codec import load_jsb
+
+# ───────────────────────── paths ────────────────────────────────
+ROOT_DIR        = Path(__file__).resolve().parent.parent
+SIMATCH_DIR     = ROOT_DIR / "src" / "clean_simatch"
+SENSITIVITY_OUT = ROOT_DIR / "sensitivity"
+
+CHUNK = 64
+BOOTSTRAP = 200
+REFERENCE_ABILITY = 120
+
+# Joe–Kuo direction numbers (s, a, m_1..m_s) for Sobol dimensions 2..21
+_SOBOL_TABLE = [
+    (1, 0, (1,)), (2, 1, (1, 3)), (3, 1, (1, 3, 1)), (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)), (4, 4, (1, 3, 5, 13)), (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)), (5, 7, (1, 1, 7, 11, 19)), (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)), (5, 14, (1, 3, 5, 5, 31)), (6, 1, (1, 3, 3, 9, 7, 49)),
+    (6, 13, (1, 1, 1, 15, 21, 21)), (6, 16, (1, 3, 1, 13, 27, 49)),
+    (6, 19, (1, 1, 1, 15, 7, 5)), (6, 22, (1, 3, 1, 15, 13, 25)),
+    (6, 25, (1, 1, 5, 5, 19, 61)), (7, 1, (1, 3, 7, 11, 23, 15, 103)),
+    (7, 4, (1, 3, 7, 13, 13, 15, 69)),
+]
+SOBOL_MAX_DIM = len(_SOBOL_TABLE) + 1
+
+
+# ═════════════════════════ SAMPLING ═════════════════════════════
+def sobol_points(n: int, dim: int, seed: int | None = None) -> np.ndarray:
+    """First *n* points (after the origin) of a *dim*-D Sobol sequence in [0, 1)."""
+    if dim > SOBOL_MAX_DIM:
+        raise ValueError(f"Sobol sequence limited to {SOBOL_MAX_DIM} dimensions")
+    bits = 32
+    v = np.zeros((dim, bits), np.uint64)
+    v[0] = 1 << (bits - 1 - np.arange(bits, dtype=np.uint64))
+    for d in range(1, dim):
+        s, a, m = _SOBOL_TABLE[d - 1]
+        row = [m[i] << (bits - 1 - i) for i in range(s)]
+        for i in range(s, bits):
+            x = row[i - s] ^ (row[i - s] >> s)
+            for k in range(1, s):
+                if (a >> (s - 1 - k)) & 1:
+                    x ^= row[i - k]
+            row.append(x)
+        v[d] = row
+    idx = np.arange(1, n + 1, dtype=np.uint64)
+    gray = idx ^ (idx >> np.uint64(1))
+    x = np.zeros((n, dim), np.uint64)
+    for j in range(bits):
+        on = ((gray >> np.uint64(j)) & np.uint64(1)).astype(bool)
+        x[on] ^= v[:, j]
+    if seed is not None:                                  # random digital shift
+        x ^= np.random.default_rng(seed).integers(0, 1 << bits, dim, dtype=np.uint64)
+    return x.astype(np.float64) / float(1 << bits)
+
+
+def latin_hypercube(n: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    perms = np.argsort(rng.random((dim, n)), axis=1).T
+    return (perms + rng.random((n, dim))) / n
+
+
+def saltelli_matrix(n: int, k: int, seed: int, log=print) -> np.ndarray:
+    """Rows [A, B, AB_1 … AB_k] stacked per block of *n* → shape (n·(k+2), k)."""
+    if 2 * k <= SOBOL_MAX_DIM:
+        base = sobol_points(n, 2 * k, seed)
+    else:
+        log(f"⚠️  {k} factors exceed the built-in Sobol table – using Latin-hypercube base matrices")
+        base = latin_hypercube(n, 2 * k, np.random.default_rng(seed))
+    a, b = base[:, :k], base[:, k:]
+    blocks = [a, b]
+    for i in range(k):
+        ab = a.copy()
+        ab[:, i] = b[:, i]
+        blocks.append(ab)
+    return np.vstack(blocks)
+
+
+# ═════════════════════════ CLEAN TREE ═══════════════════════════
+def _leaves(doc: Any, path: str = "") -> dict[str, Any]:
+    out: dict[str, Any] = {}
+    if isinstance(doc, dict):
+        for k, v in doc.items():
+            out.update(_leaves(v, f"{path}.{k}" if path else k))
+    elif isinstance(doc, list):
+        for i, v in enumerate(doc):
+            out.update(_leaves(v, f"{path}[{i}]"))
+    else:
+        out[path] = doc
+    return out
+
+
+@lru_cache(maxsize=1)
+def _clean() -> dict[str, Any]:
+    """Flat, per-process copies of every input the evaluators read."""
+    blocks = load_jsb(SIMATCH_DIR / "physics" / "physical_constraints.jsb")["version_array"]
+    season = load_jsb(SIMATCH_DIR / "player_ratings_data.jsb")["values"][0]
+    return {
+        "physics": [{k: v for k, v in b.items() if not isinstance(v, dict)} for b in blocks],
+        "ratings": {f"{i}:{c['name']}": c["value"]
+                    for i, block in enumerate(season["role_data"]) for c in block["coefficients"]},
+        "start_value": season["start_value"],
+        "weights": _leaves(load_jsb(SIMATCH_DIR / "weights.jsb")),
+    }
+
+
+@dataclass
+class Variant:
+    """One sample on top of the clean tree (flat maps, input_rules field names)."""
+    physics: list[dict[str, int]]      # one map per version_array block
+    ratings: dict[str, int]            # "<block>:<coefficient>" → value
+    start_value: int
+    weights: dict[str, int]            # jsb path → value
+
+
+# ═════════════════════════ FACTORS ══════════════════════════════
+@dataclass
+class Factor:
+    name: str
+    input: str
+    fields: list[str]
+    lo: float
+    hi: float
+    relative: bool
+
+    def value(self, u: float) -> float:
+        return self.lo + u * (self.hi - self.lo)
+
+
+def resolve_factors(specs: list[dict[str, Any]]) -> list[Factor]:
+    clean = _clean()
+    names = {"physics": list(clean["physics"][0]), "ratings": list(clean["ratings"]),
+             "weights": list(clean["weights"])}
+    out = []
+    for spec in specs:
+        kind, pattern = spec["input"], spec["field"]
+        if kind not in names:
+            raise ValueError(f"factor {pattern}: input must be physics, ratings or weights")
+        fields = [f for f in names[kind] if match_field(f, pattern)]
+        if not fields:
+            raise ValueError(f"factor {pattern}: matches no {kind} field")
+        if "rel" in spec:
+            lo, hi, rel = 1 - float(spec["rel"]), 1 + float(spec["rel"]), True
+        else:
+            lo, hi, rel = float(spec["min"]), float(spec["max"]), False
+        if not lo < hi:
+            raise ValueError(f"factor {pattern}: empty range")
+        out.append(Factor(spec.get("name", pattern), kind, fields, lo, hi, rel))
+    return out
+
+
+def build_variant(factors: list[Factor], u: np.ndarray) -> Variant:
+    clean = _clean()
+    v = Variant([dict(b) for b in clean["physics"]], dict(clean["ratings"]),
+                clean["start_value"], dict(clean["weights"]))
+    for f, x in zip(factors, u):
+        val = f.value(float(x))
+        maps = v.physics if f.input == "physics" else [v.ratings if f.input == "ratings" else v.weights]
+        for m in maps:
+            for field in f.fields:
+                m[field] = int(round(m[field] * val if f.relative else val))
+    return v
+
+
+# ═════════════════════════ EVALUATORS ═══════════════════════════
+def _time_to(d: float, accel: float, vmax: float) -> float:
+    """Seconds to cover *d* m from rest, constant *accel* up to *vmax*."""
+    d_acc = vmax * vmax / (2 * accel)
+    if d <= d_acc:
+        return (2 * d / accel) ** 0.5
+    return vmax / accel + (d - d_acc) / vmax
+
+
+def eval_kinematics(v: Variant) -> dict[str, float]:
+    p = v.physics[0]
+    sc, ac = p["speed_scaler"], p["acceleration_scaler"]
+    accel = max(p["theoretical_max_acceleration"] / ac, 1e-6)
+    receive = [x for k, x in p.items() if k.startswith("min_delay_for_") and k.endswith("_receive")]
+    keeper = [x for k, x in p.items() if k.startswith("min_delay_keeper_")]
+    return {
+        "sprint_10m_s": _time_to(10, accel, max(p["sprint_speed"] / sc, 1e-6)),
+        "sprint_30m_s": _time_to(30, accel, max(p["sprint_speed"] / sc, 1e-6)),
+        "jog_30m_s": _time_to(30, accel, max(p["jog_speed"] / sc, 1e-6)),
+        "walk_speed_ms": p["walk_speed"] / sc,
+        "top_speed_ms": p["top_speed"] / sc,
+        "pass_20m_s": 20 / max(p["medium_kick_speed"] / sc, 1e-6),
+        "shot_20m_s": 20 / max(p["hard_kick_speed"] / sc, 1e-6),
+        "header_10m_s": 10 / max(p["basic_header_speed"] / sc, 1e-6),
+        "tackle_recovery_ms": float(np.mean(receive)),
+        "keeper_recovery_ms": float(np.mean(keeper)),
+    }
+
+
+# QME position → player_ratings role_data block (role names: player_ratings_data.xlsx row 3)
+POSITION_BLOCKS = {
+    "goalkeeper": 0, "defender_centre": 1, "defender_left": 2, "defender_right": 2,
+    "wingback_left": 3, "wingback_right": 3, "defensive_midfielder": 4,
+    "midfielder_centre": 5, "midfielder_left": 6, "midfielder_right": 6,
+    "attacking_midfielder_left": 7, "attacking_midfielder_right": 7,
+    "attacking_midfielder_centre": 8, "attacker_centre": 10,
+}
+QME_COUNTS = {
+    "key_passes": "Key Passes", "interceptions": "Interceptions", "clearances": "Clearances",
+    "blocks": "Blocks", "dribbles": "Dribbles", "fouls_made": "Fouls Committed",
+}
+QME_PAIRS = [   # attempts, completion rate, coefficient on success, on failure
+    ("passes_attempted", "pass_completion", "Passes Completed", "Passes Incomplete"),
+    ("crosses_attempted", "cross_completion", "Crosses Completed", "Crosses Incompleted"),
+    ("tackles_attempted", "tackle_completion", "Tackles Won", "Tackles Lost"),
+    ("headers_attempted", "header_completion", "Aerial Duels Won", "Aerial Duels Lost"),
+]
+
+
+@lru_cache(maxsize=1)
+def qme_stat_lines() -> dict[str, dict[str, float]]:
+    """Mean per-match stat line per QME position at REFERENCE_ABILITY."""
+    sums: dict[tuple[str, str], list[float]] = {}
+    for d in load_jsb(SIMATCH_DIR / "qme_distribution_data.jsb"):
+        lo, hi = d["ability_window"]
+        if not lo <= REFERENCE_ABILITY <= hi:
+            continue
+        kind, mean = d["distribution_type"], d["mean"]
+        if kind == "binned":                       # 10 bins over [0, 1]
+            mean = sum(p * (i + 0.5) / len(mean) for i, p in enumerate(mean))
+        elif kind == "zero":
+            mean = 0.0
+        sums.setdefault((d["position"], d["stat_type"]), []).append(float(mean))
+    lines: dict[str, dict[str, float]] = {}
+    for (pos, stat), vals in sums.items():
+        lines.setdefault(pos, {})[stat] = sum(vals) / len(vals)
+    return lines
+
+
+def eval_ratings(v: Variant) -> dict[str, float]:
+    out = {}
+    for pos, line in qme_stat_lines().items():
+        block = POSITION_BLOCKS.get(pos)
+        if block is None:
+            continue
+        coef = lambda name: v.ratings.get(f"{block}:{name}", 0)  # noqa: E731
+        score = v.start_value + coef("90min Adjuster")
+        for stat, name in QME_COUNTS.items():
+            score += line.get(stat, 0.0) * coef(name)
+        for att, rate, good, bad in QME_PAIRS:
+            n, r = line.get(att, 0.0), line.get(rate, 0.0)
+            score += n * r * coef(good) + n * (1 - r) * coef(bad)
+        out[pos] = score / 1000
+    return out
+
+
+SELECTION_GROUPS = {
+    "ability": ("TSF_CA", "TSF_POSITION_ABILITY", "TSF_POSITION_ABILITY_IN_ROLE",
+                "TSF_POSITION_TACTICAL_FAMILARITY"),
+    "fitness": ("TSF_CONDITION", "TSF_MATCH_FITNESS", "TSF_BOOST_LOW_MATCH_FITNESS"),
+    "reputation": ("TSF_REPUTATION", "TSF_STAR_PLAYER", "TSF_INTERNATIONAL_CAPS"),
+}
+
+
+def eval_selection(v: Variant) -> dict[str, float]:
+    out = {}
+    for block, who in ((0, "user"), (1, "ai")):
+        prefix = f"WEIGHTS[{block}].TEAM_PICKING_STYLE::TPS_FIRST_TEAM_PICKING."
+        w = {k[len(prefix):].rsplit("::", 1)[-1]: x for k, x in v.weights.items() if k.startswith(prefix)}
+        total = sum(abs(x) for x in w.values()) or 1
+        for group, keys in SELECTION_GROUPS.items():
+            out[f"{who}_{group}_share"] = sum(w.get(k, 0) for k in keys) / total
+    return out
+
+
+EVALUATORS: dict[str, Callable[[Variant], dict[str, float]]] = {
+    "kinematics": eval_kinematics,
+    "ratings": eval_ratings,
+    "selection": eval_selection,
+}
+
+
+def evaluate(v: Variant, names: list[str]) -> dict[str, float]:
+    out = {}
+    for name in names:
+        for metric, x in EVALUATORS[name](v).items():
+            out[f"{name}.{metric}"] = float(x)
+    return out
+
+
+def _run_chunk(task: tuple[list[dict], list[str], list[int], np.ndarray]) -> list[tuple[int, dict]]:
+    specs, names, rows, unit = task
+    factors = resolve_factors(specs)
+    return [(r, evaluate(build_variant(factors, u), names)) for r, u in zip(rows, unit)]
+
+
+# ═════════════════════════ INDICES ══════════════════════════════
+def sobol_indices(y: np.ndarray, n: int, k: int, seed: int = 0) -> dict[str, np.ndarray]:
+    """Saltelli (2010) first-order and Jansen total-effect estimators."""
+    fa, fb = y[:n], y[n:2 * n]
+    fab = y[2 * n:].reshape(k, n)
+
+    def est(idx: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        a, b, ab = fa[idx], fb[idx], fab[:, idx]
+        var = np.var(np.concatenate([a, b]))
+        if var <= 1e-24 * max(1.0, float(np.mean(a)) ** 2):      # constant output
+            return np.zeros(k), np.zeros(k)
+        s1 = np.mean(b * (ab - a), axis=1) / var
+        st = 0.5 * np.mean((a - ab) ** 2, axis=1) / var
+        return s1, st
+
+    s1, st = est(np.arange(n))
+    rng = np.random.default_rng(seed)
+    boot = [est(rng.integers(0, n, n)) for _ in range(BOOTSTRAP)]
+    z = 1.96
+    return {"S1": s1, "S1_conf": z * np.std([b[0] for b in boot], axis=0),
+            "ST": st, "ST_conf": z * np.std([b[1] for b in boot], axis=0)}
+
+
+def _ranks(a: np.ndarray) -> np.ndarray:
+    return np.argsort(np.argsort(a, axis=0), axis=0).astype(float)
+
+
+def regression_indices(x: np.ndarray, y: np.ndarray) -> dict[str, np.ndarray]:
+    """Standardised regression coefficients (+R²) and Spearman correlations."""
+    k = x.shape[1]
+    if np.std(y) <= 1e-12 * max(1.0, abs(float(np.mean(y)))):
+        return {"SRC": np.zeros(k), "R2": np.array(0.0), "spearman": np.zeros(k)}
+    xs = (x - x.mean(0)) / x.std(0)
+    ys = (y - y.mean()) / y.std()
+    coef, *_ = np.linalg.lstsq(xs, ys, rcond=None)
+    r2 = 1 - np.sum((ys - xs @ coef) ** 2) / np.sum(ys ** 2)
+    rx, ry = _ranks(x), _ranks(y[:, None])[:, 0]
+    rho = np.array([np.corrcoef(rx[:, i], ry)[0, 1] for i in range(k)])
+    return {"SRC": coef, "R2": np.array(r2), "spearman": rho}
+
+
+# ═════════════════════════ RUNNER ═══════════════════════════════
+def design_hash(design: dict[str, Any]) -> str:
+    return hashlib.blake2b(json.dumps(design, sort_keys=True).encode(), digest_size=12).hexdigest()
+
+
+def unit_samples(design: dict[str, Any], k: int, log=print) -> np.ndarray:
+    n, seed = int(design.get("samples", 256)), int(design.get("seed", 0))
+    method = design.get("method", "sobol")
+    if method == "sobol":
+        return saltelli_matrix(n, k, seed, log)
+    if method == "lhs":
+        return latin_hypercube(n, k, np.random.default_rng(seed))
+    raise ValueError(f"unknown method '{method}' (sobol | lhs)")
+
+
+def _check_samples(factors: list[Factor], unit: np.ndarray, log) -> None:
+    """Report samples the build would reject (input_rules) – they still get scored."""
+    batch = []
+    for i, u in enumerate(unit):
+        v = build_variant(factors, u)
+        inp = VariantInputs(str(i))
+        for f in factors:
+            src = v.physics[0] if f.input == "physics" else v.ratings if f.input == "ratings" else v.weights
+            edits = {fld: src[fld] for fld in f.fields}
+            if f.input == "physics":
+                inp.physics = {**(inp.physics or {}), **edits}
+            elif f.input == "ratings":
+                inp.ratings = inp.ratings or {}
+                for fld, x in edits.items():
+                    b, name = fld.split(":", 1)
+                    inp.ratings.setdefault(int(b), {})[name] = x
+            else:
+                inp.weights = {**(inp.weights or {}), **edits}
+        batch.append(inp)
+    bad = [found for found in validate_batch(batch).values() if has_errors(found)]
+    if bad:
+        first = next(i for i in bad[0] if i.severity == "error")
+        log(f"⚠️  {len(bad)}/{len(batch)} samples violate input_rules (e.g. {first}) – "
+            "consider narrowing the ranges")
+
+
+def run_design(design_path: Path, out_dir: Path | None = None, workers: int | None = None,
+               fresh: bool = False, log=print) -> dict[str, Any]:
+    design = json.loads(Path(design_path).read_text("utf-8"))
+    out_dir = Path(out_dir or SENSITIVITY_OUT / Path(design_path).stem)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    names = design.get("evaluators") or list(EVALUATORS)
+    unknown = [n for n in names if n not in EVALUATORS]
+    if unknown:
+        raise ValueError(f"unknown evaluator(s) {unknown}; available: {list(EVALUATORS)}")
+
+    factors = resolve_factors(design["factors"])
+    k = len(factors)
+    unit = unit_samples(design, k, log)
+    h = design_hash(design)
+
+    # ---- checkpoint -----------------------------------------------
+    meta_path, results_path = out_dir / "design.json", out_dir / "results.jsonl"
+    if meta_path.exists() and not fresh:
+        if json.loads(meta_path.read_text("utf-8")).get("hash") != h:
+            raise ValueError(f"{out_dir} holds results of a different design – use --fresh")
+    else:
+        results_path.unlink(missing_ok=True)
+        meta_path.write_text(json.dumps({"hash": h, "design": design}, indent=2), "utf-8")
+        _check_samples(factors, unit, log)
+
+    done: dict[int, dict[str, float]] = {}
+    if results_path.exists():
+        for line in results_path.read_text("utf-8").splitlines():
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:              # torn last line from a crash
+                continue
+            done[rec["row"]] = rec["y"]
+    todo = [r for r in range(len(unit)) if r not in done]
+    log(f"  {len(unit)} evaluations, {len(done)} from checkpoint, {len(todo)} to run")
+
+    tasks = [(design["factors"], names, todo[i:i + CHUNK], unit[todo[i:i + CHUNK]])
+             for i in range(0, len(todo), CHUNK)]
+    workers = workers or os.cpu_count() or 1
+    with open(results_path, "a", encoding="utf-8") as fh:
+        def record(chunk: list[tuple[int, dict]]) -> None:
+            for row, y in chunk:
+                done[row] = y
+                fh.write(json.dumps({"row": row, "y": y}) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+
+        if workers == 1 or len(tasks) <= 1:
+            for t in tasks:
+                record(_run_chunk(t))
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+                for fut in as_completed([pool.submit(_run_chunk, t) for t in tasks]):
+                    record(fut.result())
+
+    # ---- indices --------------------------------------------------
+    metrics = sorted(done[0])
+    y_all = np.array([[done[r][m] for m in metrics] for r in range(len(unit))])
+    n = int(design.get("samples", 256))
+    report: dict[str, Any] = {"method": design.get("method", "sobol"), "evaluations": len(unit),
+                              "factors": [f.name for f in factors], "indices": {}}
+    x = np.array([[f.value(u) for f, u in zip(factors, row)] for row in unit])
+    for j, metric in enumerate(metrics):
+        y = y_all[:, j]
+        if report["method"] == "sobol":
+            idx = sobol_indices(y, n, k, int(design.get("seed", 0)))
+        else:
+            idx = regression_indices(x, y)
+        report["indices"][metric] = {key: val.tolist() for key, val in idx.items()}
+        report["indices"][metric]["mean"] = float(y.mean())
+        report["indices"][metric]["std"] = float(y.std())
+    (out_dir / "indices.json").write_text(json.dumps(report, indent=2), "utf-8")
+    return report
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main(argv: list[str]) -> None:
+    ap = argparse.ArgumentParser(description="Sensitivity analysis over editable engine parameters.")
+    ap.add_argument("design", type=Path)
+    ap.add_argument("-o", "--out", type=Path, default=None)
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    ap.add_argument("--fresh", action="store_true", help="discard the checkpoint and start over")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    report = run_design(args.design, args.out, args.jobs, args.fresh)
+    main_key = "ST" if report["method"] == "sobol" else "SRC"
+    names = report["factors"]
+    for metric, idx in report["indices"].items():
+        if idx["std"] <= 1e-12 * max(1.0, abs(idx["mean"])):
+            continue                                  # metric untouched by these factors
+        ranked = sorted(zip(names, idx[main_key]), key=lambda t: -abs(t[1]))[:3]
+        print(f"  {metric:<42} " + "  ".join(f"{n}={v:+.2f}" for n, v in ranked))
+    out = args.out or SENSITIVITY_OUT / args.design.stem
+    print(f"✓ {report['evaluations']} evaluations, {main_key} indices → {out / 'indices.json'} "
+          f"({time.perf_counter() - t0:.1f}s)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
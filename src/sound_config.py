@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+events/match_sounds.cfg  →  alias-table sampler + pre-cache manifest
+--------------------------------------------------------------------
+• parse_sound_config() reads the comment-headed CSV
+      id, "filename", loop flag, sound type, chance, pre-cache flag
+  keeping every comment / blank line so write_sound_config() reproduces
+  an unedited file byte-for-byte (edited rows are re-aligned with tabs).
+• SoundSampler packs one Walker/Vose alias table per sound id into flat
+  NumPy arrays: picking a file for N events costs O(N) total, O(1) each,
+  however many variants an id has.
+• precache_manifest() lists the files flagged for pre-caching, grouped by
+  sound type name.
+
+python sound_config.py   → match_sounds_precache.json (+ summary)
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+import json
+import sys
+
+import numpy as np
+
+# ───────────────────────── paths ────────────────────────────────
+ROOT_DIR       = Path(__file__).resolve().parent.parent
+SOUNDS_CFG     = ROOT_DIR / "src" / "clean_simatch" / "events" / "match_sounds.cfg"
+PRECACHE_OUT   = ROOT_DIR / "match_sounds_precache.json"
+
+SOUND_TYPES = {
+    0: "MST_BACKGROUND",
+    1: "MST_CROWD",
+    2: "MST_PITCH_EVENT",
+    3: "MST_REF_EVENTS",
+    4: "MST_OPP_CROWD",
+    5: "MST_BACKGROUND_OPP_CROWD",
+}
+
+# column stops used by SI's file (tab width 4)
+_TAB = 4
+_FILE_COL = 48
+_FLAGS_COL = 88
+
+
+def sound_type_name(code: int) -> str:
+    return SOUND_TYPES.get(code, f"MST_{code}")      # 7 is used but undocumented
+
+
+# ───────────────────── data structures ──────────────────────────
+@dataclass
+class SoundEntry:
+    sound_id: str
+    filename: str                   # without .wav
+    loop: int
+    sound_type: int
+    chance: int
+    precache: int
+
+    def fields(self) -> tuple:
+        return (self.sound_id, self.filename, self.loop, self.sound_type,
+                self.chance, self.precache)
+
+
+@dataclass
+class SoundConfig:
+    """Parsed match_sounds.cfg; *lines* holds raw text or an entry index."""
+
+    entries: list[SoundEntry] = field(default_factory=list)
+    lines: list[str | int] = field(default_factory=list)
+    raw: dict[int, tuple[tuple, str]] = field(default_factory=dict)
+
+    def by_id(self) -> dict[str, list[int]]:
+        out: dict[str, list[int]] = {}
+        for i, e in enumerate(self.entries):
+            out.setdefault(e.sound_id, []).append(i)
+        return out
+
+    def add(self, entry: SoundEntry) -> None:
+        """Append a new row after the last row with the same id (or at the end)."""
+        self.entries.append(entry)
+        idx = len(self.entries) - 1
+        last = max((n for n, ln in enumerate(self.lines)
+                    if isinstance(ln, int) and self.entries[ln].sound_id == entry.sound_id),
+                   default=len(self.lines) - 1)
+        self.lines.insert(last + 1, idx)
+
+
+# ═════════════════════════ PARSER ═══════════════════════════════
+def parse_entry(line: str) -> SoundEntry:
+    parts = [p.strip() for p in line.split(",")]
+    if len(parts) != 6:
+        raise ValueError(f"expected 6 fields, got {len(parts)}: {line!r}")
+    sid, fname, *nums = parts
+    loop, typ, chance, pre = (int(n) for n in nums)
+    return SoundEntry(sid, fname.strip('"'), loop, typ, chance, pre)
+
+
+def parse_sound_config(text: str) -> SoundConfig:
+    cfg = SoundConfig()
+    for n, line in enumerate(text.split("\n"), 1):
+        body = line.strip()
+        if not body or body.startswith("#"):
+            cfg.lines.append(line)
+            continue
+        try:
+            entry = parse_entry(body)
+        except ValueError as exc:
+            raise ValueError(f"match_sounds.cfg line {n}: {exc}") from None
+        cfg.entries.append(entry)
+        idx = len(cfg.entries) - 1
+        cfg.raw[idx] = (entry.fields(), line)
+        cfg.lines.append(idx)
+    return cfg
+
+
+def load_sound_config(path: Path = SOUNDS_CFG) -> SoundConfig:
+    return parse_sound_config(Path(path).read_bytes().decode("utf-8"))
+
+
+# ═════════════════════════ WRITER ═══════════════════════════════
+def _pad(text: str, col: int) -> str:
+    width = len(text)
+    tabs = max(1, -(-(col - width) // _TAB)) if width < col else 1
+    return text + "\t" * tabs
+
+
+def format_entry(e: SoundEntry) -> str:
+    return (_pad(f"{e.sound_id},", _FILE_COL)
+            + _pad(f'"{e.filename}",', _FLAGS_COL - _FILE_COL)
+            + f"{e.loop}, {e.sound_type}, {e.chance}, {e.precache}")
+
+
+def write_sound_config(cfg: SoundConfig) -> str:
+    """Unedited rows keep their original text; edited/new rows are re-aligned."""
+    out = []
+    for line in cfg.lines:
+        if isinstance(line, str):
+            out.append(line)
+            continue
+        entry = cfg.entries[line]
+        orig = cfg.raw.get(line)
+        out.append(orig[1] if orig and orig[0] == entry.fields() else format_entry(entry))
+    return "\n".join(out)
+
+
+def save_sound_config(cfg: SoundConfig, path: Path) -> None:
+    Path(path).write_bytes(write_sound_config(cfg).encode("utf-8"))
+
+
+# ═════════════════════ ALIAS-TABLE SAMPLER ══════════════════════
+def alias_table(weights: Iterable[float]) -> tuple[np.ndarray, np.ndarray]:
+    """Vose's alias method → (prob float64 [n], alias int32 [n])."""
+    w = np.asarray(list(weights), np.float64)
+    n = w.size
+    if n == 0:
+        raise ValueError("alias table needs at least one weight")
+    if (w < 0).any():
+        raise ValueError("negative chance")
+    total = w.sum()
+    scaled = w * n / total if total > 0 else np.ones(n)
+    prob = np.ones(n)
+    alias = np.arange(n, dtype=np.int32)
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s], alias[s] = scaled[s], l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    return prob, alias
+
+
+@dataclass
+class SoundSampler:
+    """
+    Flat alias tables for every sound id.
+
+    ids     : sound id per code (code = position in this list)
+    offset  : int64 [I]  first slot of each id in prob / alias / entry
+    count   : int64 [I]  number of variants per id
+    prob    : float64 [T], alias : int64 [T] (absolute slot), entry : int64 [T]
+    """
+
+    ids: list[str]
+    offset: np.ndarray
+    count: np.ndarray
+    prob: np.ndarray
+    alias: np.ndarray
+    entry: np.ndarray
+
+    def codes(self, sound_ids: Iterable[str]) -> np.ndarray:
+        lookup = {sid: i for i, sid in enumerate(self.ids)}
+        return np.fromiter((lookup[s] for s in sound_ids), np.int64)
+
+    def sample(self, codes: np.ndarray, rng: np.random.Generator | None = None) -> np.ndarray:
+        """Pick one config-entry index per id code, weighted by chance."""
+        rng = rng or np.random.default_rng()
+        codes = np.asarray(codes, np.int64)
+        u = rng.random(codes.shape) * self.count[codes]
+        k = u.astype(np.int64)
+        slot = self.offset[codes] + k
+        take = (u - k) < self.prob[slot]
+        return self.entry[np.where(take, slot, self.alias[slot])]
+
+    def sample_one(self, sound_id: str, rng: np.random.Generator | None = None) -> int:
+        return int(self.sample(self.codes([sound_id]), rng)[0])
+
+
+def build_sampler(cfg: SoundConfig) -> SoundSampler:
+    groups = cfg.by_id()
+    ids = list(groups)
+    count = np.array([len(groups[s]) for s in ids], np.int64)
+    offset = np.concatenate(([0], np.cumsum(count)[:-1])).astype(np.int64)
+    total = int(count.sum())
+    prob, alias, entry = np.empty(total), np.empty(total, np.int64), np.empty(total, np.int64)
+    for sid, off in zip(ids, offset):
+        members = groups[sid]
+        p, a = alias_table(cfg.entries[i].chance for i in members)
+        prob[off : off + len(members)] = p
+        alias[off : off + len(members)] = a + off
+        entry[off : off + len(members)] = members
+    return SoundSampler(ids, offset, count, prob, alias, entry)
+
+
+def expected_frequencies(cfg: SoundConfig) -> np.ndarray:
+    """Per-entry selection probability within its id (float64 [entries])."""
+    out = np.zeros(len(cfg.entries))
+    for members in cfg.by_id().values():
+        w = np.array([cfg.entries[i].chance for i in members], np.float64)
+        out[members] = w / w.sum() if w.sum() > 0 else 1.0 / len(members)
+    return out
+
+
+# ═════════════════════ PRE-CACHE MANIFEST ═══════════════════════
+def precache_manifest(cfg: SoundConfig) -> dict[str, list[str]]:
+    """{sound type name: sorted unique filenames flagged for pre-caching}"""
+    out: dict[str, set[str]] = {}
+    for e in cfg.entries:
+        if e.precache:
+            out.setdefault(sound_type_name(e.sound_type), set()).add(e.filename)
+    return {k: sorted(out[k]) for k in sorted(out)}
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main() -> None:
+    if not SOUNDS_CFG.exists():
+        sys.exit(f"Sound config not found: {SOUNDS_CFG}")
+    cfg = load_sound_config(SOUNDS_CFG)
+    manifest = precache_manifest(cfg)
+    PRECACHE_OUT.write_text(json.dumps(manifest, indent=2), "utf-8")
+    sampler = build_sampler(cfg)
+    print(f"✓ Parsed {len(cfg.entries)} sounds ({len(sampler.ids)} ids)")
+    for typ, files in manifest.items():
+        print(f"  {typ:<26} {len(files):>3} pre-cached")
+    print(f"  → {PRECACHE_OUT.name}")
+
+
+if __name__ == "__main__":
+    main()
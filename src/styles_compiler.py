@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+tactics/styles.xml  ⇄  compiled (style × attribute) min/max tables
+------------------------------------------------------------------
+• compile_styles() streams styles.xml ONCE (XMLPullParser, comments kept
+  for the attribute names) into a StyleTable:
+      mins / maxs   int16 [S, A]   one row per tactical style,
+      present       bool  [S, A]   one column per template record id
+  Works for both  attribute_template  and  tendency_template.
+• write_styles_xml() patches the min/max values back into the original
+  text – BOM, tabs, comments and every other list are left untouched, so
+  compile → write is byte-identical.
+• validate() / classify() check thousands of attribute vectors against the
+  table in a few NumPy ops instead of walking the XML per vector.
+
+A value of -1 for both min and max (DIRTINESS_ALLOWANCE in stock files)
+means "not constrained" and never counts as a violation.
+
+python styles_compiler.py           → decode  styles.xml → styles_templates.json
+python styles_compiler.py encode    → encode  JSON → styles.xml (patched copy)
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+import json
+import re
+import sys
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+# ───────────────────────── paths ────────────────────────────────
+ROOT_DIR    = Path(__file__).resolve().parent.parent
+STYLES_XML  = ROOT_DIR / "src" / "clean_simatch" / "tactics" / "styles.xml"
+STYLES_JSON = ROOT_DIR / "styles_templates.json"
+STYLES_OUT  = ROOT_DIR / "styles.xml"
+
+TEMPLATES = ("attribute_template", "tendency_template")
+UNSET = -1
+_CHUNK = 1 << 16
+
+
+# ───────────────────── data structures ──────────────────────────
+@dataclass
+class StyleTable:
+    """Dense view of one template list across every tactical style."""
+
+    template: str
+    styles: list[str]               # tactical_style_id (folder if missing)
+    record_ids: list[int]           # <record id> of each style
+    attributes: list[int]           # template record ids (columns)
+    names: list[str]                # comment label of each column
+    mins: np.ndarray                # int16 [S, A]
+    maxs: np.ndarray                # int16 [S, A]
+    present: np.ndarray             # bool  [S, A] – style lists this record
+
+    @property
+    def constrained(self) -> np.ndarray:
+        """Cells that actually limit the value (present and not -1/-1)."""
+        return self.present & ~((self.mins == UNSET) & (self.maxs == UNSET))
+
+    def column(self, attr: int | str) -> int:
+        if isinstance(attr, str):
+            return self.names.index(attr)
+        return self.attributes.index(attr)
+
+    def row(self, style: int | str) -> int:
+        if isinstance(style, str):
+            return self.styles.index(style)
+        return style
+
+    def get(self, style: int | str, attr: int | str) -> tuple[int, int]:
+        s, a = self.row(style), self.column(attr)
+        return int(self.mins[s, a]), int(self.maxs[s, a])
+
+    def set(self, style: int | str, attr: int | str, lo: int, hi: int) -> None:
+        """Change an existing record; new records cannot be written back."""
+        s, a = self.row(style), self.column(attr)
+        if not self.present[s, a]:
+            raise KeyError(f"{self.styles[s]} has no {self.template} record {self.names[a]}")
+        self.mins[s, a], self.maxs[s, a] = lo, hi
+
+
+# ═════════════════════════ COMPILER ═════════════════════════════
+def _iter_events(src: Path | bytes) -> Iterable[tuple[str, Any]]:
+    parser = ET.XMLPullParser(events=("start", "end", "comment"))
+    if isinstance(src, (bytes, bytearray)):
+        parser.feed(src)
+        yield from parser.read_events()
+    else:
+        with open(src, "rb") as fh:
+            while chunk := fh.read(_CHUNK):
+                parser.feed(chunk)
+                yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+
+def compile_styles(src: Path | bytes = STYLES_XML, template: str = "attribute_template") -> StyleTable:
+    """Stream *src* (path or raw bytes) into a StyleTable for *template*."""
+    cells: dict[tuple[int, int], list[int]] = {}
+    styles: list[str] = []
+    record_ids: list[int] = []
+    names: dict[int, str] = {}
+
+    depth = 0
+    style_row = -1
+    in_template = False
+    attr: int | None = None
+    label: str | None = None
+
+    for event, elem in _iter_events(src):
+        if event == "comment":
+            label = (elem.text or "").strip()
+            continue
+        if event == "start":
+            depth += 1
+            if depth == 2 and elem.tag == "record":
+                styles.append(elem.get("tactical_style_id") or elem.get("folder", "").upper())
+                record_ids.append(int(elem.get("id")))
+                style_row = len(styles) - 1
+            elif depth == 3 and elem.tag == "list":
+                in_template = elem.get("id") == template
+            elif in_template and depth == 4 and elem.tag == "record":
+                attr = int(elem.get("id"))
+                names.setdefault(attr, label or f"#{attr}")
+                cells[style_row, attr] = [UNSET, UNSET]
+            elif attr is not None and elem.tag == "integer" and elem.get("id") in ("min", "max"):
+                cells[style_row, attr][elem.get("id") == "max"] = int(elem.get("value"))
+            continue
+
+        # "end"
+        if depth == 3 and elem.tag == "list":
+            in_template = False
+        elif depth == 4 and elem.tag == "record":
+            attr, label = None, None
+        elif depth == 2:
+            elem.clear()                    # keep memory flat on big files
+        depth -= 1
+
+    used = sorted({s for s, _ in cells})
+    remap = {s: i for i, s in enumerate(used)}
+    attributes = list(names)
+    col = {a: i for i, a in enumerate(attributes)}
+
+    shape = (len(used), len(attributes))
+    table = StyleTable(
+        template, [styles[s] for s in used], [record_ids[s] for s in used],
+        attributes, [names[a] for a in attributes],
+        np.full(shape, UNSET, np.int16), np.full(shape, UNSET, np.int16), np.zeros(shape, bool),
+    )
+    for (s, a), (lo, hi) in cells.items():
+        idx = remap[s], col[a]
+        table.mins[idx], table.maxs[idx], table.present[idx] = lo, hi, True
+    return table
+
+
+# ═════════════════════════ WRITER ═══════════════════════════════
+_TOKEN = re.compile(
+    r'<record id="(?P<style>-?\d+)" folder='
+    r'|<list id="(?P<list>[^"]+)">'
+    r'|</list>'
+    r'|<record id="(?P<attr>-?\d+)">'
+    r'|<integer id="(?P<bound>min|max)" value="(?P<value>-?\d+)"'
+)
+
+
+def write_styles_xml(tables: StyleTable | Sequence[StyleTable], source: str) -> str:
+    """Return *source* (styles.xml text) with every table's min/max patched in."""
+    if isinstance(tables, StyleTable):
+        tables = [tables]
+    by_list = {
+        t.template: {
+            (rid, a): (int(t.mins[s, i]), int(t.maxs[s, i]))
+            for s, rid in enumerate(t.record_ids)
+            for i, a in enumerate(t.attributes)
+            if t.present[s, i]
+        }
+        for t in tables
+    }
+    state: dict[str, Any] = {"style": None, "list": None, "attr": None}
+
+    def repl(m: re.Match) -> str:
+        if m["style"] is not None:
+            state.update(style=int(m["style"]), list=None, attr=None)
+        elif m["list"] is not None:
+            state["list"] = m["list"]
+        elif m[0] == "</list>":
+            state.update(list=None, attr=None)
+        elif m["attr"] is not None:
+            state["attr"] = int(m["attr"]) if state["list"] in by_list else None
+        elif state["attr"] is not None:
+            cell = by_list[state["list"]].get((state["style"], state["attr"]))
+            if cell is not None:
+                value = cell[m["bound"] == "max"]
+                return f'<integer id="{m["bound"]}" value="{value}"'
+        return m[0]
+
+    return _TOKEN.sub(repl, source)
+
+
+# ═════════════════════ BATCH VALIDATION ═════════════════════════
+def vectors_from_dicts(table: StyleTable, rows: Iterable[dict[str, float]]) -> np.ndarray:
+    """{attribute name: value} rows → float [N, A]; missing attributes are NaN."""
+    col = {n: i for i, n in enumerate(table.names)}
+    rows = list(rows)
+    out = np.full((len(rows), len(table.attributes)), np.nan)
+    for r, row in enumerate(rows):
+        for name, value in row.items():
+            out[r, col[name]] = value
+    return out
+
+
+def _overshoot(table: StyleTable, x: np.ndarray, rows: np.ndarray | slice) -> np.ndarray:
+    """How far each value lies outside its style's range (0 inside / NaN / unconstrained)."""
+    lo, hi = table.mins[rows].astype(np.float64), table.maxs[rows].astype(np.float64)
+    with np.errstate(invalid="ignore"):
+        d = np.maximum(lo - x, 0.0) + np.maximum(x - hi, 0.0)
+    return np.where(table.constrained[rows] & ~np.isnan(x), d, 0.0)
+
+
+def validate(table: StyleTable, vectors: np.ndarray,
+             styles: np.ndarray | Sequence[int | str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Check vectors [N, A] against their claimed styles (N row indices or names).
+    Returns (ok bool [N], violations bool [N, A]).
+    """
+    x = np.asarray(vectors, np.float64)
+    if isinstance(styles, np.ndarray) and styles.dtype.kind in "iu":
+        rows = styles
+    else:
+        rows = np.fromiter((table.row(s) for s in styles), np.int64, len(styles))
+    bad = _overshoot(table, x, rows) > 0
+    return ~bad.any(axis=1), bad
+
+
+def classify(table: StyleTable, vectors: np.ndarray,
+             chunk: int = 4096) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Score vectors [N, A] against every style.
+    Returns (best style row int [N], distance float [N, S]); distance is the
+    summed out-of-range amount, so 0 means the vector fits that style.
+    """
+    x = np.asarray(vectors, np.float64)
+    dist = np.empty((x.shape[0], len(table.styles)))
+    for start in range(0, x.shape[0], chunk):
+        block = x[start : start + chunk, None, :]                    # [n, 1, A]
+        dist[start : start + chunk] = _overshoot(table, block, slice(None)).sum(axis=2)
+    return dist.argmin(axis=1), dist
+
+
+# ───────────────────── editable JSON form ───────────────────────
+def table_to_json(table: StyleTable) -> dict[str, dict[str, list[int]]]:
+    return {
+        style: {
+            table.names[a]: [int(table.mins[s, a]), int(table.maxs[s, a])]
+            for a in range(len(table.attributes)) if table.present[s, a]
+        }
+        for s, style in enumerate(table.styles)
+    }
+
+
+def apply_json(table: StyleTable, doc: dict[str, dict[str, list[int]]]) -> None:
+    for style, attrs in doc.items():
+        for name, (lo, hi) in attrs.items():
+            table.set(style, name, int(lo), int(hi))
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main(mode: str = "decode") -> None:
+    if not STYLES_XML.exists():
+        sys.exit(f"styles.xml not found: {STYLES_XML}")
+    tables = [compile_styles(STYLES_XML, t) for t in TEMPLATES]
+
+    if mode == "encode":
+        doc = json.loads(STYLES_JSON.read_text("utf-8"))
+        for t in tables:
+            apply_json(t, doc.get(t.template, {}))
+        source = STYLES_XML.read_bytes().decode("utf-8")          # BOM kept as \ufeff
+        STYLES_OUT.write_bytes(write_styles_xml(tables, source).encode("utf-8"))
+        print(f"✓ Encoded {STYLES_JSON.name} → {STYLES_OUT.name}")
+        return
+
+    STYLES_JSON.write_text(
+        json.dumps({t.template: table_to_json(t) for t in tables}, indent=2), "utf-8")
+    for t in tables:
+        print(f"✓ {t.template}: {len(t.styles)} styles × {len(t.attributes)} records")
+    print(f"  → {STYLES_JSON.name}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "decode")
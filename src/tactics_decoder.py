@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+tactics/*.stra + tactics/<style>/*.tac  →  decoded objects + cached catalogue
+-----------------------------------------------------------------------------
+• .stra  (magic "rts.")  – one tactical style header per style folder
+• .tac   (magic "cat.")  – one formation: header, embedded strategy block,
+                           11 player slots, trailing instruction tables
+• decode_*() / encode_*() round-trip every stock file byte-for-byte; parts
+  whose meaning is not known yet are kept as raw bytes.
+• build_catalogue() parses every tactic ONCE and writes a compact JSON index
+  keyed  "style/formation-file"; load_catalogue() re-uses it until any
+  .tac/.stra changes size or mtime.
+
+Layout (all little-endian)
+
+    .stra   u16 0x0103 | "rts." | u16 ver_a | u16 ver_b | u32 0 | STRATEGY
+    .tac    u16 0x0103 | "cat." | 10-byte header (byte 3 = slot marker)
+            | u32 len + formation name | 13 bytes (01 + zeros) | STRATEGY
+            | 11 × SLOT | trailer
+
+    STRATEGY  u8 3 | u32 level_a | u32 level_b | 3 bytes (02 02 03)
+              | 12 bytes instruction bits | 0xFF | u32 len + name
+              | 4-byte tag (reversed four-cc, e.g. "TUOR" = ROUT)
+
+    SLOT      <marker> 00 02 | 3 × u32 position header | 01 01
+              | u32 n | n × ROLE | 00 00 00 00 FF 00
+    ROLE      u64 role bit-mask (same bits as ROLE_BIT_TO_NAME in
+              player_ratings_decoder.py) | 01 02 02 | 8 × 00 | FF | u32 0
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+import json
+import struct
+import sys
+
+# ───────────────────────── paths ────────────────────────────────
+ROOT_DIR      = Path(__file__).resolve().parent.parent
+TACTICS_DIR   = ROOT_DIR / "src" / "clean_simatch" / "tactics"
+CATALOGUE_OUT = ROOT_DIR / "tactics_catalogue.json"
+
+STRA_MAGIC = b"rts."
+TAC_MAGIC = b"cat."
+FORMAT_ID = 0x0103
+CATALOGUE_VERSION = 1
+
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_SLOT_HEADER = struct.Struct("<III")
+
+_ROLE_TAIL = b"\x01\x02\x02" + bytes(8) + b"\xff" + bytes(4)
+_SLOT_END = b"\x00\x00\x00\x00\xff\x00"
+
+
+# ───────────────────── data structures ──────────────────────────
+@dataclass
+class Strategy:
+    """The strategy block shared by .stra files and embedded in every .tac."""
+
+    kind: int                 # always 3 so far
+    level_a: int              # small enums, meaning unconfirmed
+    level_b: int
+    marker: bytes             # 02 02 03 in every stock file
+    instruction_bits: bytes   # 12-byte team-instruction bit-field
+    name: str
+    tag: bytes                # reversed four-cc
+
+    @property
+    def style_code(self) -> str:
+        return self.tag[::-1].decode("ascii", "replace")
+
+
+@dataclass
+class StrategyFile:
+    """A decoded .stra file."""
+
+    ver_a: int
+    ver_b: int
+    reserved: int
+    strategy: Strategy
+
+
+@dataclass
+class RoleOption:
+    role_mask: int
+    tail: bytes = _ROLE_TAIL
+
+
+@dataclass
+class PlayerSlot:
+    position: tuple[int, int, int]
+    roles: list[RoleOption]
+    end: bytes = _SLOT_END
+
+
+@dataclass
+class Tactic:
+    """A decoded .tac file."""
+
+    header: bytes                 # 10 bytes after the magic
+    formation: str
+    formation_pad: bytes
+    strategy: Strategy
+    slots: list[PlayerSlot] = field(default_factory=list)
+    trailer_ids: list[int] | None = None
+    trailer_rest: bytes = b""
+
+    @property
+    def slot_marker(self) -> bytes:
+        return bytes((self.header[3], 0x00, 0x02))
+
+
+# ═════════════════════════ DECODER ══════════════════════════════
+class _Reader:
+    def __init__(self, buf: bytes, pos: int = 0):
+        self.buf, self.pos = buf, pos
+
+    def take(self, n: int) -> bytes:
+        if self.pos + n > len(self.buf):
+            raise ValueError(f"unexpected EOF at 0x{self.pos:08X}")
+        out = self.buf[self.pos : self.pos + n]
+        self.pos += n
+        return out
+
+    def unpack(self, st: struct.Struct) -> tuple:
+        out = st.unpack_from(self.buf, self.pos)
+        self.pos += st.size
+        return out
+
+    def expect(self, raw: bytes, ctx: str) -> None:
+        got = self.take(len(raw))
+        if got != raw:
+            raise ValueError(f"{ctx}: expected {raw.hex()} at 0x{self.pos - len(raw):08X}, got {got.hex()}")
+
+    def text(self) -> str:
+        (n,) = self.unpack(_U32)
+        return self.take(n).decode("utf-8")
+
+
+def _check_magic(r: _Reader, magic: bytes) -> None:
+    (fmt,) = r.unpack(_U16)
+    if fmt != FORMAT_ID:
+        raise ValueError(f"unknown format id 0x{fmt:04X}")
+    r.expect(magic, "magic")
+
+
+def _read_strategy(r: _Reader) -> Strategy:
+    kind = r.take(1)[0]
+    if kind != 3:
+        raise ValueError(f"strategy: unexpected kind {kind} at 0x{r.pos - 1:08X}")
+    level_a, level_b = r.unpack(_U32)[0], r.unpack(_U32)[0]
+    marker = r.take(3)
+    bits = r.take(12)
+    r.expect(b"\xff", "strategy name")
+    name = r.text()
+    return Strategy(kind, level_a, level_b, marker, bits, name, r.take(4))
+
+
+def decode_stra(buf: bytes) -> StrategyFile:
+    r = _Reader(buf)
+    _check_magic(r, STRA_MAGIC)
+    ver_a, ver_b = r.unpack(_U16)[0], r.unpack(_U16)[0]
+    (reserved,) = r.unpack(_U32)
+    strategy = _read_strategy(r)
+    if r.pos != len(buf):
+        raise ValueError(f".stra: {len(buf) - r.pos} trailing byte(s)")
+    return StrategyFile(ver_a, ver_b, reserved, strategy)
+
+
+def decode_tac(buf: bytes) -> Tactic:
+    r = _Reader(buf)
+    _check_magic(r, TAC_MAGIC)
+    header = r.take(10)
+    formation = r.text()
+    pad = r.take(13)
+    tac = Tactic(header, formation, pad, _read_strategy(r))
+
+    marker = tac.slot_marker
+    while buf[r.pos : r.pos + 3] == marker:
+        r.pos += 3
+        position = r.unpack(_SLOT_HEADER)
+        r.expect(b"\x01\x01", "slot")
+        (n,) = r.unpack(_U32)
+        roles = []
+        for _ in range(n):
+            (mask,) = r.unpack(_U64)
+            roles.append(RoleOption(mask, r.take(len(_ROLE_TAIL))))
+        tac.slots.append(PlayerSlot(position, roles, r.take(len(_SLOT_END))))
+
+    if buf[r.pos : r.pos + 1] == b"\x01":
+        r.pos += 1
+        (n,) = r.unpack(_U32)
+        tac.trailer_ids = [r.unpack(_U64)[0] for _ in range(n)]
+    tac.trailer_rest = buf[r.pos :]
+    return tac
+
+
+# ═════════════════════════ ENCODER ══════════════════════════════
+def _text(s: str) -> bytes:
+    raw = s.encode("utf-8")
+    return _U32.pack(len(raw)) + raw
+
+
+def _write_strategy(s: Strategy) -> bytes:
+    return b"".join((
+        bytes((s.kind,)), _U32.pack(s.level_a), _U32.pack(s.level_b),
+        s.marker, s.instruction_bits, b"\xff", _text(s.name), s.tag,
+    ))
+
+
+def encode_stra(sf: StrategyFile) -> bytes:
+    return b"".join((
+        _U16.pack(FORMAT_ID), STRA_MAGIC, _U16.pack(sf.ver_a), _U16.pack(sf.ver_b),
+        _U32.pack(sf.reserved), _write_strategy(sf.strategy),
+    ))
+
+
+def encode_tac(tac: Tactic) -> bytes:
+    out = [_U16.pack(FORMAT_ID), TAC_MAGIC, tac.header, _text(tac.formation),
+           tac.formation_pad, _write_strategy(tac.strategy)]
+    for slot in tac.slots:
+        out += [tac.slot_marker, _SLOT_HEADER.pack(*slot.position), b"\x01\x01",
+                _U32.pack(len(slot.roles))]
+        for role in slot.roles:
+            out += [_U64.pack(role.role_mask), role.tail]
+        out.append(slot.end)
+    if tac.trailer_ids is not None:
+        out += [b"\x01", _U32.pack(len(tac.trailer_ids))]
+        out += [_U64.pack(i) for i in tac.trailer_ids]
+    out.append(tac.trailer_rest)
+    return b"".join(out)
+
+
+# ═════════════════════════ CATALOGUE ════════════════════════════
+def _strategy_summary(s: Strategy) -> dict[str, Any]:
+    return {
+        "name": s.name,
+        "code": s.style_code,
+        "level_a": s.level_a,
+        "level_b": s.level_b,
+        "instruction_bits": s.instruction_bits.hex(),
+    }
+
+
+def tactic_summary(tac: Tactic) -> dict[str, Any]:
+    return {
+        "formation": tac.formation,
+        "strategy": _strategy_summary(tac.strategy),
+        "slots": [
+            {"position": list(slot.position), "roles": [r.role_mask for r in slot.roles]}
+            for slot in tac.slots
+        ],
+        "trailer_ids": tac.trailer_ids or [],
+    }
+
+
+def _fingerprint(paths: list[Path]) -> dict[str, list[int]]:
+    out = {}
+    for p in paths:
+        st = p.stat()
+        out[p.as_posix()] = [st.st_size, st.st_mtime_ns]
+    return out
+
+
+def _tactic_files(tactics_dir: Path) -> list[Path]:
+    return sorted(tactics_dir.glob("*.stra")) + sorted(tactics_dir.glob("*/*.tac"))
+
+
+def build_catalogue(tactics_dir: Path = TACTICS_DIR) -> dict[str, Any]:
+    """Parse every .stra/.tac under *tactics_dir* once."""
+    tactics_dir = Path(tactics_dir)
+    files = _tactic_files(tactics_dir)
+    styles: dict[str, Any] = {}
+    tactics: dict[str, Any] = {}
+    for path in files:
+        rel = path.relative_to(tactics_dir)
+        if path.suffix == ".stra":
+            styles[path.stem] = _strategy_summary(decode_stra(path.read_bytes()).strategy)
+        else:
+            tactics[f"{rel.parent.as_posix()}/{path.stem}"] = {
+                "file": rel.as_posix(),
+                **tactic_summary(decode_tac(path.read_bytes())),
+            }
+    return {
+        "catalogue_version": CATALOGUE_VERSION,
+        "fingerprint": _fingerprint(files),
+        "styles": styles,
+        "tactics": tactics,
+    }
+
+
+def save_catalogue(cat: dict[str, Any], path: Path = CATALOGUE_OUT) -> None:
+    Path(path).write_text(json.dumps(cat, separators=(",", ":")), "utf-8")
+
+
+def load_catalogue(tactics_dir: Path = TACTICS_DIR, path: Path = CATALOGUE_OUT) -> dict[str, Any]:
+    """Return the cached catalogue, rebuilding it if any tactic file changed."""
+    path = Path(path)
+    if path.exists():
+        try:
+            cat = json.loads(path.read_text("utf-8"))
+            if (cat.get("catalogue_version") == CATALOGUE_VERSION
+                    and cat.get("fingerprint") == _fingerprint(_tactic_files(Path(tactics_dir)))):
+                return cat
+        except (ValueError, OSError):
+            pass
+    cat = build_catalogue(tactics_dir)
+    save_catalogue(cat, path)
+    return cat
+
+
+def tactics_for_style(cat: dict[str, Any], style: str) -> dict[str, Any]:
+    prefix = f"{style}/"
+    return {k[len(prefix):]: v for k, v in cat["tactics"].items() if k.startswith(prefix)}
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main() -> None:
+    if not TACTICS_DIR.exists():
+        sys.exit(f"Tactics folder not found: {TACTICS_DIR}")
+
+    cat = build_catalogue(TACTICS_DIR)
+    save_catalogue(cat, CATALOGUE_OUT)
+    print(f"✓ Catalogued {len(cat['styles'])} styles, {len(cat['tactics'])} tactics "
+          f"→ {CATALOGUE_OUT.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+tree_decoder.py — decode a whole extracted simatch folder in one go
+-------------------------------------------------------------------
+• Walks <simatch>/, sniffs every file's type and decodes it in a process
+  pool (one worker per core by default).
+• Writes a mirrored tree of human-editable files:
+
+      *.jsb             → *.jsb.json          (jsb_codec)
+      *.tac / *.stra    → *.tac.json / *.stra.json   (tactics_decoder)
+      match_sounds.cfg  → match_sounds.cfg.json      (sound_config)
+      *.xml, XML *.cfg  → copied as-is (already text)
+      *.bta             → copied as-is + *.bta.json summary (format unknown)
+
+• decode_bytes(kind, buf) is the reusable "file → plain Python" step;
+  decode_cached() adds the shared on-disk cache from decode_cache.py, so
+  stock files that reappear in every mod are only decoded once.
+
+python tree_decoder.py [simatch_dir] [out_dir] [-j N] [--cache]
+"""
+
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+from typing import Any, Callable
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+from decode_cache import DecodeCache
+from jsb_codec import decode_jsb
+from tactics_decoder import decode_stra, decode_tac
+
+# ───────────────────────── paths ────────────────────────────────
+ROOT_DIR    = Path(__file__).resolve().parent.parent
+SIMATCH_DIR = ROOT_DIR / "src" / "clean_simatch"
+DECODED_DIR = ROOT_DIR / "decoded_simatch"
+
+# bump whenever any decoder's output shape changes
+DECODER_VERSION = 1
+
+
+# ═════════════════════════ DETECTION ════════════════════════════
+def detect_kind(name: str, head: bytes) -> str | None:
+    """Classify a file from its name and first bytes; None = not decodable."""
+    suffix = Path(name).suffix.lower()
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+    if suffix == ".jsb":
+        return "jsb"
+    if suffix in (".tac", ".stra"):
+        return suffix[1:]
+    if suffix == ".bta":
+        return "bta"
+    if suffix == ".xml" or (suffix == ".cfg" and text.startswith(b"<")):
+        return "xml"
+    if suffix == ".cfg":
+        return "sounds"
+    return None
+
+
+# ═════════════════════════ DECODERS ═════════════════════════════
+def _plain(obj: Any) -> Any:
+    """Dataclasses / bytes / tuples → JSON-able values (bytes become hex)."""
+    if is_dataclass(obj):
+        return _plain(asdict(obj))
+    if isinstance(obj, dict):
+        return {k: _plain(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_plain(v) for v in obj]
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.hex()
+    return obj
+
+
+def _xml_tree(elem: ET.Element) -> dict[str, Any]:
+    node: dict[str, Any] = {"tag": elem.tag}
+    if elem.attrib:
+        node["attrib"] = dict(elem.attrib)
+    if elem.text and elem.text.strip():
+        node["text"] = elem.text.strip()
+    if len(elem):
+        node["children"] = [_xml_tree(c) for c in elem]
+    return node
+
+
+def _decode_xml(buf: bytes) -> Any:
+    return _xml_tree(ET.fromstring(buf))
+
+
+def _decode_sounds(buf: bytes) -> Any:
+    from sound_config import parse_sound_config         # numpy: only match_sounds.cfg needs it
+
+    return [_plain(e) for e in parse_sound_config(buf.decode("utf-8")).entries]
+
+
+def _decode_bta(buf: bytes) -> Any:
+    return {"size": len(buf), "sha256": hashlib.sha256(buf).hexdigest(), "head": buf[:64].hex()}
+
+
+DECODERS: dict[str, Callable[[bytes], Any]] = {
+    "jsb": decode_jsb,
+    "tac": lambda b: _plain(decode_tac(b)),
+    "stra": lambda b: _plain(decode_stra(b)),
+    "xml": _decode_xml,
+    "sounds": _decode_sounds,
+    "bta": _decode_bta,
+}
+
+# kinds whose source file is already the editable form
+VERBATIM = {"xml", "bta"}
+
+
+def decode_bytes(kind: str, buf: bytes) -> Any:
+    return DECODERS[kind](buf)
+
+
+_CACHE: DecodeCache | None = None
+
+
+def decode_cached(kind: str, buf: bytes) -> Any:
+    """decode_bytes() through the per-process handle on the shared cache."""
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = DecodeCache()
+    return _CACHE.fetch(kind, buf, DECODERS[kind], DECODER_VERSION)
+
+
+# ═════════════════════════ TREE WALK ════════════════════════════
+def iter_tree(root: Path) -> list[tuple[str, str]]:
+    """[(relative posix path, kind)] for every decodable file, largest first."""
+    found = []
+    for path in root.rglob("*"):
+        if not path.is_file():
+            continue
+        with open(path, "rb") as fh:
+            kind = detect_kind(path.name, fh.read(64))
+        if kind:
+            found.append((path.stat().st_size, path.relative_to(root).as_posix(), kind))
+    found.sort(key=lambda t: (-t[0], t[1]))           # big files first → better packing
+    return [(rel, kind) for _, rel, kind in found]
+
+
+def _decode_one(task: tuple[str, str, str, str, bool]) -> tuple[str, str, list[str], str | None]:
+    src_root, out_root, rel, kind, cached = task
+    src, out = Path(src_root) / rel, Path(out_root) / rel
+    written = []
+    try:
+        buf = src.read_bytes()
+        doc = (decode_cached if cached else decode_bytes)(kind, buf)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        if kind in VERBATIM:
+            out.write_bytes(buf)
+            written.append(rel)
+        if kind not in VERBATIM or kind == "bta":
+            target = out.with_name(out.name + ".json")
+            target.write_text(json.dumps(doc, indent=2, ensure_ascii=False), "utf-8")
+            written.append(f"{rel}.json")
+        return rel, kind, written, None
+    except Exception as exc:                       # report, keep going
+        return rel, kind, written, f"{type(exc).__name__}: {exc}"
+
+
+def decode_tree(src_root: Path, out_root: Path, workers: int | None = None,
+                cached: bool = False) -> list[tuple]:
+    """Decode every file under *src_root* into *out_root*; returns per-file results."""
+    src_root, out_root = Path(src_root), Path(out_root)
+    tasks = [(str(src_root), str(out_root), rel, kind, cached) for rel, kind in iter_tree(src_root)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [_decode_one(t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_decode_one, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main(argv: list[str]) -> None:
+    ap = argparse.ArgumentParser(description="Decode every file in an extracted simatch folder.")
+    ap.add_argument("src", nargs="?", type=Path, default=SIMATCH_DIR)
+    ap.add_argument("out", nargs="?", type=Path, default=DECODED_DIR)
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    ap.add_argument("--cache", action="store_true", help="reuse/populate the on-disk decode cache")
+    args = ap.parse_args(argv)
+    if not args.src.is_dir():
+        sys.exit(f"simatch folder not found: {args.src}")
+
+    t0 = time.perf_counter()
+    results = decode_tree(args.src, args.out, args.jobs, args.cache)
+    failed = [(rel, err) for rel, _, _, err in results if err]
+    counts: dict[str, int] = {}
+    for _, kind, _, err in results:
+        if not err:
+            counts[kind] = counts.get(kind, 0) + 1
+
+    print(f"✓ Decoded {len(results) - len(failed)}/{len(results)} files → {args.out} "
+          f"in {time.perf_counter() - t0:.2f}s")
+    print("  " + ", ".join(f"{k}: {n}" for k, n in sorted(counts.items())))
+    for rel, err in failed:
+        print(f"⚠️  {rel}: {err}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+tree_diff.py — field-by-field diff of two simatch trees / .fmf archives
+-----------------------------------------------------------------------
+• Either side may be an extracted folder or an .fmf archive (read in place
+  through fmf_archive.py, no extraction step).
+• Pass 1 (threads): size + content hash per file – unchanged files are
+  dropped without decoding.  Two archives whose packed bytes match are
+  not even inflated.
+• Pass 2 (processes): only the changed candidates are decoded with
+  tree_decoder.decode_bytes() and compared structurally.
+• Changes are reported with JSON paths such as
+      values[2].role_data[14].coefficients[7].value
+• Folder vs archive only: entries the shipped simatch.fmf carries beyond
+  the clean extraction (ARCHIVE_ONLY, e.g. events/match_events.xml) are
+  listed as expected extras instead of as added / removed.  Between two
+  folders or two archives they are diffed like any other file.
+
+python tree_diff.py <old> <new> [-j N] [--json report.json] [--cache]
+"""
+
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+from tree_decoder import decode_bytes, decode_cached, detect_kind
+
+MAX_CHANGES_SHOWN = 20
+ARCHIVE_ONLY = frozenset({"events/match_events.xml"})    # in simatch.fmf, not in clean_simatch/
+
+
+# ═════════════════════════ SOURCES ══════════════════════════════
+class FolderSource:
+    """An extracted simatch folder."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.sizes = {
+            p.relative_to(self.root).as_posix(): p.stat().st_size
+            for p in self.root.rglob("*") if p.is_file()
+        }
+
+    def read(self, rel: str) -> bytes:
+        return (self.root / rel).read_bytes()
+
+    def digest(self, rel: str) -> str:
+        return hashlib.blake2b(self.read(rel), digest_size=16).hexdigest()
+
+    def packed(self, rel: str) -> None:
+        return None
+
+
+class ArchiveSource:
+    """An .fmf archive."""
+
+    def __init__(self, path: Path):
+        from fmf_archive import FmfArchive              # zstandard: only .fmf sources need it
+
+        self.fmf = FmfArchive(path)
+        self.sizes = {p: e.size for p, e in self.fmf.entries.items()}
+
+    def read(self, rel: str) -> bytes:
+        return self.fmf.read(rel)
+
+    def digest(self, rel: str) -> str:
+        return self.fmf.digest(rel)
+
+    def packed(self, rel: str) -> memoryview:
+        return self.fmf.packed(rel)
+
+
+_OPEN: dict[str, FolderSource | ArchiveSource] = {}
+
+
+def open_source(path: Path | str) -> FolderSource | ArchiveSource:
+    """Open (and memoise per process) a folder or .fmf archive."""
+    key = str(Path(path).resolve())
+    if key not in _OPEN:
+        _OPEN[key] = FolderSource(Path(key)) if Path(key).is_dir() else ArchiveSource(Path(key))
+    return _OPEN[key]
+
+
+# ═════════════════════ STRUCTURAL DIFF ══════════════════════════
+def diff_values(old: Any, new: Any, path: str = "") -> list[tuple[str, str, Any, Any]]:
+    """[(path, "changed" | "added" | "removed", old, new)] between two decoded docs."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        out = []
+        for k in old:
+            sub = f"{path}.{k}" if path else k
+            if k in new:
+                out += diff_values(old[k], new[k], sub)
+            else:
+                out.append((sub, "removed", old[k], None))
+        for k in new:
+            if k not in old:
+                out.append((f"{path}.{k}" if path else k, "added", None, new[k]))
+        return out
+    if isinstance(old, list) and isinstance(new, list):
+        out = []
+        for i in range(min(len(old), len(new))):
+            out += diff_values(old[i], new[i], f"{path}[{i}]")
+        out += [(f"{path}[{i}]", "removed", old[i], None) for i in range(len(new), len(old))]
+        out += [(f"{path}[{i}]", "added", None, new[i]) for i in range(len(old), len(new))]
+        return out
+    if type(old) is not type(new) or old != new:
+        return [(path, "changed", old, new)]
+    return []
+
+
+@dataclass
+class TreeDiff:
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    expected: list[str] = field(default_factory=list)
+    unchanged: int = 0
+    changed: dict[str, list[tuple[str, str, Any, Any]]] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "added": self.added,
+            "removed": self.removed,
+            "expected": self.expected,
+            "unchanged": self.unchanged,
+            "changed": {
+                rel: [{"path": p, "op": op, "old": a, "new": b} for p, op, a, b in changes]
+                for rel, changes in self.changed.items()
+            },
+            "errors": self.errors,
+        }
+
+
+# ═════════════════════════ PIPELINE ═════════════════════════════
+def _same(a: FolderSource | ArchiveSource, b: FolderSource | ArchiveSource, rel: str) -> bool:
+    if a.sizes[rel] != b.sizes[rel]:
+        return False
+    pa, pb = a.packed(rel), b.packed(rel)
+    if pa is not None and pb is not None and pa == pb:
+        return True
+    return a.digest(rel) == b.digest(rel)
+
+
+def _diff_file(task: tuple[str, str, str, bool]) -> tuple[str, list | None, str | None]:
+    old_path, new_path, rel, cached = task
+    try:
+        old_buf = open_source(old_path).read(rel)
+        new_buf = open_source(new_path).read(rel)
+        kind = detect_kind(rel, new_buf[:64])
+        if kind is None:
+            return rel, [("", "changed", f"{len(old_buf)} bytes", f"{len(new_buf)} bytes")], None
+        decode = decode_cached if cached else decode_bytes
+        return rel, diff_values(decode(kind, old_buf), decode(kind, new_buf)), None
+    except Exception as exc:
+        return rel, None, f"{type(exc).__name__}: {exc}"
+
+
+def diff_trees(old: Path, new: Path, workers: int | None = None, cached: bool = False) -> TreeDiff:
+    a, b = open_source(old), open_source(new)
+    added, removed = set(b.sizes) - set(a.sizes), set(a.sizes) - set(b.sizes)
+    exempt = ARCHIVE_ONLY if type(a) is not type(b) else frozenset()     # extraction vs archive
+    report = TreeDiff(
+        added=sorted(added - exempt),
+        removed=sorted(removed - exempt),
+        expected=sorted((added | removed) & exempt),
+    )
+    common = sorted(set(a.sizes) & set(b.sizes))
+    workers = workers or os.cpu_count() or 1
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        same = list(pool.map(lambda rel: _same(a, b, rel), common))
+    candidates = [rel for rel, s in zip(common, same) if not s]
+    report.unchanged = len(common) - len(candidates)
+
+    tasks = [(str(old), str(new), rel, cached) for rel in candidates]
+    if workers == 1 or len(tasks) <= 1:
+        results = [_diff_file(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(_diff_file, tasks))
+    for rel, changes, err in results:
+        if err:
+            report.errors[rel] = err
+        elif changes:
+            report.changed[rel] = changes
+        else:
+            report.unchanged += 1                     # bytes differ, content equal
+    return report
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def _short(v: Any) -> str:
+    text = json.dumps(v, ensure_ascii=False)
+    return text if len(text) <= 60 else text[:57] + "…"
+
+
+def main(argv: list[str]) -> None:
+    ap = argparse.ArgumentParser(description="Diff two simatch folders / .fmf archives.")
+    ap.add_argument("old", type=Path)
+    ap.add_argument("new", type=Path)
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="workers (default: all cores)")
+    ap.add_argument("--json", type=Path, default=None, help="write the full report here")
+    ap.add_argument("--cache", action="store_true", help="reuse/populate the on-disk decode cache")
+    args = ap.parse_args(argv)
+    for p in (args.old, args.new):
+        if not p.exists():
+            sys.exit(f"Not found: {p}")
+
+    t0 = time.perf_counter()
+    try:
+        report = diff_trees(args.old, args.new, args.jobs, args.cache)
+    except RuntimeError as e:                           # .fmf without zstandard
+        sys.exit(f"⛔ {e}")
+
+    for rel in report.added:
+        print(f"+ {rel}")
+    for rel in report.removed:
+        print(f"- {rel}")
+    for rel in report.expected:
+        print(f"  {rel}  (archive-only, expected)")
+    for rel, changes in report.changed.items():
+        print(f"~ {rel}  ({len(changes)} change(s))")
+        for p, op, old, new in changes[:MAX_CHANGES_SHOWN]:
+            if op == "changed":
+                print(f"    {p}: {_short(old)} → {_short(new)}")
+            else:
+                print(f"    {op} {p}: {_short(new if op == 'added' else old)}")
+        if len(changes) > MAX_CHANGES_SHOWN:
+            print(f"    … {len(changes) - MAX_CHANGES_SHOWN} more")
+    for rel, err in report.errors.items():
+        print(f"⚠️  {rel}: {err}")
+
+    if args.json:
+        args.json.write_text(json.dumps(report.to_json(), indent=2, ensure_ascii=False), "utf-8")
+    print(f"✓ {len(report.changed)} changed, {len(report.added)} added, {len(report.removed)} "
+          f"removed, {report.unchanged} unchanged  ({time.perf_counter() - t0:.2f}s)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+virtual_tree.py — in-memory simatch tree that packs without touching disk
+-------------------------------------------------------------------------
+• VirtualTree.open(src) maps a clean tree – a folder (one mmap per file)
+  or an .fmf archive – and holds every file as a zero-copy memoryview.
+• tree.copy() is a cheap overlay (shares every blob); set() / remove()
+  only touch the variant's own entries, so a sweep keeps one clean tree
+  in memory and a handful of patched buffers per variant.
+• Output streams straight from the blobs:
+      write_fmf()     unchanged files from an .fmf source are copied as
+                      packed chunk runs; other blobs are compressed once and
+                      the result is cached on the blob, so every variant of
+                      a sweep reuses it
+      write_zip()     zip (deflate or stored), entries under "<root>/"
+      write_folder()  the old materialised folder, for the Resource Archiver
+
+python virtual_tree.py <clean dir | .fmf> <out.fmf | out.zip | out_dir>
+"""
+
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO, Iterator
+import mmap
+import os
+import sys
+import time
+import zipfile
+
+from fmf_archive import FmfArchive, FmfWriter, pack_chunks
+
+# ───────────────────────── paths ────────────────────────────────
+ROOT_DIR    = Path(__file__).resolve().parent.parent
+SIMATCH_DIR = ROOT_DIR / "src" / "clean_simatch"
+
+
+# ═════════════════════════ BLOBS ════════════════════════════════
+class Blob(ABC):
+    """One file: raw bytes on demand, packed chunk run cached after first use."""
+    __slots__ = ("size", "modified", "_packed")
+
+    def __init__(self, size: int, modified: int):
+        self.size, self.modified = size, modified
+        self._packed: bytes | memoryview | None = None
+
+    @abstractmethod
+    def data(self) -> bytes | memoryview:
+        """The file's raw bytes."""
+
+    def packed(self) -> bytes | memoryview:
+        if self._packed is None:
+            self._packed = pack_chunks(self.data())
+        return self._packed
+
+    def release(self) -> None:
+        self._packed = None
+
+
+class BufferBlob(Blob):
+    __slots__ = ("_data",)
+
+    def __init__(self, data: bytes | memoryview, modified: int | None = None):
+        super().__init__(len(data), int(time.time() if modified is None else modified))
+        self._data = data
+
+    def data(self) -> bytes | memoryview:
+        return self._data
+
+
+class MappedBlob(Blob):
+    """A file in a folder, memory-mapped read-only."""
+    __slots__ = ("_map", "_view")
+
+    def __init__(self, path: Path):
+        st = os.stat(path)
+        super().__init__(st.st_size, int(st.st_mtime))
+        self._map = None
+        self._view: memoryview | bytes = b""
+        if st.st_size:
+            with open(path, "rb") as fh:
+                self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._map)
+
+    def data(self) -> memoryview | bytes:
+        return self._view
+
+    def release(self) -> None:
+        super().release()
+        if self._map is not None:
+            self._view.release()
+            self._map.close()
+            self._map = None
+
+
+class ArchiveBlob(Blob):
+    """A file inside an open FmfArchive; packed() is the archive's own bytes."""
+    __slots__ = ("_archive", "_path")
+
+    def __init__(self, archive: FmfArchive, path: str):
+        e = archive.entries[path]
+        super().__init__(e.size, e.modified)
+        self._archive, self._path = archive, path
+        self._packed = archive.packed(path)
+
+    def data(self) -> bytes:
+        return self._archive.read(self._path)
+
+    def release(self) -> None:
+        if isinstance(self._packed, memoryview):
+            self._packed.release()
+        self._packed = None
+
+
+# ═════════════════════════ TREE ═════════════════════════════════
+class VirtualTree:
+    def __init__(self, root: str = "simatch", files: dict[str, Blob] | None = None):
+        self.root = root
+        self.files: dict[str, Blob] = dict(files or {})
+        self._owned: list = []                 # archives / blobs closed by close()
+
+    @classmethod
+    def from_folder(cls, folder: Path, root: str = "simatch") -> "VirtualTree":
+        folder = Path(folder)
+        tree = cls(root)
+        for p in sorted(folder.rglob("*")):
+            if p.is_file():
+                tree.files[p.relative_to(folder).as_posix()] = blob = MappedBlob(p)
+                tree._owned.append(blob)
+        return tree
+
+    @classmethod
+    def from_archive(cls, path: Path) -> "VirtualTree":
+        archive = FmfArchive(path)
+        tree = cls(archive.root, {rel: ArchiveBlob(archive, rel) for rel in archive.entries})
+        tree._owned += [*tree.files.values(), archive]
+        return tree
+
+    @classmethod
+    def open(cls, src: Path) -> "VirtualTree":
+        src = Path(src)
+        return cls.from_archive(src) if src.is_file() else cls.from_folder(src)
+
+    # ---- editing ------------------------------------------------------
+    def copy(self) -> "VirtualTree":
+        """Overlay sharing every blob; edits to the copy stay in the copy."""
+        return VirtualTree(self.root, self.files)
+
+    def set(self, rel: str, data: bytes | str) -> None:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.files[rel] = BufferBlob(data)
+
+    def remove(self, rel: str) -> None:
+        del self.files[rel]
+
+    def read(self, rel: str) -> bytes | memoryview:
+        return self.files[rel].data()
+
+    def __contains__(self, rel: str) -> bool:
+        return rel in self.files
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.files)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    @property
+    def size(self) -> int:
+        return sum(b.size for b in self.files.values())
+
+    # ---- output -------------------------------------------------------
+    def write_fmf(self, dest: Path | BinaryIO) -> int:
+        def run(fh: BinaryIO) -> int:
+            with FmfWriter(fh, self.root) as w:
+                for rel, blob in self.files.items():
+                    w.add_packed(rel, blob.packed(), blob.size, blob.modified)
+            return fh.tell()
+        if isinstance(dest, (str, Path)):
+            with open(dest, "wb") as fh:
+                return run(fh)
+        return run(dest)
+
+    def write_zip(self, dest: Path | BinaryIO, compression: int = zipfile.ZIP_DEFLATED) -> None:
+        with zipfile.ZipFile(dest, "w", compression) as zf:
+            for rel, blob in self.files.items():
+                info = zipfile.ZipInfo(f"{self.root}/{rel}", time.localtime(blob.modified)[:6])
+                info.compress_type = compression
+                with zf.open(info, "w") as out:
+                    out.write(blob.data())
+
+    def write_folder(self, dest: Path) -> None:
+        dest = Path(dest)
+        for rel, blob in self.files.items():
+            path = dest / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(blob.data())
+            os.utime(path, (blob.modified, blob.modified))
+
+    def write(self, dest: Path) -> None:
+        """Pick the writer from *dest*'s suffix: .fmf, .zip, or a folder."""
+        suffix = Path(dest).suffix.lower()
+        if suffix == ".fmf":
+            self.write_fmf(dest)
+        elif suffix == ".zip":
+            self.write_zip(dest)
+        else:
+            self.write_folder(dest)
+
+    def close(self) -> None:
+        for obj in self._owned:
+            (obj.release if isinstance(obj, Blob) else obj.close)()
+        self._owned.clear()
+
+    def __enter__(self) -> "VirtualTree":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# ═════════════════════════ main() ═══════════════════════════════
+def main(argv: list[str]) -> None:
+    if len(argv) != 2:
+        sys.exit("usage: virtual_tree.py <clean dir | .fmf> <out.fmf | out.zip | out_dir>")
+    t0 = time.perf_counter()
+    try:
+        with VirtualTree.open(Path(argv[0])) as tree:
+            tree.write(Path(argv[1]))
+            print(f"✓ {len(tree)} files ({tree.size / 1e6:.1f} MB raw) → {argv[1]} "
+                  f"in {time.perf_counter() - t0:.2f}s")
+    except RuntimeError as e:                           # .fmf without zstandard
+        sys.exit(f"⛔ {e}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
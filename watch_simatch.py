@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+watch_simatch.py — keep simatch/ in sync with the three input files while you edit
+----------------------------------------------------------------------------------
+Same output as prepare_simatch.py, but long-running:
+
+    physical_constraints.json  → simatch/physics/physical_constraints.jsb
+    weights.json               → simatch/weights.json            (replaces weights.jsb)
+    player_ratings_data.xlsx   → simatch/player_ratings_data.json (replaces the .jsb)
+
+• The clean tree is mapped once (virtual_tree); the clean ratings JSON and
+  physics .jsb the renders start from stay cached in memory.
+• The inputs are polled; when one changes (and has stopped changing), only
+  that input is re-read, validated with input_rules and re-rendered, and
+  only the output files whose bytes actually changed are rewritten.
+• A save that fails validation is reported and leaves simatch/ untouched.
+• --fmf PATH also re-packs an archive after every change; unchanged files
+  reuse their compressed chunks, so a re-pack is a few milliseconds.
+• The first sync reuses an existing simatch/ folder – files that already
+  match are left alone, stale ones are replaced or removed.  Only files
+  named like simatch files are ever deleted, and a non-empty -o that is
+  not a simatch folder is refused.
+
+python watch_simatch.py [--fmf simatch.fmf] [--interval 0.2] [--once]
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from input_rules import VariantInputs, has_errors, validate_batch  # noqa: E402
+from virtual_tree import VirtualTree  # noqa: E402
+from build_variants import PHYSICS_REL, read_ratings_checked, render_plan, render_ratings  # noqa: E402
+from patch_plan import from_physics  # noqa: E402
+from prepare_simatch import (  # noqa: E402
+    CLEAN_FOLDER,
+    PHYSICS_JSON,
+    RATINGS_XLSX,
+    SIMATCH_FOLDER,
+    WEIGHTS_JSON,
+)
+
+# ── config ────────────────────────────────────────────────────────
+POLL_INTERVAL = 0.2          # seconds between stat() polls
+WEIGHTS_REL = ("weights.jsb", "weights.json")
+RATINGS_REL = ("player_ratings_data.jsb", "player_ratings_data.json")
+
+
+# ──────────────────────────────────────────────────────────────────
+# Inputs
+# ──────────────────────────────────────────────────────────────────
+@dataclass
+class WatchedInput:
+    """One input file: how to parse it and which output files it owns."""
+
+    name: str
+    path: Path
+    parse: Callable[[Path], Any]
+    render: Callable[[Any], dict[str, bytes | None]]   # rel → bytes, None = absent
+    stamp: tuple[int, int] | None = None
+    value: Any = None
+
+    def current_stamp(self) -> tuple[int, int] | None:
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+
+@lru_cache(maxsize=None)
+def _clean_bytes(rel: str) -> bytes:
+    return (CLEAN_FOLDER / rel).read_bytes()
+
+
+def _parse_json(path: Path) -> Any:
+    return json.loads(path.read_text("utf-8"))
+
+
+def _render_physics(updates: dict[str, int] | None) -> dict[str, bytes | None]:
+    rel = PHYSICS_REL.as_posix()
+    return {rel: render_plan(rel, tuple(from_physics(updates or {})))}
+
+
+def _render_weights(raw: bytes | None) -> dict[str, bytes | None]:
+    jsb, js = WEIGHTS_REL
+    if raw is None:
+        return {jsb: _clean_bytes(jsb), js: None}
+    return {jsb: None, js: raw}
+
+
+def _render_ratings(parsed: tuple[dict, dict] | None) -> dict[str, bytes | None]:
+    jsb, js = RATINGS_REL
+    if parsed is None:
+        return {jsb: _clean_bytes(jsb), js: None}
+    return {jsb: None, js: render_ratings(parsed[0]).encode("utf-8")}
+
+
+# ──────────────────────────────────────────────────────────────────
+# Watcher
+# ──────────────────────────────────────────────────────────────────
+class SimatchWatcher:
+    def __init__(self, out_dir: Path = SIMATCH_FOLDER, fmf: Path | None = None, log=print):
+        self.out_dir = Path(out_dir)
+        self.fmf = fmf
+        self.log = log
+        self.clean = VirtualTree.from_folder(CLEAN_FOLDER)
+        self.tree = self.clean.copy()
+        self.inputs = [
+            WatchedInput("physics", PHYSICS_JSON, _parse_json, _render_physics),
+            WatchedInput("weights", WEIGHTS_JSON, Path.read_bytes, _render_weights),
+            WatchedInput("ratings", RATINGS_XLSX, read_ratings_checked, _render_ratings),
+        ]
+
+    # ---- validation -------------------------------------------------
+    def _variant(self, staged: dict[str, Any]) -> VariantInputs:
+        v = {i.name: staged.get(i.name, i.value) for i in self.inputs}
+        inputs = VariantInputs("simatch", physics=v["physics"] or None)
+        if v["weights"] is not None:
+            inputs.weights = json.loads(v["weights"])
+        if v["ratings"] is not None:
+            edits, rejects = v["ratings"]
+            inputs.ratings = {b: {**edits.get(b, {}), **rejects.get(b, {})}
+                              for b in edits.keys() | rejects.keys()}
+        return inputs
+
+    # ---- output -----------------------------------------------------
+    def _write(self, rel: str, data: bytes | None) -> bool:
+        """Bring one output file in line with *data*; False if it already was."""
+        path = self.out_dir / rel
+        if data is None:
+            if rel in self.tree:
+                self.tree.remove(rel)
+            if path.exists():
+                path.unlink()
+                return True
+            return False
+        if rel not in self.tree or self.tree.files[rel].size != len(data) or self.tree.read(rel) != data:
+            self.tree.set(rel, data)                    # clean files keep their mapped blob
+        if path.exists() and path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        return True
+
+    def _pack(self) -> None:
+        if self.fmf is not None:
+            t0 = time.perf_counter()
+            self.tree.write(self.fmf)
+            self.log(f"  packed {self.fmf.name} in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    def check_out_dir(self) -> None:
+        """Refuse to sync into a non-empty folder that is not a simatch tree (e.g. a typo'd -o)."""
+        if not self.out_dir.exists() or not any(self.out_dir.iterdir()):
+            return
+        if not (self.out_dir / PHYSICS_REL).is_file():
+            raise SystemExit(f"⛔ {self.out_dir} is not empty and does not look like a simatch folder "
+                             f"(no {PHYSICS_REL.as_posix()}) – pick another -o or empty it first.")
+
+    def sync(self) -> int:
+        """Initial pass: parse every input and reconcile the whole output folder."""
+        self.check_out_dir()
+        staged = {}
+        for inp in self.inputs:
+            inp.stamp = inp.current_stamp()
+            staged[inp.name] = inp.parse(inp.path) if inp.stamp else None
+        issues = validate_batch([self._variant(staged)])["simatch"]
+        self._report(issues)
+        if has_errors(issues):
+            raise SystemExit("Fix the values above and rerun – simatch/ has not been touched.")
+
+        wanted: dict[str, bytes | None] = {}
+        for inp in self.inputs:
+            inp.value = staged[inp.name]
+            wanted.update(inp.render(inp.value))
+        changed = 0
+        for rel in list(self.clean):
+            if rel not in wanted:
+                changed += self._write(rel, self.clean.read(rel))
+        for rel, data in wanted.items():
+            changed += self._write(rel, data)
+        if self.out_dir.exists():
+            ours = set(self.clean) | {WEIGHTS_REL[1], RATINGS_REL[1]}
+            for p in self.out_dir.rglob("*"):
+                rel = p.relative_to(self.out_dir).as_posix()
+                if p.is_file() and rel not in self.tree:
+                    if rel in ours:                     # e.g. weights.jsb once weights.json replaces it
+                        p.unlink()
+                        changed += 1
+                    else:
+                        self.log(f"⚠️  {rel}: not part of simatch – left alone")
+        self._pack()
+        return changed
+
+    def poll(self) -> list[str]:
+        """Re-apply every input whose file changed and has settled; returns their names."""
+        done = []
+        for inp in self.inputs:
+            stamp = inp.current_stamp()
+            if stamp == inp.stamp:
+                continue
+            time.sleep(0.05)                            # let the editor finish writing
+            if inp.current_stamp() != stamp:
+                continue
+            inp.stamp = stamp
+            if self.apply(inp):
+                done.append(inp.name)
+        if done:
+            self._pack()
+        return done
+
+    def apply(self, inp: WatchedInput) -> bool:
+        t0 = time.perf_counter()
+        try:
+            value = inp.parse(inp.path) if inp.stamp else None
+        except Exception as e:                          # half-written / locked: next save retries
+            self.log(f"⚠️  {inp.path.name}: could not read ({e})")
+            return False
+        issues = validate_batch([self._variant({inp.name: value})])["simatch"]
+        self._report(issues)
+        if has_errors(issues):
+            self.log(f"⚠️  {inp.path.name}: not applied, simatch/ keeps the last good values")
+            return False
+
+        inp.value = value
+        written = [rel for rel, data in inp.render(value).items() if self._write(rel, data)]
+        ms = (time.perf_counter() - t0) * 1000
+        what = ", ".join(written) if written else "no output change"
+        self.log(f"✓ {inp.path.name} → {what}  ({ms:.0f} ms)")
+        return True
+
+    def _report(self, issues) -> None:
+        for issue in issues:
+            self.log(f"  {issue.severity}: {issue}")
+
+    def run(self, interval: float = POLL_INTERVAL) -> None:
+        self.log(f"Watching {', '.join(i.path.name for i in self.inputs)} – Ctrl+C to stop")
+        try:
+            while True:
+                self.poll()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+
+    def close(self) -> None:
+        self.clean.close()
+
+
+def main(argv: list[str]) -> None:
+    ap = argparse.ArgumentParser(description="Rebuild simatch/ incrementally whenever an input file is saved.")
+    ap.add_argument("-o", "--out", type=Path, default=SIMATCH_FOLDER)
+    ap.add_argument("--fmf", type=Path, default=None, help="also re-pack this archive after every change")
+    ap.add_argument("--interval", type=float, default=POLL_INTERVAL, help="seconds between polls")
+    ap.add_argument("--once", action="store_true", help="sync once and exit")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    watcher = SimatchWatcher(args.out, args.fmf)
+    try:
+        changed = watcher.sync()
+        print(f"✓ {args.out.name}/ in sync ({changed} file(s) written or removed) "
+              f"in {time.perf_counter() - t0:.2f}s")
+        if not args.once:
+            watcher.run(args.interval)
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])